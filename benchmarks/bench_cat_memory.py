@@ -0,0 +1,38 @@
+"""
+Memory used by the categorical columns of a HIGH_CARDINALITY dataset, stored as
+dictionary-encoded codes versus object-dtype label strings.
+
+Usage:
+    python -m benchmarks.bench_cat_memory
+"""
+import numpy as np
+import pandas as pd
+
+from config.cat_vars_config import INSTANCES_IN_HIGH_CARD_CAT_VAR
+from src.categorical_manager import CategoricalManager
+
+ROWS = 1_000_000
+NUM_OF_VARS = 34
+
+
+def main():
+    rng = np.random.default_rng(0)
+    vars = [f"v{i}" for i in range(1, NUM_OF_VARS + 1)]
+    df = pd.DataFrame(rng.random((ROWS, NUM_OF_VARS)), columns=vars)
+
+    cat_df, cat_vars = CategoricalManager.create_cat_vars(
+        df, vars, INSTANCES_IN_HIGH_CARD_CAT_VAR
+    )
+    encoded_bytes = cat_df[cat_vars].memory_usage(deep=True, index=False).sum()
+    object_bytes = (
+        cat_df[cat_vars].astype(object).memory_usage(deep=True, index=False).sum()
+    )
+
+    print(f"{ROWS} rows x {len(cat_vars)} categorical columns")
+    print(f"object strings:     {object_bytes / 2**20:10.1f} MiB")
+    print(f"dictionary encoded: {encoded_bytes / 2**20:10.1f} MiB")
+    print(f"reduction:          {object_bytes / encoded_bytes:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
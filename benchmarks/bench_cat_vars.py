@@ -0,0 +1,39 @@
+"""
+Benchmark of CategoricalManager.create_cat_vars.
+
+Usage:
+    python -m benchmarks.bench_cat_vars
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from config.cat_vars_config import INSTANCES_IN_HIGH_CARD_CAT_VAR
+from src.categorical_manager import CategoricalManager
+
+ROWS = 1_000_000
+NUM_OF_VARS = 34
+
+
+def main():
+    rng = np.random.default_rng(0)
+    vars = [f"v{i}" for i in range(1, NUM_OF_VARS + 1)]
+    df = pd.DataFrame(rng.random((ROWS, NUM_OF_VARS)), columns=vars)
+
+    start = time.perf_counter()
+    cat_df, cat_vars = CategoricalManager.create_cat_vars(
+        df, vars, INSTANCES_IN_HIGH_CARD_CAT_VAR
+    )
+    elapsed = time.perf_counter() - start
+
+    group_sizes = cat_df[cat_vars[0]].value_counts()
+    print(
+        f"{ROWS} rows x {len(cat_vars)} categorical columns, "
+        f"cardinality {INSTANCES_IN_HIGH_CARD_CAT_VAR}: {elapsed:.3f} s"
+    )
+    print(f"group sizes: min {group_sizes.min()}, max {group_sizes.max()}")
+
+
+if __name__ == "__main__":
+    main()
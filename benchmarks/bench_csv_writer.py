@@ -0,0 +1,94 @@
+"""
+Write throughput of the CSV writer, compared with `DataFrame.to_csv`, for full
+and fixed float precision and each compression.
+
+Usage:
+    python -m benchmarks.bench_csv_writer
+    python -m benchmarks.bench_csv_writer --rows 100000 --precision 4 --workers 8
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from config.base import NUM_OF_CSV_FORMAT_WORKERS
+from config.cat_vars_config import INSTANCES_IN_HIGH_CARD_CAT_VAR
+from src.categorical_manager import CategoricalManager
+from src.data_manager import DataManager
+from src.dataset_writers import CSV_COMPRESSIONS, CsvWriter
+
+DEFAULT_ROWS = 1_000_000
+NUM_OF_VARS = 34
+CHUNK_SIZE = 100_000
+DEFAULT_PRECISION = 6
+
+
+def _to_csv(df, path):
+    for start in range(0, len(df), CHUNK_SIZE):
+        DataManager.save_csv(
+            df.iloc[start : start + CHUNK_SIZE], path, append=start > 0
+        )
+
+
+def _csv_writer(df, path, float_precision, compression, num_of_workers):
+    with CsvWriter(path, len(df), float_precision, compression, num_of_workers) as w:
+        for start in range(0, len(df), CHUNK_SIZE):
+            w.write(df.iloc[start : start + CHUNK_SIZE])
+    return w.path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--precision", type=int, default=DEFAULT_PRECISION)
+    parser.add_argument("--workers", type=int, default=NUM_OF_CSV_FORMAT_WORKERS)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    vars = [f"v{i}" for i in range(1, NUM_OF_VARS + 1)]
+    df = pd.DataFrame(rng.random((args.rows, NUM_OF_VARS)), columns=vars)
+    df["target"] = rng.random(args.rows) < 0.5
+    df, _ = CategoricalManager.create_cat_vars(df, vars, INSTANCES_IN_HIGH_CARD_CAT_VAR)
+
+    tmp_dir = tempfile.mkdtemp()
+    results = {}
+    try:
+        path = os.path.join(tmp_dir, "to_csv.csv")
+        start = time.perf_counter()
+        _to_csv(df, path)
+        results["to_csv"] = (time.perf_counter() - start, os.path.getsize(path))
+
+        for float_precision in (None, args.precision):
+            for compression in CSV_COMPRESSIONS:
+                name = f"precision={float_precision} compression={compression}"
+                start = time.perf_counter()
+                path = _csv_writer(
+                    df,
+                    os.path.join(tmp_dir, name.replace(" ", "_")),
+                    float_precision,
+                    compression,
+                    args.workers,
+                )
+                results[name] = (time.perf_counter() - start, os.path.getsize(path))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    reference, _ = results["to_csv"]
+    print(
+        f"{args.rows} rows x {NUM_OF_VARS} columns + target, "
+        f"{args.workers} workers, {os.cpu_count()} cores"
+    )
+    print(f"{'writer':>38} {'size (MiB)':>11} {'write (s)':>10} {'speedup':>8}")
+    for name, (seconds, size) in results.items():
+        print(
+            f"{name:>38} {size / 2**20:>11.1f} {seconds:>10.2f} "
+            f"{reference / seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
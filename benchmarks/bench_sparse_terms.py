@@ -0,0 +1,50 @@
+"""
+Benchmark of polynomial evaluation with dense and sparse terms.
+
+Usage:
+    python -m benchmarks.bench_sparse_terms
+"""
+import time
+
+import numpy as np
+
+from config.poly_params_config import params as pol_params
+from src.generate_polynomial_svc import GeneratePolynomialSvc
+
+ROWS = 200_000
+NUM_OF_TERMS = 13
+
+
+def main():
+    rng = np.random.default_rng(0)
+    coefficients = {
+        f"c_term_{term + 1}": float(value)
+        for term, value in enumerate(rng.uniform(-10, 10, NUM_OF_TERMS))
+    }
+
+    for num_of_vars in (34, 100, 300):
+        data = rng.uniform(-1, 1, (ROWS, num_of_vars))
+        for max_num_of_vars_in_terms in (None, pol_params["max_num_of_vars_in_terms"]):
+            polynomial = GeneratePolynomialSvc.create_polynomial(
+                num_of_vars,
+                pol_params["min_degree"],
+                pol_params["max_degree"],
+                NUM_OF_TERMS,
+                coefficients,
+                np.random.default_rng(1),
+                max_num_of_vars_in_terms,
+            )
+
+            start = time.perf_counter()
+            polynomial.evaluate(data)
+            elapsed = time.perf_counter() - start
+
+            print(
+                f"{ROWS} rows x {num_of_vars} vars, {NUM_OF_TERMS} terms, "
+                f"max vars in terms {max_num_of_vars_in_terms}: {elapsed:.3f} s, "
+                f"expression {len(polynomial.to_string_expression())} chars"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Time of a sweep of small runs, each generated in a new Python process as when
+the config files are edited between runs, or by `run_sweep` on warm worker
+processes.
+
+Usage:
+    python -m benchmarks.bench_sweep
+    python -m benchmarks.bench_sweep --runs 50 --rows 1000 --workers 4
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from config.base import PATH_TO_METADATA_FILES, PATH_TO_STORE_GENERATED_DATASETS
+from src.generation_config import GenerationConfig
+from src.sweep_runner import expand_grid, run_sweep
+
+DEFAULT_RUNS = 20
+DEFAULT_ROWS = 1_000
+DEFAULT_WORKERS = [1, 2]
+
+# generates one run of the config given as JSON in a new interpreter
+_COLD_RUN = """
+import json, sys
+from src.generation_config import GenerationConfig
+from src.sweep_runner import generate
+generate(GenerationConfig(**json.loads(sys.argv[1])), int(sys.argv[2]))
+"""
+
+
+def _in_tmp_dir(function):
+    cwd = os.getcwd()
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        os.chdir(tmp_dir)
+        os.makedirs(PATH_TO_STORE_GENERATED_DATASETS)
+        os.makedirs(PATH_TO_METADATA_FILES)
+        start = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp_dir)
+
+
+def _run_cold(configs, repository):
+    env = {**os.environ, "PYTHONPATH": repository}
+    for index, config in enumerate(configs):
+        subprocess.run(
+            [sys.executable, "-c", _COLD_RUN, json.dumps(config.to_dict()), str(index)],
+            check=True,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--workers", type=int, nargs="+", default=DEFAULT_WORKERS)
+    args = parser.parse_args(argv)
+
+    configs = expand_grid(
+        {"num_of_vars": [5 + index for index in range(args.runs)]},
+        GenerationConfig(num_of_rows=args.rows),
+    )
+    repository = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    print(f"{args.runs} runs x {args.rows} rows, {os.cpu_count()} cores")
+    print(f"{'runner':>28} {'total (s)':>10} {'per run (ms)':>13}")
+    results = {
+        "new process per run": _in_tmp_dir(lambda: _run_cold(configs, repository))
+    }
+    for num_of_workers in args.workers:
+        results[f"run_sweep, {num_of_workers} workers"] = _in_tmp_dir(
+            lambda: run_sweep(configs, 0, num_of_workers)
+        )
+    for name, seconds in results.items():
+        print(f"{name:>28} {seconds:>10.2f} {1000 * seconds / args.runs:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
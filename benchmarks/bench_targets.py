@@ -0,0 +1,44 @@
+"""
+Scaling benchmark of the binary target builders of DataManager.
+
+Usage:
+    python -m benchmarks.bench_targets
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_manager import DataManager
+
+ROWS = [10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def _time_call(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    rng = np.random.default_rng(0)
+    previous = None
+
+    print(f"{'rows':>12} {'linear (s)':>12} {'non linear (s)':>16} {'ns/row':>8}")
+    for rows in ROWS:
+        df = pd.DataFrame({"num_target": rng.standard_normal(rows)})
+        linear = _time_call(DataManager.generate_binary_linear_target, df)
+        non_linear = _time_call(DataManager.generate_binary_non_linear_target, df)
+        print(
+            f"{rows:>12} {linear:>12.4f} {non_linear:>16.4f} "
+            f"{linear / rows * 1e9:>8.1f}"
+        )
+        if previous is not None:
+            # the cost per row should stay roughly flat as the row count grows
+            growth = (linear / rows) / (previous[1] / previous[0])
+            print(f"{'':>12} cost per row x{growth:.2f} vs previous size")
+        previous = (rows, linear)
+
+
+if __name__ == "__main__":
+    main()
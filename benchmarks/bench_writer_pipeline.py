@@ -0,0 +1,77 @@
+"""
+End-to-end time of a run of the 8 datasets of the default config, with the
+datasets written synchronously or on background writer threads.
+
+The run is generated in a temporary directory with `main_routine.start_streaming`
+in chunks of WRITE_CHUNK_SIZE rows, so the number of rows can be set, and only
+the number of writer threads changes between runs. The overlap of composing and
+writing needs as many cores as writer threads, plus one, to show.
+
+Usage:
+    python -m benchmarks.bench_writer_pipeline
+    python -m benchmarks.bench_writer_pipeline --rows 1000000 --threads 0 4 8
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from config.base import MAX_QUEUED_CHUNKS, WRITE_CHUNK_SIZE
+from src import main_routine
+from src.services.dataset_configuration_service import get_datasets_properties
+
+DEFAULT_ROWS = 200_000
+DEFAULT_THREADS = [0, 2, 4, 8]
+DEFAULT_FORMATS = ["csv", "npy"]
+
+
+def _run(rows, dataset_format, num_of_threads):
+    main_routine.NUM_OF_WRITER_THREADS = num_of_threads
+    cwd = os.getcwd()
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        os.chdir(tmp_dir)
+        os.makedirs(main_routine.PATH_TO_STORE_GENERATED_DATASETS)
+        os.makedirs(main_routine.PATH_TO_METADATA_FILES)
+        start = time.perf_counter()
+        main_routine.start_streaming(
+            seed=0,
+            exec_id="bench",
+            num_of_instances=rows,
+            chunk_size=WRITE_CHUNK_SIZE,
+            dataset_format=dataset_format,
+        )
+        return time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--threads", type=int, nargs="+", default=DEFAULT_THREADS)
+    parser.add_argument("--formats", nargs="+", default=DEFAULT_FORMATS)
+    args = parser.parse_args(argv)
+
+    print(
+        f"{len(get_datasets_properties())} datasets x {args.rows} rows, "
+        f"{os.cpu_count()} cores, {MAX_QUEUED_CHUNKS} queued chunks per thread"
+    )
+    print(f"{'format':>8} {'threads':>8} {'time (s)':>9} {'speedup':>8}")
+    for dataset_format in args.formats:
+        times = {
+            num_of_threads: _run(args.rows, dataset_format, num_of_threads)
+            for num_of_threads in args.threads
+        }
+        reference = times[args.threads[0]]
+        for num_of_threads, seconds in times.items():
+            print(
+                f"{dataset_format:>8} {num_of_threads:>8} {seconds:>9.2f} "
+                f"{reference / seconds:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
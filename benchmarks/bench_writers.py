@@ -0,0 +1,89 @@
+"""
+Write and read throughput of every dataset format, compared with CSV.
+
+Usage:
+    python -m benchmarks.bench_writers
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from config.cat_vars_config import INSTANCES_IN_HIGH_CARD_CAT_VAR
+from src.categorical_manager import CategoricalManager
+from src.dataset_writers import DATASET_WRITERS
+
+ROWS = 1_000_000
+NUM_OF_VARS = 34
+CHUNK_SIZE = 100_000
+
+
+def _read(file_format, path):
+    if file_format == "csv":
+        return pd.read_csv(path)
+    if file_format == "parquet":
+        return pd.read_parquet(path)
+    if file_format == "feather":
+        import pyarrow as pa
+
+        return pa.ipc.open_file(pa.memory_map(path)).read_all()
+    columns = json.load(open(os.path.join(path, "columns.json")))["columns"]
+    return {
+        column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r").sum()
+        for column in columns
+    }
+
+
+def _size(path):
+    if os.path.isdir(path):
+        return sum(
+            os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)
+        )
+    return os.path.getsize(path)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    vars = [f"v{i}" for i in range(1, NUM_OF_VARS + 1)]
+    df = pd.DataFrame(rng.random((ROWS, NUM_OF_VARS)), columns=vars)
+    df["target"] = rng.random(ROWS) < 0.5
+    df, _ = CategoricalManager.create_cat_vars(df, vars, INSTANCES_IN_HIGH_CARD_CAT_VAR)
+
+    tmp_dir = tempfile.mkdtemp()
+    results = {}
+    try:
+        for file_format, writer_class in DATASET_WRITERS.items():
+            start = time.perf_counter()
+            with writer_class(os.path.join(tmp_dir, file_format), ROWS) as writer:
+                for chunk_start in range(0, ROWS, CHUNK_SIZE):
+                    writer.write(df.iloc[chunk_start : chunk_start + CHUNK_SIZE])
+            write_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            _read(file_format, writer.path)
+            read_time = time.perf_counter() - start
+
+            results[file_format] = (write_time, read_time, _size(writer.path))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    csv_write, csv_read, _ = results["csv"]
+    print(f"{ROWS} rows x {NUM_OF_VARS} columns + target")
+    print(
+        f"{'format':>8} {'size (MiB)':>11} {'write (s)':>10} {'speedup':>8} "
+        f"{'read (s)':>9} {'speedup':>8}"
+    )
+    for file_format, (write_time, read_time, size) in results.items():
+        print(
+            f"{file_format:>8} {size / 2**20:>11.1f} {write_time:>10.2f} "
+            f"{csv_write / write_time:>7.1f}x {read_time:>9.2f} "
+            f"{csv_read / read_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Benchmark suite of every stage of `main_routine.start`, with regression checks.
+
+Each stage is timed separately over a grid of rows, vars, terms, cardinalities
+and dataset formats; a stage is only run for the parameters it depends on. The
+results are written as JSON and, when a baseline is given, compared with it: the
+run fails (exit code 1) if any stage is slower than its baseline time by more
+than the tolerance.
+
+Usage:
+    python -m benchmarks.stage_suite
+    python -m benchmarks.stage_suite --rows 10000 100000 --output results.json
+    python -m benchmarks.stage_suite --baseline benchmarks/baselines/stage_suite.json
+    python -m benchmarks.stage_suite --save-baseline benchmarks/baselines/stage_suite.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from config.poly_params_config import params as pol_params
+from src.categorical_manager import CategoricalManager
+from src.data_manager import DataManager
+from src.dataset_writers import DATASET_WRITERS
+from src.generate_polynomial_svc import GeneratePolynomialSvc
+
+DEFAULT_ROWS = [10_000, 100_000]
+DEFAULT_VARS = [34]
+DEFAULT_TERMS = [13]
+DEFAULT_CARDINALITIES = [2, 10, 1000]
+DEFAULT_FORMATS = ["csv", "npy"]
+DEFAULT_REPEAT = 3
+# Allowed slowdown relative to the baseline, as a fraction of the baseline time.
+DEFAULT_TOLERANCE = 0.25
+# Stages faster than this (in seconds) are too noisy to be checked.
+MIN_CHECKED_SECONDS = 1e-3
+WRITE_CHUNK_SIZE = 100_000
+
+
+def _create_polynomial(num_of_vars, num_of_terms, seed=0):
+    rng = np.random.default_rng(seed)
+    coefficients = {
+        f"c_term_{term + 1}": float(
+            rng.uniform(pol_params["min_coef_value"], pol_params["max_coef_value"])
+        )
+        for term in range(num_of_terms)
+    }
+    return GeneratePolynomialSvc.create_polynomial(
+        num_of_vars,
+        pol_params["min_degree"],
+        pol_params["max_degree"],
+        num_of_terms,
+        coefficients,
+        rng,
+        pol_params["max_num_of_vars_in_terms"],
+    )
+
+
+def _independent_vars(rows, vars):
+    return DataManager.generate_independent_var_data(
+        vars, np.random.SeedSequence(0), 0, rows
+    )
+
+
+def _num_target_df(rows):
+    return pd.DataFrame({"num_target": np.random.default_rng(0).normal(size=rows)})
+
+
+def stage_define_params(vars, terms):
+    rng = np.random.default_rng(0)
+    return lambda: GeneratePolynomialSvc.define_params(
+        vars,
+        vars,
+        terms,
+        pol_params["min_coef_value"],
+        pol_params["max_coef_value"],
+        rng,
+    )
+
+
+def stage_build_expression(vars, terms):
+    return lambda: _create_polynomial(vars, terms).to_string_expression()
+
+
+def stage_generate_vars(rows, vars):
+    return lambda: _independent_vars(rows, vars)
+
+
+def stage_evaluate(rows, vars, terms):
+    polynomial = _create_polynomial(vars, terms)
+    data = _independent_vars(rows, vars)
+    return lambda: polynomial.evaluate(data)
+
+
+def stage_linear_target(rows):
+    df = _num_target_df(rows)
+    return lambda: DataManager.generate_binary_linear_target(df)
+
+
+def stage_non_linear_target(rows):
+    df = _num_target_df(rows)
+    return lambda: DataManager.generate_binary_non_linear_target(df)
+
+
+def stage_create_cat_vars(rows, vars, cardinality):
+    variables = [f"v{i}" for i in range(1, vars + 1)]
+    df = pd.DataFrame(_independent_vars(rows, vars), columns=variables)
+    return lambda: CategoricalManager.create_cat_vars(df, variables, cardinality)
+
+
+def stage_write(rows, vars, dataset_format, tmp_dir):
+    variables = [f"v{i}" for i in range(1, vars + 1)]
+    cat_vars = CategoricalManager.select_cat_vars(variables)
+    independent_vars = _independent_vars(rows, vars)
+    cat_codes, labels = CategoricalManager.create_cat_codes(
+        independent_vars[:, : len(cat_vars)], 10
+    )
+    target = np.random.default_rng(0).random(rows) < 0.5
+    chunks = [
+        DataManager.compose_dataset(
+            independent_vars[start:stop],
+            variables,
+            target[start:stop],
+            cat_vars,
+            cat_codes[start:stop],
+            labels,
+        )
+        for start, stop in (
+            (start, min(start + WRITE_CHUNK_SIZE, rows))
+            for start in range(0, rows, WRITE_CHUNK_SIZE)
+        )
+    ]
+
+    def write():
+        with DATASET_WRITERS[dataset_format](
+            os.path.join(tmp_dir, "dataset"), rows
+        ) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+        if os.path.isdir(writer.path):
+            shutil.rmtree(writer.path)
+        else:
+            os.remove(writer.path)
+
+    return write
+
+
+# stage name -> (function building the timed callable, parameters it depends on)
+STAGES = {
+    "define_params": (stage_define_params, ("vars", "terms")),
+    "build_expression": (stage_build_expression, ("vars", "terms")),
+    "generate_vars": (stage_generate_vars, ("rows", "vars")),
+    "evaluate": (stage_evaluate, ("rows", "vars", "terms")),
+    "linear_target": (stage_linear_target, ("rows",)),
+    "non_linear_target": (stage_non_linear_target, ("rows",)),
+    "create_cat_vars": (stage_create_cat_vars, ("rows", "vars", "cardinality")),
+    "write": (stage_write, ("rows", "vars", "dataset_format")),
+}
+
+
+def _time(function, repeat):
+    """
+    Best time of a call, calling it as many times per measure as needed for the
+    measure to last at least 0.2 s.
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def _case_key(result):
+    return json.dumps(
+        {name: value for name, value in result.items() if name != "seconds"},
+        sort_keys=True,
+    )
+
+
+def run_suite(grid, stages, repeat):
+    """
+    Time every stage over the parameters of the grid it depends on.
+
+    Args:
+        grid (dict): Values of each parameter (rows, vars, terms, cardinality,
+            dataset_format).
+        stages (list): Names of the stages to run.
+        repeat (int): Number of measures of each case, the best one is kept.
+
+    Returns:
+        list: One result per case, with the stage, its parameters and its time.
+    """
+    results = []
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        for stage in stages:
+            build, parameters = STAGES[stage]
+            for values in itertools.product(*(grid[name] for name in parameters)):
+                case = dict(zip(parameters, values))
+                extra = {"tmp_dir": tmp_dir} if stage == "write" else {}
+                seconds = _time(build(**case, **extra), repeat)
+                results.append({"stage": stage, **case, "seconds": seconds})
+                print(f"{_case_key({'stage': stage, **case})}: {seconds:.6f} s")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results with a baseline.
+
+    Args:
+        results (list): Results of `run_suite`.
+        baseline (list): Results of a previous run.
+        tolerance (float): Allowed slowdown, as a fraction of the baseline time.
+
+    Returns:
+        list: Regressions, as (case, baseline seconds, seconds).
+    """
+    baseline_seconds = {_case_key(result): result["seconds"] for result in baseline}
+    regressions = []
+    for result in results:
+        key = _case_key(result)
+        if key not in baseline_seconds:
+            continue
+        expected = baseline_seconds[key]
+        if max(expected, result["seconds"]) < MIN_CHECKED_SECONDS:
+            continue
+        if result["seconds"] > expected * (1 + tolerance):
+            regressions.append((key, expected, result["seconds"]))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--vars", type=int, nargs="+", default=DEFAULT_VARS)
+    parser.add_argument("--terms", type=int, nargs="+", default=DEFAULT_TERMS)
+    parser.add_argument(
+        "--cardinalities", type=int, nargs="+", default=DEFAULT_CARDINALITIES
+    )
+    parser.add_argument(
+        "--formats", nargs="+", default=DEFAULT_FORMATS, choices=sorted(DATASET_WRITERS)
+    )
+    parser.add_argument(
+        "--stages", nargs="+", default=list(STAGES), choices=list(STAGES)
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--baseline", help="JSON results to compare with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="allowed slowdown as a fraction of the baseline time",
+    )
+    parser.add_argument("--save-baseline", help="JSON file to store the results as")
+    args = parser.parse_args(argv)
+
+    grid = {
+        "rows": args.rows,
+        "vars": args.vars,
+        "terms": args.terms,
+        "cardinality": args.cardinalities,
+        "dataset_format": args.formats,
+    }
+    results = run_suite(grid, args.stages, args.repeat)
+    report = {
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "results": results,
+    }
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            DataManager.save_dict_to_json(report, path)
+
+    if args.baseline:
+        baseline = DataManager.load_json(args.baseline)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(
+                f"{len(regressions)} stage(s) slower than the baseline by more "
+                f"than {args.tolerance:.0%}:",
+                file=sys.stderr,
+            )
+            for key, expected, seconds in regressions:
+                print(
+                    f"  {key}: {expected:.6f} s -> {seconds:.6f} s "
+                    f"({seconds / expected:.2f}x)",
+                    file=sys.stderr,
+                )
+            sys.exit(1)
+        print(f"no regression beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,45 @@
 PATH_TO_GENERATED_DATASETS = "./results/datasets/"
 PATH_TO_METADATA_FILES = "./dataset_metadata/"
+# SQLite index of the metadata files, updated every time a metadata file is
+# written (see src/dataset_catalog.py). None disables it.
+PATH_TO_CATALOG = "./dataset_metadata/catalog.sqlite"
 BASE_NAME = "sdata"
 PATH_TO_STORE_GENERATED_DATASETS = "./datasets/"
+# Manifests of the completed runs. A batch skips the runs whose manifest lists
+# files that all still exist with their recorded size and SHA-256 checksum.
+PATH_TO_MANIFESTS = "./datasets/manifests/"
 TOTAL_DATASETS_TO_GENERATE = 1
+# Seed the seeds of every dataset in a batch are spawned from. None draws fresh
+# entropy, which is logged so the batch can be reproduced.
+MASTER_SEED = None
+# Number of processes datasets are generated on.
+NUM_OF_WORKERS = 1
+# Output format of the datasets: "csv", "parquet", "feather" or "npy" (a directory
+# of memory-mappable .npy files). parquet and feather require pyarrow. "virtual"
+# only stores the metadata, from which VirtualDatasetManager.load rebuilds the
+# data on demand.
+DATASET_FORMAT = "csv"
+# Number of rows composed and handed to the dataset writer at once.
+WRITE_CHUNK_SIZE = 100_000
+# Number of threads the dataset chunks are written on while the next chunks are
+# composed (see src/background_writer.py). 0 writes them synchronously.
+NUM_OF_WRITER_THREADS = 4
+# Maximum number of composed chunks waiting to be written, per writer thread.
+# Bounds the memory held by the chunks in flight.
+MAX_QUEUED_CHUNKS = 2
+# Number of decimals floats are rounded to in CSV datasets. None writes them with
+# full precision, which is only 1.3x to 1.9x faster to write than
+# `DataFrame.to_csv`; a fixed precision is 3x to 5x faster (see
+# benchmarks/bench_csv_writer.py).
+CSV_FLOAT_PRECISION = None
+# Compression of the CSV datasets: None, "gzip" or "zstd" (requires zstandard).
+CSV_COMPRESSION = None
+# Number of threads the rows of each CSV dataset are formatted on.
+NUM_OF_CSV_FORMAT_WORKERS = 4
+# Write each dataset as a directory of shards of this many rows, each a complete
+# file of the output format, listed with their size, checksum and class balance
+# in a manifest.json file. None writes a single file.
+SHARD_ROWS = None
+# Target size in bytes of the shards, used when SHARD_ROWS is None. The number of
+# rows of a shard is estimated from the size of the first rows of the dataset.
+SHARD_BYTES = None
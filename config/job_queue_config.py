@@ -0,0 +1,16 @@
+# SQLite database of the job queue (see src/job_queue.py). To spread a batch over
+# several machines it must be on a filesystem shared by the coordinator and every
+# worker, as the dataset and metadata directories.
+PATH_TO_JOB_QUEUE = "./datasets/jobs.sqlite"
+
+# Seconds a worker holds a claimed job for. The lease is renewed every third of
+# it while the job runs; jobs whose lease expired, because their worker died, are
+# claimed again by other workers.
+JOB_LEASE_SECONDS = 600
+
+# Number of times a job is claimed before it is marked as failed.
+JOB_MAX_ATTEMPTS = 3
+
+# Seconds an idle worker waits before looking for jobs again, while jobs claimed
+# by other workers are still running.
+JOB_POLL_SECONDS = 10
@@ -1,5 +1,26 @@
 DELTA_MIN_MAX_VAL_IN_DEPENDENT_VAR = 0.01
 NUMBER_OF_INSTANCES = 3000
+# dtype of the independent variables: "float64" or "float32". float32 halves the
+# memory of the feature matrix and the size of the stored datasets; polynomials
+# are still evaluated in float64.
+FEATURE_DTYPE = "float64"
+# Number of rows evaluated at once by the polynomial engine. The power table of
+# a block (max_degree + 1, num_of_vars, rows) should stay close to cache size.
+EVALUATION_BLOCK_SIZE = 512
+# Number of polynomials evaluated over the same independent variables in a run.
+# With more than one, every feature variant is stored once, the binary targets
+# of every polynomial are stored together in a separate targets file, and one
+# metadata file per polynomial, target type and feature variant points to both.
+NUM_OF_POLYNOMIALS = 1
+# Store the arrays of the polynomial in the metadata (generation.polynomial) as
+# base64 strings of their bytes instead of JSON lists.
+COMPACT_POLYNOMIAL_METADATA = True
+# Also store the text of the polynomial in the "desc" key of the metadata, as
+# before the compact form existed, so readers parsing it keep working. It takes
+# tens of KB for polynomials of many terms and variables, and is not needed to
+# rebuild the polynomial (see VirtualDatasetManager.load_polynomial); False skips
+# building it and leaves "desc" null.
+STORE_POLYNOMIAL_EXPRESSION = True
 
 params = {
     "min_num_of_vars": 5,
@@ -9,5 +30,10 @@ params = {
     "max_num_of_terms": 13,  # Max number or terms:  term1 + term2 + term3
     "min_coef_value": -10,  # coef * v2
     "max_coef_value": 10,  # coef * v2
-    "max_num_of_vars_in_terms": 5,  # term: v1*v2*v4*v5
+    # term: v1*v2*v4*v5. Between 1 and this many variables are drawn for each
+    # term, each with an exponent between min_degree and max_degree; variables
+    # drawn with exponent 0 are left out of their term, so with min_degree 0 a term
+    # can use fewer variables, or none. Set it to None for terms using every
+    # variable.
+    "max_num_of_vars_in_terms": 5,
 }
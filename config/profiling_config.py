@@ -0,0 +1,13 @@
+# Record wall time, CPU time, peak memory and output bytes of every stage of a
+# run. The profile of a run is stored in the metadata of its datasets. Off by
+# default: a disabled profiler costs a few microseconds per run.
+PROFILE_STAGES = False
+
+# Trace the peak memory allocated by each stage with tracemalloc. Tracing slows
+# down allocation-heavy stages such as CSV writing several times; without it
+# only the peak RSS of the process after each stage, and how much each stage
+# raised it, are recorded.
+PROFILE_MEMORY = False
+
+# JSON Lines file one profile per run is appended to, None to skip it.
+PATH_TO_PROFILE_FILE = None
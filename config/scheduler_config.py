@@ -0,0 +1,15 @@
+# Memory the runs scheduled by src/memory_scheduler.py may use together, in
+# bytes, including the memory of the worker processes themselves.
+MEMORY_BUDGET_BYTES = 8 * 2**30
+
+# Maximum number of runs generated at once. Fewer are run when their estimated
+# peak memory does not fit in the budget.
+MAX_SCHEDULED_WORKERS = 4
+
+# Smallest streaming chunk size the scheduler lowers the chunk size of a run to,
+# to fit it in the budget.
+MIN_SCHEDULED_CHUNK_SIZE = 10_000
+
+# JSON file the predicted and observed memory and time of every scheduled run
+# are written to, None to skip it.
+PATH_TO_SCHEDULER_REPORT = None
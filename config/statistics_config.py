@@ -0,0 +1,12 @@
+# Collect per-column statistics (count, mean, std, min, max and quantiles of the
+# numeric columns, counts of each category of the categorical columns and class
+# balance of the target) while the datasets are generated, and store them under
+# "statistics" in their metadata.
+COLLECT_STATISTICS = True
+
+# Quantiles of the numeric columns stored in the statistics.
+STATISTICS_QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+# Number of rows sampled to estimate the quantiles. They are exact when the
+# dataset has at most that many rows.
+STATISTICS_SAMPLE_SIZE = 100_000
@@ -0,0 +1,17 @@
+# Generate datasets chunk by chunk (main_routine.start_streaming), so peak memory
+# depends on CHUNK_SIZE and QUANTILE_SKETCH_SIZE instead of NUMBER_OF_INSTANCES.
+# Targets are exactly balanced in both modes. In streaming mode the groups of the
+# categorical attributes are only approximately equal-sized when
+# NUMBER_OF_INSTANCES is larger than QUANTILE_SKETCH_SIZE.
+STREAMING_MODE = False
+
+# Number of rows generated, evaluated and written at once in streaming mode.
+CHUNK_SIZE = 1_000_000
+
+# Number of rows sampled to estimate the group edges of categorical attributes.
+QUANTILE_SKETCH_SIZE = 1_000_000
+
+# Generate the feature matrix of the in-memory mode into a memory-mapped temporary
+# file next to the datasets instead of RAM, for runs whose features do not fit in
+# memory but whose categorical and target arrays do.
+MEMMAP_FEATURES = False
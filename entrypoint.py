@@ -1,10 +1,8 @@
-from config.base import TOTAL_DATASETS_TO_GENERATE
-from src import main_routine
+from src.batch_runner import run_batch
 
 
 def main():
-    for _ in range(TOTAL_DATASETS_TO_GENERATE):
-        main_routine.start()
+    run_batch()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+import queue
+import threading
+
+# Queue item telling a writer thread to stop.
+_STOP = object()
+
+
+class BackgroundWriterPool:
+    """
+    Writes dataset chunks on background threads while the next chunks are built.
+
+    Every dataset writer is assigned to one thread, which receives the chunks of
+    that dataset through its own bounded queue, so chunks are written in order and
+    a writer is never used by two threads. When a queue is full, handing a chunk
+    over blocks until the thread catches up, which bounds the memory held by
+    chunks waiting to be written to about num_of_threads * max_queued_chunks
+    chunks. With no threads, chunks are written right away by the caller.
+
+    The shards of a `ShardedWriter` are assigned to threads like separate writers,
+    so they are written in parallel. A sharded writer is closed, writing its
+    manifest, when the pool is closed, once every shard has been written.
+
+    An exception raised on a writer thread stops every thread from writing, and is
+    re-raised once, by the next call to `write`, `close_writer` or `close`.
+    """
+
+    def __init__(self, num_of_threads, max_queued_chunks):
+        """
+        Args:
+            num_of_threads (int): Number of writer threads, 0 to write synchronously.
+            max_queued_chunks (int): Maximum number of chunks waiting in the queue of
+                each thread.
+        """
+        self._queues = [
+            queue.Queue(maxsize=max_queued_chunks) for _ in range(num_of_threads)
+        ]
+        self._threads = [
+            threading.Thread(target=self._drain, args=(chunks,), daemon=True)
+            for chunks in self._queues
+        ]
+        self._assigned_queues = {}
+        # writers closed once every thread has stopped
+        self._deferred_closes = []
+        self._error = None
+        self._error_raised = False
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, writer, df):
+        """
+        Hand a chunk of a dataset over to its writer thread.
+
+        Args:
+            writer (DatasetWriter): Writer of the dataset.
+            df (pd.DataFrame): Rows to append.
+        """
+        for part_writer, rows in writer.split(df):
+            self._submit(part_writer, part_writer.write, rows)
+
+    def close_writer(self, writer):
+        """
+        Close a writer once every chunk handed over before has been written.
+
+        Args:
+            writer (DatasetWriter): Writer of the dataset.
+        """
+        part_writers = writer.get_part_writers()
+        if not part_writers:
+            self._submit(writer, writer.close)
+            return
+        for part_writer in part_writers:
+            self._submit(part_writer, part_writer.close)
+        if self._queues:
+            self._deferred_closes.append(writer)
+        else:
+            writer.close()
+
+    def close(self):
+        """
+        Wait for every chunk to be written and stop the threads.
+        """
+        for chunks in self._queues:
+            chunks.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._queues = []
+        self._threads = []
+        self._raise_error()
+        if self._error is None:
+            for writer in self._deferred_closes:
+                writer.close()
+        self._deferred_closes = []
+
+    def _submit(self, writer, function, *args):
+        self._raise_error()
+        if not self._queues:
+            function(*args)
+            return
+
+        if id(writer) not in self._assigned_queues:
+            self._assigned_queues[id(writer)] = self._queues[
+                len(self._assigned_queues) % len(self._queues)
+            ]
+        self._assigned_queues[id(writer)].put((function, args))
+
+    def _drain(self, chunks):
+        while True:
+            item = chunks.get()
+            if item is _STOP:
+                return
+            if self._error is not None:
+                # keep consuming, so the producer is never blocked on a full queue
+                continue
+            function, args = item
+            try:
+                function(*args)
+            except BaseException as error:
+                self._error = error
+
+    def _raise_error(self):
+        if self._error is not None and not self._error_raised:
+            self._error_raised = True
+            raise self._error
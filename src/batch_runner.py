@@ -0,0 +1,147 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from config.base import (
+    DATASET_FORMAT,
+    MASTER_SEED,
+    NUM_OF_WORKERS,
+    TOTAL_DATASETS_TO_GENERATE,
+)
+from config.logging import set_logger
+from config.poly_params_config import NUM_OF_POLYNOMIALS
+from config.streaming_config import STREAMING_MODE
+from src import main_routine
+from src.run_manifest import RunManifest
+from src.virtual_dataset_manager import VIRTUAL_DATASET_FORMAT
+
+logger = set_logger()
+
+
+def run_batch(
+    total_datasets=TOTAL_DATASETS_TO_GENERATE,
+    master_seed=MASTER_SEED,
+    num_of_workers=NUM_OF_WORKERS,
+    streaming=STREAMING_MODE,
+    dataset_format=DATASET_FORMAT,
+    num_of_polynomials=NUM_OF_POLYNOMIALS,
+):
+    """
+    Generate a batch of datasets, optionally over a pool of processes.
+
+    Every dataset is generated from its own child of the master seed sequence, so
+    its content only depends on the master seed and its position in the batch,
+    never on the number of workers or on the order the datasets are run in.
+
+    Each run is named after a key hashed from its seed and config (see
+    `RunManifest`). Runs already completed by a previous batch with the same
+    master seed and config are skipped, so an interrupted batch can be resumed by
+    running it again, and concurrent batches never overwrite each other's outputs.
+
+    Args:
+        total_datasets (int): Number of datasets to generate.
+        master_seed (int, optional): Seed the dataset seeds are spawned from. Fresh
+            entropy is used if not given.
+        num_of_workers (int): Number of processes to generate the datasets on.
+        streaming (bool): Generate each dataset chunk by chunk.
+        dataset_format (str): Output format of the datasets.
+        num_of_polynomials (int): Number of polynomials evaluated over the same
+            independent variables in each run.
+
+    Returns:
+        list: Execution IDs of the generated datasets, in batch order.
+    """
+    runs = spawn_runs(
+        total_datasets, master_seed, streaming, dataset_format, num_of_polynomials
+    )
+    routine = get_routine(streaming, dataset_format, num_of_polynomials)
+
+    pending = [
+        (seed, exec_id)
+        for seed, exec_id in runs
+        if not RunManifest.is_complete(exec_id)
+    ]
+    if len(pending) < total_datasets:
+        logger.info(f"skipping {total_datasets - len(pending)} completed runs")
+    pending_seeds = [seed for seed, _ in pending]
+    pending_exec_ids = [exec_id for _, exec_id in pending]
+
+    if num_of_workers <= 1:
+        for seed, exec_id in zip(pending_seeds, pending_exec_ids):
+            routine(seed, exec_id)
+    else:
+        with ProcessPoolExecutor(max_workers=num_of_workers) as executor:
+            # consume the results so exceptions raised in workers are re-raised
+            list(executor.map(routine, pending_seeds, pending_exec_ids))
+
+    return [exec_id for _, exec_id in runs]
+
+
+def spawn_runs(
+    total_datasets=TOTAL_DATASETS_TO_GENERATE,
+    master_seed=MASTER_SEED,
+    streaming=STREAMING_MODE,
+    dataset_format=DATASET_FORMAT,
+    num_of_polynomials=NUM_OF_POLYNOMIALS,
+):
+    """
+    Spawn the seed of every run of a batch and compute its execution ID.
+
+    Args:
+        total_datasets (int): Number of datasets to generate.
+        master_seed (int, optional): Seed the dataset seeds are spawned from. Fresh
+            entropy is used if not given.
+        streaming (bool): Generate each dataset chunk by chunk.
+        dataset_format (str): Output format of the datasets.
+        num_of_polynomials (int): Number of polynomials evaluated over the same
+            independent variables in each run.
+
+    Returns:
+        list: (seed, exec_id) pairs, in batch order.
+    """
+    if streaming and num_of_polynomials > 1:
+        raise ValueError("Streaming mode supports a single polynomial per run")
+    if dataset_format == VIRTUAL_DATASET_FORMAT and num_of_polynomials > 1:
+        raise ValueError("Virtual datasets support a single polynomial per run")
+
+    master_seed_sequence = np.random.SeedSequence(master_seed)
+    logger.info(f"master seed entropy: {master_seed_sequence.entropy}")
+
+    seeds = master_seed_sequence.spawn(total_datasets)
+    return [
+        (
+            seed,
+            RunManifest.get_run_key(
+                seed,
+                dataset_format=dataset_format,
+                streaming=streaming,
+                num_of_polynomials=num_of_polynomials,
+            ),
+        )
+        for seed in seeds
+    ]
+
+
+def get_routine(
+    streaming=STREAMING_MODE,
+    dataset_format=DATASET_FORMAT,
+    num_of_polynomials=NUM_OF_POLYNOMIALS,
+):
+    """
+    Get the routine generating a run.
+
+    Args:
+        streaming (bool): Generate each dataset chunk by chunk.
+        dataset_format (str): Output format of the datasets.
+        num_of_polynomials (int): Number of polynomials evaluated over the same
+            independent variables in each run.
+
+    Returns:
+        callable: Function of the seed and execution ID of a run.
+    """
+    if num_of_polynomials > 1:
+        routine = partial(main_routine.start_multi_polynomial, num_of_polynomials)
+    else:
+        routine = main_routine.start_streaming if streaming else main_routine.start
+    return partial(routine, dataset_format=dataset_format)
@@ -3,6 +3,9 @@ from config.logging import set_logger
 logger = set_logger()
 import math
 
+import numpy as np
+import pandas as pd
+
 from config.cat_vars_config import PERC_OF_CAT_VARS
 
 
@@ -24,39 +27,185 @@ class CategoricalManager:
             return df, []
 
         high_card_df = df.copy()
+
+        # Select variables to convert
+        cat_vars = cls.select_cat_vars(vars)
+
+        codes, labels = cls.create_cat_codes(
+            high_card_df[cat_vars].to_numpy(), cardinality_number
+        )
+
+        # Store the codes with their label dictionary, labels are only
+        # materialized when the dataset is written.
+        for index, cat_var in enumerate(cat_vars):
+            high_card_df[cat_var] = pd.Categorical.from_codes(
+                codes[:, index], categories=labels
+            )
+
+        return high_card_df, cat_vars
+
+    @classmethod
+    def create_cat_codes(cls, values, cardinality_number):
+        """
+        Convert numeric columns into dictionary-encoded categorical columns.
+
+        Args:
+            values (np.ndarray): Matrix of shape (rows, columns) with the values to
+                convert.
+            cardinality_number (int): Desired cardinality of the categorical variables.
+
+        Returns:
+            tuple: A tuple containing the matrix of codes and the label dictionary
+                shared by all the columns.
+        """
+        bin_edges = cls.compute_bin_edges(values, cardinality_number)
+        codes = cls.apply_bin_edges(values, bin_edges)
+
+        return codes, cls.get_cat_labels(bin_edges.shape[1] + 1)
+
+    @classmethod
+    def select_cat_vars(cls, vars):
+        """
+        Select the variables to convert into categorical variables.
+
+        Args:
+            vars (list): List of variables to consider for conversion.
+
+        Returns:
+            list: The first PERC_OF_CAT_VARS of the variables, at least one.
+        """
         num_of_numeric_vars = len(vars)
         float_expected_cat_instances = num_of_numeric_vars * PERC_OF_CAT_VARS
 
         # Calculate the expected number of categorical instances
         expected_cat_instances = max(1, math.floor(float_expected_cat_instances))
 
-        # Select variables to convert
-        cat_vars = vars[:expected_cat_instances]
+        return vars[:expected_cat_instances]
 
-        for cat_var in cat_vars:
-            # Sort values of the selected variable
-            num_values_to_convert = high_card_df[cat_var].tolist()
-            num_values_to_convert.sort(reverse=True)
+    @classmethod
+    def get_cat_labels(cls, num_of_categories):
+        """
+        Build the label dictionary of a categorical variable.
 
-            # Determine the number of instances in each category
-            total_num_instance_in_each_cat = int(
-                len(num_values_to_convert) / cardinality_number
-            )
+        Args:
+            num_of_categories (int): Number of categories.
 
-            num_to_cat_map = {}
-            counter_group = 1
-            counter_iter = 0
+        Returns:
+            list: Labels, the label of code i is at position i.
+        """
+        return [f"cat_inst_{code + 1}" for code in range(num_of_categories)]
 
-            # Map numeric values to categorical labels
-            for num_instance in num_values_to_convert:
-                counter_iter += 1
-                num_to_cat_map[str(num_instance)] = f"cat_inst_{counter_group}"
-                if counter_iter == total_num_instance_in_each_cat:
-                    counter_iter = 0
-                    counter_group += 1
+    @classmethod
+    def get_code_dtype(cls, max_code):
+        """
+        Select the smallest unsigned integer dtype able to hold the codes.
 
-            # Convert numeric values to categorical labels
-            for index, row in high_card_df.iterrows():
-                high_card_df.at[index, cat_var] = num_to_cat_map[str(row[cat_var])]
+        Codes range from 0 to the number of bin edges, which can exceed the
+        cardinality: groups hold int(rows / cardinality) values, so there are up to
+        2 * cardinality - 1 of them when there are fewer than 2 * cardinality rows.
 
-        return high_card_df, cat_vars
+        Args:
+            max_code (int): Largest code, the number of bin edges.
+
+        Returns:
+            np.dtype: uint8 or uint16 (or wider for very large cardinalities).
+        """
+        return np.min_scalar_type(max_code)
+
+    @classmethod
+    def get_cat_encoding(cls, labels):
+        """
+        Describe the dictionary encoding of the categorical variables.
+
+        Args:
+            labels (list): Label dictionary shared by all the categorical variables.
+
+        Returns:
+            dict: Code dtype and label dictionary of the categorical variables, or
+                None if there are no categorical variables.
+        """
+        if not labels:
+            return None
+
+        return {
+            "code_dtype": cls.get_code_dtype(len(labels) - 1).name,
+            "labels": labels,
+        }
+
+    @classmethod
+    def get_bin_edge_ranks(cls, num_of_rows, cardinality_number):
+        """
+        Get the ranks of the values where a new group starts.
+
+        Values are split into equal-frequency groups of
+        num_of_rows // cardinality_number consecutive values in descending order.
+        A last smaller group holds the remaining values when num_of_rows is not
+        a multiple of the group size.
+
+        Args:
+            num_of_rows (int): Number of values to bin.
+            cardinality_number (int): Desired cardinality of the categorical variables.
+
+        Returns:
+            np.ndarray: Ascending ranks (position in the ascending sort) of the first
+                value of groups 2, 3, ..., in ascending order.
+        """
+        # Determine the number of instances in each category
+        total_num_instance_in_each_cat = int(num_of_rows / cardinality_number)
+
+        if total_num_instance_in_each_cat:
+            num_of_edges = (num_of_rows - 1) // total_num_instance_in_each_cat
+        else:
+            num_of_edges = 0
+
+        return (
+            num_of_rows
+            - 1
+            - total_num_instance_in_each_cat * np.arange(num_of_edges, 0, -1)
+        )
+
+    @classmethod
+    def compute_bin_edges(cls, values, cardinality_number):
+        """
+        Compute the values where a new equal-frequency group starts.
+
+        Args:
+            values (np.ndarray): Matrix of shape (rows, columns) with the values to bin.
+            cardinality_number (int): Desired cardinality of the categorical variables.
+
+        Returns:
+            np.ndarray: Matrix of shape (columns, edges) with the ascending edges of
+                each column.
+        """
+        edge_ranks = cls.get_bin_edge_ranks(values.shape[0], cardinality_number)
+        sorted_values = np.sort(values, axis=0)
+
+        return sorted_values[edge_ranks].T
+
+    @classmethod
+    def apply_bin_edges(cls, values, bin_edges):
+        """
+        Bin numeric columns with the given group edges.
+
+        Values greater than every edge of their column get code 0, the group of the
+        largest values, and each edge greater than or equal to a value moves it one
+        group further. So rows whose values are tied across a group boundary take
+        the group of the last tied position in descending order.
+
+        Args:
+            values (np.ndarray): Matrix of shape (rows, columns) with the values to bin.
+            bin_edges (np.ndarray): Matrix of shape (columns, edges) with the
+                ascending edges of each column.
+
+        Returns:
+            np.ndarray: Matrix with the code of each value (the group number minus 1),
+                as the smallest unsigned dtype able to hold the codes.
+        """
+        num_of_edges = bin_edges.shape[1]
+        codes = np.empty(values.shape, dtype=cls.get_code_dtype(num_of_edges))
+        for index in range(values.shape[1]):
+            codes[:, index] = num_of_edges - np.searchsorted(
+                bin_edges[index], values[:, index], side="left"
+            )
+
+        return codes
@@ -0,0 +1,272 @@
+import numpy as np
+
+from config.statistics_config import STATISTICS_QUANTILES, STATISTICS_SAMPLE_SIZE
+from src.quantile_sketch import QuantileSketch
+
+
+class StatisticsCollector:
+    """
+    Per-column statistics of the datasets of a run, collected chunk by chunk while
+    they are generated.
+
+    Statistics are kept for the arrays shared by the datasets of a run: the
+    numeric independent variables, the categorical codes of each cardinality and
+    each binary target. `to_dict` then assembles the statistics of one dataset.
+
+    Numeric columns keep their count, mean, standard deviation (population),
+    minimum and maximum, updated exactly from the moments of each chunk, and
+    quantiles estimated from a `QuantileSketch`, exact up to `sample_size` rows.
+    Categorical columns and targets keep the count of each code.
+    """
+
+    def __init__(
+        self, vars, seed=None, sample_size=STATISTICS_SAMPLE_SIZE, quantiles=None
+    ):
+        """
+        Args:
+            vars (list): Names of the numeric independent variables.
+            seed (np.random.SeedSequence, optional): Seed of the quantile sketch.
+            sample_size (int): Number of rows sampled to estimate the quantiles.
+            quantiles (list, optional): Quantiles to store, STATISTICS_QUANTILES if
+                not given.
+        """
+        self.vars = list(vars)
+        self.quantiles = STATISTICS_QUANTILES if quantiles is None else quantiles
+        self.num_of_rows = 0
+        self._mean = np.zeros(len(self.vars))
+        self._m2 = np.zeros(len(self.vars))
+        self._min = np.full(len(self.vars), np.inf)
+        self._max = np.full(len(self.vars), -np.inf)
+        self._sketch = QuantileSketch(sample_size, seed)
+        # cardinality -> matrix of shape (cat_vars, categories) of code counts
+        self._cat_counts = {}
+        # target name -> [negative count, positive count]
+        self._target_counts = {}
+
+    def update_numeric(self, values):
+        """
+        Add rows of the numeric independent variables.
+
+        Args:
+            values (np.ndarray): Matrix of shape (rows, vars).
+        """
+        if not len(values):
+            return
+        values = np.asarray(values, dtype=np.float64)
+        count = len(values)
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+
+        # moments of the rows seen so far and of the new rows are combined with
+        # the pairwise update of Chan et al.
+        total = self.num_of_rows + count
+        delta = mean - self._mean
+        self._mean += delta * count / total
+        self._m2 += m2 + delta**2 * self.num_of_rows * count / total
+        self.num_of_rows = total
+        np.minimum(self._min, values.min(axis=0), out=self._min)
+        np.maximum(self._max, values.max(axis=0), out=self._max)
+        self._sketch.update(values)
+
+    def update_categorical(self, cardinality, codes, num_of_categories):
+        """
+        Add rows of the categorical codes of a cardinality.
+
+        Args:
+            cardinality (int): Cardinality of the codes.
+            codes (np.ndarray): Matrix of shape (rows, cat_vars) of codes.
+            num_of_categories (int): Number of categories of the labels.
+        """
+        counts = self._cat_counts.setdefault(
+            cardinality, np.zeros((codes.shape[1], num_of_categories), dtype=np.int64)
+        )
+        for index in range(codes.shape[1]):
+            counts[index] += np.bincount(codes[:, index], minlength=num_of_categories)
+
+    def update_target(self, name, target):
+        """
+        Add rows of a binary target.
+
+        Args:
+            name (str): Name of the target.
+            target (np.ndarray): Boolean target of each row.
+        """
+        counts = self._target_counts.setdefault(name, [0, 0])
+        positives = int(np.count_nonzero(target))
+        counts[0] += len(target) - positives
+        counts[1] += positives
+
+    def to_dict(self, cat_vars, cardinality, target_name, target_column="target"):
+        """
+        Assemble the statistics of a dataset.
+
+        Statistics that were not collected, such as the targets of a streaming run
+        whose datasets are not stored, are left out.
+
+        Args:
+            cat_vars (list): Categorical variables of the dataset, whose numeric
+                statistics are left out.
+            cardinality (int): Cardinality of its categorical variables.
+            target_name (str): Name its target was collected under.
+            target_column (str): Name of its target column.
+
+        Returns:
+            dict: Number of rows and statistics of each column.
+        """
+        std = np.sqrt(self._m2 / max(self.num_of_rows, 1))
+        quantiles = (
+            self._sketch.values_at_ranks(
+                np.rint(np.asarray(self.quantiles) * (self.num_of_rows - 1)).astype(
+                    np.int64
+                )
+            )
+            if self.num_of_rows
+            else np.full((len(self.vars), len(self.quantiles)), np.nan)
+        )
+
+        columns = {}
+        if cat_vars and cardinality in self._cat_counts:
+            for var, counts in zip(cat_vars, self._cat_counts[cardinality]):
+                columns[var] = _categorical_column(counts.tolist())
+        for index, var in enumerate(self.vars):
+            if var in cat_vars:
+                continue
+            columns[var] = {
+                "count": self.num_of_rows,
+                "mean": float(self._mean[index]),
+                "std": float(std[index]),
+                "min": float(self._min[index]),
+                "max": float(self._max[index]),
+                "quantiles": {
+                    str(quantile): float(value)
+                    for quantile, value in zip(self.quantiles, quantiles[index])
+                },
+            }
+        if target_name in self._target_counts:
+            columns[target_column] = _target_column(*self._target_counts[target_name])
+
+        return {"num_of_rows": self.num_of_rows, "columns": columns}
+
+    def update_rows(self, df, cat_vars, target_column="target"):
+        """
+        Add rows of a single dataset, as `DataManager.compose_dataset` builds them.
+
+        The numeric columns of `df` must be the variables of the collector, and its
+        categorical codes are collected with cardinality None.
+
+        Args:
+            df (pd.DataFrame): Rows of the dataset.
+            cat_vars (list): Categorical variables of the dataset.
+            target_column (str): Name of its target column, collected under that
+                name.
+        """
+        self.update_numeric(df[self.vars].to_numpy(dtype=np.float64))
+        if cat_vars:
+            self.update_categorical(
+                None,
+                np.stack([df[var].cat.codes.to_numpy() for var in cat_vars], axis=1),
+                len(df[cat_vars[0]].cat.categories),
+            )
+        self.update_target(target_column, df[target_column].to_numpy())
+
+    @classmethod
+    def merge(cls, statistics, other):
+        """
+        Combine the statistics of two sets of rows of a dataset.
+
+        Counts, means, standard deviations, minimums, maximums and category counts
+        are combined exactly. Quantiles are approximated by inverting the mixture
+        of the distributions interpolated from the quantiles of each set.
+
+        Args:
+            statistics (dict): Statistics of the first rows, as `to_dict` returns
+                them.
+            other (dict): Statistics of the other rows.
+
+        Returns:
+            dict: Statistics of all the rows.
+        """
+        columns = {}
+        for column, first in statistics["columns"].items():
+            second = other["columns"].get(column)
+            if second is None:
+                continue
+            if "counts" in first:
+                counts = [a + b for a, b in zip(first["counts"], second["counts"])]
+                columns[column] = _categorical_column(counts)
+            elif "negative" in first:
+                columns[column] = _target_column(
+                    first["negative"] + second["negative"],
+                    first["positive"] + second["positive"],
+                )
+            else:
+                columns[column] = _merge_numeric_column(first, second)
+
+        return {
+            "num_of_rows": statistics["num_of_rows"] + other["num_of_rows"],
+            "columns": columns,
+        }
+
+
+def _categorical_column(counts):
+    present = [count for count in counts if count]
+    return {
+        "count": sum(counts),
+        "cardinality": len(present),
+        "min_category_count": min(present, default=0),
+        "max_category_count": max(present, default=0),
+        "counts": counts,
+    }
+
+
+def _target_column(negative, positive):
+    count = negative + positive
+    return {
+        "count": count,
+        "negative": negative,
+        "positive": positive,
+        "positive_ratio": positive / count if count else None,
+    }
+
+
+def _merge_numeric_column(first, second):
+    count = first["count"] + second["count"]
+    weight = second["count"] / count if count else 0.0
+    delta = second["mean"] - first["mean"]
+    mean = first["mean"] + delta * weight
+    m2 = (
+        first["std"] ** 2 * first["count"]
+        + second["std"] ** 2 * second["count"]
+        + delta**2 * first["count"] * weight
+    )
+    minimum = min(first["min"], second["min"])
+    maximum = max(first["max"], second["max"])
+
+    # cumulative distribution of each set, interpolated between its minimum,
+    # quantiles and maximum, mixed by the number of rows of each set
+    grid = []
+    for column in (first, second):
+        quantiles = [float(quantile) for quantile in column["quantiles"]]
+        grid.append(
+            (
+                [column["min"]] + list(column["quantiles"].values()) + [column["max"]],
+                [0.0] + quantiles + [1.0],
+            )
+        )
+    points = np.unique(np.concatenate([values for values, _ in grid]))
+    mixture = (1 - weight) * np.interp(points, *grid[0]) + weight * np.interp(
+        points, *grid[1]
+    )
+    quantiles = {
+        quantile: float(np.interp(float(quantile), mixture, points))
+        for quantile in first["quantiles"]
+    }
+
+    return {
+        "count": count,
+        "mean": float(mean),
+        "std": float(np.sqrt(m2 / count)) if count else 0.0,
+        "min": minimum,
+        "max": maximum,
+        "quantiles": quantiles,
+    }
@@ -0,0 +1,279 @@
+"""
+Estimate the peak memory and the runtime of a run from its config.
+
+The estimate adds up the arrays a run holds at once, sized from its number of rows,
+variables, terms, categorical cardinalities and the datasets enabled by the config
+files, and the memory the dataset writers use to format the chunks in flight. In
+streaming mode the arrays of the size of the dataset are memory-mapped files, of
+which only a window of pages is counted. The coefficients below were measured on a
+single core; `CostModel.calibrate` scales them to the observations of a machine.
+"""
+import dataclasses
+import math
+from statistics import median
+
+import numpy as np
+
+from config.base import (
+    CSV_FLOAT_PRECISION,
+    NUM_OF_CSV_FORMAT_WORKERS,
+    NUM_OF_WRITER_THREADS,
+    WRITE_CHUNK_SIZE,
+)
+from config.statistics_config import COLLECT_STATISTICS, STATISTICS_SAMPLE_SIZE
+from config.streaming_config import QUANTILE_SKETCH_SIZE
+from src.categorical_manager import CategoricalManager
+from src.services.dataset_configuration_service import (
+    get_datasets_properties,
+    map_cat_attributes,
+)
+from src.virtual_dataset_manager import VIRTUAL_DATASET_FORMAT
+
+# number of rows a CSV formatter thread formats at once (see CsvFormatter)
+_CSV_BLOCK_ROWS = 25_000
+
+# bytes held while formatting a cell of a CSV block: the character matrices of the
+# columns, their masks and the concatenated lines
+_CSV_BYTES_PER_CELL = 160
+# bytes held while formatting a cell of a CSV block with a fixed float precision
+_CSV_ROUNDED_BYTES_PER_CELL = 80
+
+# copies of a chunk held while it is converted to an Arrow table and written
+_ARROW_COPIES = 1
+
+# bytes of the pages of the memory-mapped files of a streaming run counted as
+# resident: the files are written and read in order, and the kernel writes their
+# dirty pages back and evicts them under memory pressure
+_MEMMAP_RESIDENT_BYTES = 256 * 2**20
+
+# seconds to generate and write a cell of a dataset, per format
+_SECONDS_PER_CELL = {
+    "csv": 0.85e-6,
+    "parquet": 0.17e-6,
+    "feather": 0.1e-6,
+    "npy": 0.07e-6,
+    VIRTUAL_DATASET_FORMAT: 0.02e-6,
+}
+# seconds to evaluate a term of a polynomial on a row
+_SECONDS_PER_TERM_ROW = 0.02e-6
+# seconds to start a run and store its metadata
+_SECONDS_PER_RUN = 0.5
+
+
+@dataclasses.dataclass
+class CostEstimate:
+    """
+    Estimated peak memory and runtime of a run.
+
+    Attributes:
+        peak_bytes (int): Peak memory of the run, on top of the memory of the
+            process before it starts.
+        seconds (float): Wall time of the run.
+        components (dict): Bytes of each part of the peak memory.
+    """
+
+    peak_bytes: int
+    seconds: float
+    components: dict
+
+
+class CostModel:
+    """
+    Cost model of the runs, optionally scaled to the observations of a machine.
+    """
+
+    def __init__(self, memory_scale=1.0, time_scale=1.0):
+        """
+        Args:
+            memory_scale (float): Factor the estimated peak memory is scaled by.
+            time_scale (float): Factor the estimated runtime is scaled by.
+        """
+        self.memory_scale = memory_scale
+        self.time_scale = time_scale
+
+    def estimate(self, config):
+        """
+        Estimate the peak memory and the runtime of a run.
+
+        The number of variables and terms are taken at their maximum, so the
+        estimate bounds the runs drawn from the config rather than predicting one of
+        them.
+
+        Args:
+            config (GenerationConfig): Settings of the run.
+
+        Returns:
+            CostEstimate: Estimated cost of the run.
+        """
+        with config.apply():
+            datasets_properties = get_datasets_properties()
+            cardinalities = sorted(
+                {map_cat_attributes(properties) for properties in datasets_properties}
+                - {0}
+            )
+            num_of_cat_vars = len(
+                CategoricalManager.select_cat_vars(list(range(config.max_num_of_vars)))
+            )
+        num_of_target_types = len(
+            {properties["target_type"] for properties in datasets_properties}
+        )
+
+        num_of_rows = config.num_of_rows
+        num_of_vars = config.max_num_of_vars
+        num_of_polynomials = config.num_of_polynomials
+        feature_bytes = np.dtype(config.feature_dtype).itemsize
+        # the largest code is the number of bin edges
+        code_bytes = sum(
+            CategoricalManager.get_code_dtype(
+                len(CategoricalManager.get_bin_edge_ranks(num_of_rows, cardinality))
+            ).itemsize
+            for cardinality in cardinalities
+        )
+
+        # the multi-polynomial mode stores every feature variant once, and the
+        # targets of every polynomial in one file
+        if num_of_polynomials > 1:
+            num_of_files = len(cardinalities) + 1
+        else:
+            num_of_files = len(datasets_properties)
+
+        if config.streaming:
+            rows_in_memory = min(config.chunk_size, num_of_rows)
+            write_rows = rows_in_memory
+            # the numerical targets, in a memory-mapped file, and the chunk of
+            # values, sortable keys and digits read to find the thresholds
+            numerical_target_bytes = min(
+                num_of_polynomials * num_of_rows * 8, _MEMMAP_RESIDENT_BYTES
+            ) + (num_of_polynomials * rows_in_memory * 8 * 3)
+        else:
+            rows_in_memory = num_of_rows
+            write_rows = min(WRITE_CHUNK_SIZE, num_of_rows)
+            # the numerical targets and the copies sorted to find the thresholds
+            numerical_target_bytes = num_of_polynomials * num_of_rows * 8 * 3
+
+        components = {
+            "features": rows_in_memory * num_of_vars * feature_bytes,
+            "numerical_targets": numerical_target_bytes,
+            "targets": num_of_polynomials * num_of_target_types * rows_in_memory,
+            "cat_codes": rows_in_memory * num_of_cat_vars * code_bytes,
+            "statistics": (
+                min(num_of_rows, STATISTICS_SAMPLE_SIZE) * num_of_vars * 8
+                if COLLECT_STATISTICS
+                else 0
+            ),
+            "write": self._get_write_bytes(
+                config.dataset_format,
+                num_of_rows,
+                num_of_vars * feature_bytes,
+                num_of_vars + 1,
+                num_of_files,
+                write_rows,
+                config.streaming,
+            ),
+        }
+        if config.streaming:
+            components["quantile_sketch"] = (
+                min(num_of_rows, QUANTILE_SKETCH_SIZE) * num_of_cat_vars * 8
+            )
+            if feature_bytes < 8:
+                # the chunks are evaluated in float64
+                components["features"] += rows_in_memory * num_of_vars * 8
+
+        seconds = _SECONDS_PER_RUN + num_of_rows * (
+            num_of_polynomials * config.max_num_of_terms * _SECONDS_PER_TERM_ROW
+            + num_of_files
+            * (num_of_vars + 1)
+            * _SECONDS_PER_CELL[config.dataset_format]
+        )
+        return CostEstimate(
+            peak_bytes=int(sum(components.values()) * self.memory_scale),
+            seconds=seconds * self.time_scale,
+            components=components,
+        )
+
+    def calibrate(self, observations):
+        """
+        Scale the model to observed runs.
+
+        Args:
+            observations (list): Dicts with the predicted_peak_bytes,
+                observed_peak_bytes, predicted_seconds and observed_seconds of runs
+                estimated by this model, as reported by the memory scheduler.
+
+        Returns:
+            CostModel: Model scaled by the median ratio of observed to predicted
+            memory and time.
+        """
+        memory_ratios = [
+            observation["observed_peak_bytes"] / observation["predicted_peak_bytes"]
+            for observation in observations
+            if observation.get("observed_peak_bytes")
+        ]
+        time_ratios = [
+            observation["observed_seconds"] / observation["predicted_seconds"]
+            for observation in observations
+            if observation.get("observed_seconds")
+        ]
+        return CostModel(
+            memory_scale=self.memory_scale
+            * (median(memory_ratios) if memory_ratios else 1.0),
+            time_scale=self.time_scale * (median(time_ratios) if time_ratios else 1.0),
+        )
+
+    @classmethod
+    def _get_write_bytes(
+        cls,
+        dataset_format,
+        num_of_rows,
+        row_bytes,
+        num_of_columns,
+        num_of_files,
+        write_rows,
+        streaming,
+    ):
+        """
+        Estimate the memory used by the dataset writers.
+
+        Args:
+            dataset_format (str): Output format of the datasets.
+            num_of_rows (int): Number of rows of the datasets.
+            row_bytes (int): Bytes of the features of a row.
+            num_of_columns (int): Number of columns of a dataset.
+            num_of_files (int): Number of files written.
+            write_rows (int): Number of rows handed to a writer at once.
+            streaming (bool): The run is generated chunk by chunk.
+
+        Returns:
+            int: Bytes held by the writers at their peak.
+        """
+        if dataset_format == VIRTUAL_DATASET_FORMAT:
+            return 0
+        if dataset_format == "npy":
+            # the written pages of the memory-mapped files stay resident, up to a
+            # window of them when the rest of the run is bounded by its chunks
+            file_bytes = num_of_files * num_of_rows * row_bytes
+            if streaming:
+                return min(file_bytes, _MEMMAP_RESIDENT_BYTES)
+            return file_bytes
+
+        # chunks written at once, one per writer thread
+        num_of_writers = max(1, min(NUM_OF_WRITER_THREADS, num_of_files))
+        if dataset_format == "csv":
+            block_rows = min(write_rows, _CSV_BLOCK_ROWS)
+            blocks_per_writer = min(
+                max(1, NUM_OF_CSV_FORMAT_WORKERS),
+                math.ceil(write_rows / block_rows),
+            )
+            bytes_per_cell = (
+                _CSV_BYTES_PER_CELL
+                if CSV_FLOAT_PRECISION is None
+                else _CSV_ROUNDED_BYTES_PER_CELL
+            )
+            return (
+                num_of_writers
+                * blocks_per_writer
+                * block_rows
+                * num_of_columns
+                * bytes_per_cell
+            )
+        return num_of_writers * write_rows * num_of_columns * 8 * _ARROW_COPIES
@@ -0,0 +1,256 @@
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Characters that make pandas quote a field.
+_SPECIAL_CHARACTERS = (b",", b'"', b"\n", b"\r")
+_COMMA = ord(",")
+_NEWLINE = ord("\n")
+_MINUS = ord("-")
+_POINT = ord(".")
+_ZERO = ord("0")
+
+
+class CsvFormatter:
+    """
+    Formats DataFrames as CSV bytes, with numpy instead of `DataFrame.to_csv`.
+
+    Each column is turned into a matrix of characters, one row per row of the
+    DataFrame, with a mask of the characters to keep. The matrices of every column
+    and the separators are concatenated side by side, and the kept characters, in
+    row-major order, are the CSV text. Blocks of rows are formatted on a pool of
+    threads and concatenated in order.
+
+    Without a float precision the output is the one of `to_csv(index=False)`:
+    floats are printed with their shortest repr, bools as True and False, and
+    categorical columns as their labels. With a precision, floats are rounded to
+    that number of decimals and printed as with "%.{precision}f". Columns the fast
+    path does not handle (non-finite floats, text that needs quoting, objects) are
+    formatted with pandas.
+    """
+
+    def __init__(self, float_precision=None, num_of_workers=1, block_size=25_000):
+        """
+        Args:
+            float_precision (int, optional): Number of decimals of the floats. Floats
+                are printed with full precision if not given.
+            num_of_workers (int): Number of threads blocks are formatted on.
+            block_size (int): Number of rows formatted by a thread at once.
+        """
+        self.float_precision = float_precision
+        self.num_of_workers = num_of_workers
+        self.block_size = block_size
+        self._executor = (
+            ThreadPoolExecutor(num_of_workers) if num_of_workers > 1 else None
+        )
+
+    def close(self):
+        """
+        Stop the threads.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def format_header(self, columns):
+        """
+        Format the header line.
+
+        Args:
+            columns (list): Column names.
+
+        Returns:
+            bytes: Header line.
+        """
+        line = io.StringIO()
+        csv.writer(line, lineterminator="\n").writerow(columns)
+        return line.getvalue().encode()
+
+    def format_rows(self, df):
+        """
+        Format the rows of a DataFrame, without header.
+
+        Args:
+            df (pd.DataFrame): Rows to format.
+
+        Returns:
+            bytes: CSV lines of the rows.
+        """
+        blocks = [
+            df.iloc[start : start + self.block_size]
+            for start in range(0, len(df), self.block_size)
+        ]
+        if self._executor is None:
+            return b"".join(self._format_block(block) for block in blocks)
+        return b"".join(self._executor.map(self._format_block, blocks))
+
+    def _format_block(self, df):
+        chars = []
+        keep = []
+        for index, column in enumerate(df.columns):
+            column_chars, column_keep = self._format_column(df[column])
+            chars.append(column_chars)
+            keep.append(column_keep)
+            separator = _NEWLINE if index == len(df.columns) - 1 else _COMMA
+            chars.append(np.full((len(df), 1), separator, dtype=np.uint8))
+            keep.append(np.ones((len(df), 1), dtype=bool))
+
+        chars = np.concatenate(chars, axis=1)
+        keep = np.concatenate(keep, axis=1)
+        return chars[keep].tobytes()
+
+    def _format_column(self, series):
+        """
+        Format a column as a matrix of characters.
+
+        Args:
+            series (pd.Series): Column to format.
+
+        Returns:
+            tuple: uint8 matrix of shape (rows, width) with the characters of each
+                field, and bool matrix of the same shape with the ones to keep.
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            labels = self._encode(np.asarray(series.cat.categories, dtype=object))
+            if labels is not None:
+                # code -1 (missing) selects the empty label at the end
+                labels = np.append(labels, np.array([b""], dtype=labels.dtype))
+                return self._from_bytes(labels[series.cat.codes.to_numpy()])
+        elif pd.api.types.is_bool_dtype(series.dtype):
+            return self._from_bytes(
+                np.where(series.to_numpy(), b"True", b"False").astype("S5")
+            )
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            return self._from_bytes(series.to_numpy().astype("S21"))
+        elif pd.api.types.is_float_dtype(series.dtype):
+            values = series.to_numpy()
+            if np.isfinite(values).all():
+                if self.float_precision is None:
+                    return self._from_bytes(values.astype("S32"))
+                formatted = self._format_fixed(
+                    values.astype(np.float64), self.float_precision
+                )
+                if formatted is not None:
+                    return formatted
+
+        return self._from_bytes(self._format_with_pandas(series))
+
+    @classmethod
+    def _format_fixed(cls, values, precision):
+        """
+        Format floats with a fixed number of decimals, from their digits.
+
+        Values are scaled and rounded to integers, which only differs from the
+        rounding of "%.{precision}f" when the scaled value lands within its
+        rounding error of a half. Those values are formatted with "%.{precision}f"
+        to get their digits.
+
+        Args:
+            values (np.ndarray): Finite floats.
+            precision (int): Number of decimals.
+
+        Returns:
+            tuple: Characters and mask, as `_format_column`, or None if the values
+                are too large to be scaled to exact integers.
+        """
+        scaled = values * 10.0**precision
+        if len(scaled) and np.abs(scaled).max() >= 2**53:
+            return None
+        # the product is rounded to the nearest float, within a spacing of the
+        # exact one
+        near_half = np.abs(scaled - np.floor(scaled) - 0.5) <= np.spacing(
+            np.abs(scaled)
+        )
+        scaled = np.rint(scaled)
+        for row in np.flatnonzero(near_half):
+            scaled[row] = float(("%.*f" % (precision, values[row])).replace(".", ""))
+        negative = np.signbit(scaled)
+        integers = np.abs(scaled).astype(np.int64)
+        integer_part, decimal_part = np.divmod(integers, 10**precision)
+        num_of_digits = len(str(integer_part.max())) if len(integers) else 1
+
+        chars = [np.where(negative, _MINUS, 0)[:, None]]
+        keep = [negative[:, None]]
+        for position in range(num_of_digits - 1, -1, -1):
+            power = 10**position
+            chars.append((integer_part // power % 10 + _ZERO)[:, None])
+            keep.append((integer_part >= power)[:, None] | (position == 0))
+        if precision > 0:
+            chars.append(np.full((len(values), 1), _POINT))
+            keep.append(np.ones((len(values), 1), dtype=bool))
+            for position in range(precision - 1, -1, -1):
+                chars.append((decimal_part // 10**position % 10 + _ZERO)[:, None])
+                keep.append(np.ones((len(values), 1), dtype=bool))
+
+        return (
+            np.concatenate(chars, axis=1).astype(np.uint8),
+            np.concatenate(keep, axis=1),
+        )
+
+    @classmethod
+    def _from_bytes(cls, values):
+        """
+        View an array of byte strings as a matrix of characters.
+
+        Args:
+            values (np.ndarray): Array of byte strings, which are padded with zeros.
+
+        Returns:
+            tuple: Characters and mask, as `_format_column`.
+        """
+        chars = values.view(np.uint8).reshape(len(values), values.dtype.itemsize)
+        return chars, chars != 0
+
+    @classmethod
+    def _encode(cls, labels):
+        """
+        Encode labels that can be written without quoting.
+
+        Args:
+            labels (np.ndarray): Labels.
+
+        Returns:
+            np.ndarray: Labels as ASCII byte strings, or None if any of them is not
+                an ASCII string or needs quoting.
+        """
+        if not all(isinstance(label, str) and label.isascii() for label in labels):
+            return None
+        encoded = labels.astype("S")
+        if any(
+            character in label for label in encoded for character in _SPECIAL_CHARACTERS
+        ):
+            return None
+        return encoded
+
+    def _format_with_pandas(self, series):
+        """
+        Format a column with pandas.
+
+        Args:
+            series (pd.Series): Column to format.
+
+        Returns:
+            np.ndarray: Field of each row, as byte strings.
+        """
+        float_format = (
+            f"%.{self.float_precision}f" if self.float_precision is not None else None
+        )
+        text = series.to_csv(
+            index=False, header=False, float_format=float_format, lineterminator="\n"
+        )
+        # fields can hold quoted newlines, so they are split by a CSV reader, and
+        # quoted again as they are in a line with several fields
+        return np.array(
+            [self._quote(field) for (field,) in csv.reader(io.StringIO(text))],
+            dtype="S",
+        ).reshape(len(series))
+
+    @classmethod
+    def _quote(cls, field):
+        encoded = field.encode()
+        if any(character in encoded for character in _SPECIAL_CHARACTERS):
+            return b'"' + encoded.replace(b'"', b'""') + b'"'
+        return encoded
@@ -1,4 +1,6 @@
 import json
+import os
+import uuid
 from datetime import datetime
 
 import numpy as np
@@ -6,23 +8,61 @@ import pandas as pd
 
 from config.logging import set_logger
 from config.poly_params_config import NUMBER_OF_INSTANCES
+from src.run_cancellation import RunCancelled, is_cancelled
 
 logger = set_logger()
 
 
 class DataManager:
     @classmethod
-    def generate_independent_var_data(cls):
+    def generate_independent_var_data(
+        cls,
+        num_of_vars,
+        seed=None,
+        start=0,
+        stop=None,
+        dtype=np.float64,
+        out=None,
+    ):
         """
         Generate independent variable data.
 
         This method generates random data for independent variables in a numpy array.
+        Values are drawn row by row from a single PCG64 stream, so any range of rows
+        can be generated on its own by advancing the stream to its first row, and
+        equals the same rows of a larger draw.
+
+        Args:
+            num_of_vars (int): Number of independent variables.
+            seed (np.random.SeedSequence, optional): Seed of the stream. Fresh
+                entropy is used if not given.
+            start (int): First row to generate.
+            stop (int, optional): Row after the last row to generate,
+                NUMBER_OF_INSTANCES if not given.
+            dtype (np.dtype): float64 or float32. float32 values are drawn from the
+                same stream, two per 64-bit draw, so they are not the float64 values
+                rounded.
+            out (np.ndarray, optional): C-contiguous array of shape
+                (stop - start, num_of_vars) and dtype `dtype` to generate into, such
+                as a memory-mapped file. A new array is allocated if not given.
 
         Returns:
-            np.ndarray: Array containing independent variable data.
+            np.ndarray: Array of shape (stop - start, num_of_vars) containing
+                independent variable data.
         """
-        rng = np.random.default_rng()
-        return rng.random((NUMBER_OF_INSTANCES, 1))
+        if stop is None:
+            stop = NUMBER_OF_INSTANCES
+        dtype = np.dtype(dtype)
+        bit_generator = np.random.PCG64(seed)
+        # each float64 consumes one 64-bit draw, and each float32 half of one
+        first_value = start * num_of_vars
+        values_per_draw = 8 // dtype.itemsize
+        bit_generator.advance(first_value // values_per_draw)
+        generator = np.random.Generator(bit_generator)
+        if first_value % values_per_draw:
+            generator.random(dtype=dtype)
+
+        return generator.random((stop - start, num_of_vars), dtype=dtype, out=out)
 
     @classmethod
     def generate_binary_linear_target(cls, df):
@@ -33,23 +73,16 @@ class DataManager:
             df (pd.DataFrame): DataFrame containing numerical target data.
 
         Returns:
-            pd.DataFrame: DataFrame with generated binary linear target variable.
+            tuple: A tuple containing the DataFrame with the generated binary linear
+                target variable and a dict with the threshold used.
         """
         df = df.copy()
 
-        df["target"] = None
-        half_index = len(df.index) // 2
-        num_target = df["num_target"].tolist()
-        num_target.sort(reverse=True)
-
-        upper_half = num_target[:half_index]
-
-        for index, row in df.iterrows():
-            df.at[index, "target"] = row["num_target"] in upper_half
+        df["target"], thresholds = cls.compute_binary_linear_target(
+            df["num_target"].to_numpy()
+        )
 
-        cls._assert_data_balance(df)
-
-        return df
+        return df, thresholds
 
     @classmethod
     def generate_binary_non_linear_target(cls, df):
@@ -60,55 +93,340 @@ class DataManager:
             df (pd.DataFrame): DataFrame containing numerical target data.
 
         Returns:
-            pd.DataFrame: DataFrame with generated binary non-linear target variable.
+            tuple: A tuple containing the DataFrame with the generated binary non-linear
+                target variable and a dict with the lower and upper thresholds used.
         """
         df = df.copy()
 
-        df["target"] = None
-        quater_index_size = len(df.index) // 4
-        num_target = df["num_target"].tolist()
-        num_target.sort(reverse=True)
+        df["target"], thresholds = cls.compute_binary_non_linear_target(
+            df["num_target"].to_numpy()
+        )
 
-        upper_quater = num_target[:quater_index_size]
-        lower_quater = num_target[-quater_index_size:]
+        return df, thresholds
 
-        vals_to_be_true = upper_quater + lower_quater
+    @classmethod
+    def compute_binary_linear_target(cls, num_target):
+        """
+        Compute the binary linear target of a numerical target.
+
+        The half of the rows with the largest `num_target` values is set to True.
+        Rows are ranked with a linear-time selection; rows tied on the threshold
+        value are ranked by their position, so later rows are ranked higher.
+
+        Args:
+            num_target (np.ndarray): Numerical target.
 
-        for index, row in df.iterrows():
-            df.at[index, "target"] = row["num_target"] in vals_to_be_true
+        Returns:
+            tuple: A tuple containing the boolean target and a dict with the
+                threshold used.
+        """
+        half_index = len(num_target) // 2
 
-        cls._assert_data_balance(df)
+        target, threshold, tie_rows = cls._select_upper_rows(num_target, half_index)
+
+        cls._assert_data_balance(target)
+
+        thresholds = {"threshold": threshold, "positive_tie_rows": tie_rows}
+
+        return target, thresholds
+
+    @classmethod
+    def compute_binary_non_linear_target(cls, num_target):
+        """
+        Compute the binary non-linear target of a numerical target.
+
+        The quarter of the rows with the largest `num_target` values and the quarter
+        with the smallest values are set to True. Ties are broken as in
+        `compute_binary_linear_target`.
+
+        Args:
+            num_target (np.ndarray): Numerical target.
+
+        Returns:
+            tuple: A tuple containing the boolean target and a dict with the lower
+                and upper thresholds used.
+        """
+        quater_index_size = len(num_target) // 4
+
+        upper_quater, upper_threshold, upper_tie_rows = cls._select_upper_rows(
+            num_target, quater_index_size
+        )
+        # the lowest values are the largest ones of the negated values
+        lower_quater, lower_threshold, lower_tie_rows = cls._select_upper_rows(
+            -num_target[::-1], quater_index_size
+        )
+        lower_quater = lower_quater[::-1]
+        if lower_threshold is not None:
+            lower_threshold = -lower_threshold
+        lower_tie_rows = sorted(len(num_target) - 1 - row for row in lower_tie_rows)
+
+        target = upper_quater | lower_quater
+
+        cls._assert_data_balance(target)
+
+        thresholds = {
+            "lower_threshold": lower_threshold,
+            "lower_positive_tie_rows": lower_tie_rows,
+            "upper_threshold": upper_threshold,
+            "upper_positive_tie_rows": upper_tie_rows,
+        }
+
+        return target, thresholds
+
+    @classmethod
+    def apply_binary_linear_target(cls, num_target, thresholds, first_row=0):
+        """
+        Set the binary linear target of rows with previously computed thresholds.
+
+        Args:
+            num_target (np.ndarray): Numerical target of consecutive rows.
+            thresholds (dict): Thresholds returned by `generate_binary_linear_target`.
+            first_row (int): Row of the first value of `num_target`.
+
+        Returns:
+            np.ndarray: Boolean target of each row.
+        """
+        if thresholds["threshold"] is None:
+            return np.zeros(len(num_target), dtype=bool)
+
+        target = num_target > thresholds["threshold"]
+        target[
+            cls._rows_in_range(
+                thresholds["positive_tie_rows"], first_row, len(num_target)
+            )
+        ] = True
+
+        return target
+
+    @classmethod
+    def apply_binary_non_linear_target(cls, num_target, thresholds, first_row=0):
+        """
+        Set the binary non-linear target of rows with previously computed thresholds.
+
+        Args:
+            num_target (np.ndarray): Numerical target of consecutive rows.
+            thresholds (dict): Thresholds returned by
+                `generate_binary_non_linear_target`.
+            first_row (int): Row of the first value of `num_target`.
+
+        Returns:
+            np.ndarray: Boolean target of each row.
+        """
+        if thresholds["lower_threshold"] is None:
+            return np.zeros(len(num_target), dtype=bool)
+
+        target = (num_target < thresholds["lower_threshold"]) | (
+            num_target > thresholds["upper_threshold"]
+        )
+        for tie_rows in (
+            thresholds["lower_positive_tie_rows"],
+            thresholds["upper_positive_tie_rows"],
+        ):
+            target[cls._rows_in_range(tie_rows, first_row, len(num_target))] = True
+
+        return target
+
+    @classmethod
+    def _rows_in_range(cls, rows, first_row, num_of_rows):
+        """
+        Select the rows falling in a range, relative to its first row.
+
+        Args:
+            rows (list): Rows.
+            first_row (int): First row of the range.
+            num_of_rows (int): Number of rows of the range.
+
+        Returns:
+            np.ndarray: Positions in the range of the rows falling in it.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        in_range = (rows >= first_row) & (rows < first_row + num_of_rows)
+
+        return rows[in_range] - first_row
+
+    @classmethod
+    def _select_upper_rows(cls, values, num_of_rows):
+        """
+        Select the rows holding the largest values.
+
+        Values are ranked in ascending order with ties ranked by row position, and
+        the `num_of_rows` highest ranked rows are selected.
+
+        Args:
+            values (np.ndarray): Values to rank.
+            num_of_rows (int): Number of rows to select.
+
+        Returns:
+            tuple: A tuple containing a boolean mask of the selected rows, the
+                smallest selected value and the selected rows holding that value.
+        """
+        selected = np.zeros(len(values), dtype=bool)
+        if num_of_rows == 0:
+            return selected, None, []
+
+        kth = len(values) - num_of_rows
+        threshold = np.partition(values, kth)[kth]
+
+        selected[values > threshold] = True
+        tie_rows = np.flatnonzero(values == threshold)
+        num_of_ties_to_select = num_of_rows - int(selected.sum())
+        tie_rows = tie_rows[len(tie_rows) - num_of_ties_to_select :]
+        selected[tie_rows] = True
+
+        return selected, float(threshold), tie_rows.tolist()
+
+    @classmethod
+    def compose_dataset(
+        cls, features, vars, target, cat_vars=(), cat_codes=None, cat_labels=None
+    ):
+        """
+        Build the DataFrame of a dataset, or of a block of its rows, from arrays
+        shared by every dataset of a run.
+
+        Args:
+            features (np.ndarray): Matrix of shape (rows, vars) with the numeric
+                independent variables.
+            vars (list): Names of the columns of `features`.
+            target (np.ndarray, optional): Binary target of each row. The dataset
+                has no target column if not given.
+            cat_vars (list): Variables replaced by categorical variables, which are
+                the first ones of `vars`.
+            cat_codes (np.ndarray, optional): Matrix of shape (rows, cat_vars) with
+                the codes of the categorical variables.
+            cat_labels (list, optional): Label dictionary of the categorical codes.
+
+        Returns:
+            pd.DataFrame: Independent variables, with the categorical variables as
+                pandas Categoricals, followed by the target.
+        """
+        # the numeric columns are a view of `features`, not a copy
+        num_of_cat_vars = len(cat_vars)
+        df = pd.DataFrame(
+            features[:, num_of_cat_vars:], columns=vars[num_of_cat_vars:], copy=False
+        )
+        if num_of_cat_vars:
+            cat_columns = pd.DataFrame(
+                {
+                    cat_var: pd.Categorical.from_codes(
+                        cat_codes[:, index], categories=cat_labels
+                    )
+                    for index, cat_var in enumerate(cat_vars)
+                }
+            )
+            df = pd.concat([cat_columns, df], axis=1, copy=False)
+        if target is not None:
+            df["target"] = target
 
         return df
 
     @classmethod
-    def create_metadata(cls, vars, expression, cat_cols, name):
+    def compose_targets(cls, targets):
+        """
+        Build the DataFrame of the targets shared by the datasets of a run, or of a
+        block of its rows.
+
+        Args:
+            targets (dict): Binary target of each row, by column name.
+
+        Returns:
+            pd.DataFrame: One column per target.
+        """
+        return pd.DataFrame(targets)
+
+    @classmethod
+    def create_metadata(
+        cls,
+        vars,
+        expression,
+        cat_cols,
+        name,
+        cat_encoding=None,
+        seed=None,
+        relative_path_to_dataset=None,
+        dataset_format="csv",
+        target="target",
+        relative_path_to_target=None,
+        profile=None,
+        generation=None,
+        format_options=None,
+        statistics=None,
+        relative_path_to_shard_manifest=None,
+        relative_path_to_target_shard_manifest=None,
+    ):
         """
         Create metadata dictionary for the dataset.
 
         Args:
             vars (list): List of variable names.
-            expression (str): Polynomial expression used to generate the dataset.
+            expression (str): Polynomial expression used to generate the dataset,
+                None to leave it out.
             cat_cols (list): List of categorical variable names.
             name (str): Name of the dataset.
+            cat_encoding (dict, optional): Code dtype and label dictionary of the
+                categorical variables.
+            seed (dict, optional): Entropy and spawn key of the seed sequence the
+                dataset was generated from.
+            relative_path_to_dataset (str, optional): Path of the stored dataset.
+            dataset_format (str): Format of the stored dataset.
+            target (str): Name of the target column.
+            relative_path_to_target (str, optional): Path of the file holding the
+                target column, when it is stored apart from the dataset.
+            profile (dict, optional): Time, memory and output bytes of each stage of
+                the run the dataset was generated in.
+            generation (dict, optional): Number of rows, polynomial, target
+                thresholds and categorical bin edges the dataset can be regenerated
+                with, see `VirtualDatasetManager`.
+            format_options (dict, optional): Settings of the format the dataset was
+                written with, such as the float precision and compression of CSV.
+            statistics (dict, optional): Number of rows and summary of each column
+                of the dataset, see `StatisticsCollector`.
+            relative_path_to_shard_manifest (str, optional): Path of the manifest
+                of the shards of the dataset, when it is sharded instead of stored
+                at `relative_path_to_dataset`.
+            relative_path_to_target_shard_manifest (str, optional): Path of the
+                manifest of the shards of the file holding the target column, when
+                it is sharded.
 
         Returns:
             dict: Metadata dictionary.
         """
+        if (
+            relative_path_to_dataset is None
+            and relative_path_to_shard_manifest is None
+            and dataset_format == "csv"
+        ):
+            relative_path_to_dataset = f"./datasets/{name}/train_dataset.csv"
+
         metadata = {
             "dataset_name": name,
-            "desc": f"polynomial expression: {expression}",
+            "desc": (
+                f"polynomial expression: {expression}"
+                if expression is not None
+                else None
+            ),
             "dataset_source": None,
-            "relative_path_to_dataset": f"./datasets/{name}/train_dataset.csv",
+            "relative_path_to_dataset": relative_path_to_dataset,
+            "relative_path_to_shard_manifest": relative_path_to_shard_manifest,
+            "dataset_format": dataset_format,
+            "format_options": format_options,
             "relative_path_to_unbalanced_dataset": None,
             "id_cols": [],
             "cat_cols": cat_cols,
+            "cat_encoding": cat_encoding,
             "time_cols": [],
             "num_cols": vars,
             "is_scaled": True,
             "cols_to_delete": [],
-            "target": "target",
+            "target": target,
+            "relative_path_to_target": relative_path_to_target,
+            "relative_path_to_target_shard_manifest": (
+                relative_path_to_target_shard_manifest
+            ),
             "positive_values_are_represented_by": True,
+            "seed": seed,
+            "profile": profile,
+            "generation": generation,
+            "statistics": statistics,
         }
 
         return metadata
@@ -118,38 +436,69 @@ class DataManager:
         """
         Save dictionary to JSON file.
 
+        The file is written next to its path and then renamed, so it is never seen
+        partially written.
+
         Args:
             dictionary (dict): Dictionary to be saved.
             path_and_name (str): Path and name of the JSON file.
+
+        Raises:
+            RunCancelled: If the run was cancelled, in which case the file is left
+                untouched.
         """
-        with open(path_and_name, "w") as write_file:
+        tmp_path_and_name = cls.get_tmp_path(path_and_name)
+        with open(tmp_path_and_name, "w") as write_file:
             json.dump(dictionary, write_file, indent=4)
+        if is_cancelled():
+            os.remove(tmp_path_and_name)
+            raise RunCancelled(
+                f"{path_and_name} was not written, the run was cancelled"
+            )
+        os.replace(tmp_path_and_name, path_and_name)
 
     @classmethod
-    def _assert_data_balance(cls, df):
+    def get_tmp_path(cls, path):
         """
-        Assert the balance of binary target variable distribution.
+        Get a temporary path next to a path, to write it before renaming.
+
+        The name is unique to each call, so processes sharing a filesystem never
+        write the same temporary file, even with the same process ID.
 
         Args:
-            df (pd.DataFrame): DataFrame containing the binary target variable.
+            path (str): Path of the output.
+
+        Returns:
+            str: Temporary path.
         """
-        counts = df["target"].value_counts().tolist()
+        return f"{path}.{uuid.uuid4().hex}.tmp"
 
-        positive_instances = (counts[1] / (counts[0] + counts[1])) * 100
-        negative_instances = (counts[0] / (counts[0] + counts[1])) * 100
+    @classmethod
+    def _assert_data_balance(cls, target):
+        """
+        Assert the balance of binary target variable distribution.
+
+        Args:
+            target (np.ndarray): Binary target variable.
+        """
+        positive_instances = int(np.count_nonzero(target))
+        negative_instances = len(target) - positive_instances
 
         assert positive_instances == negative_instances
 
     @classmethod
-    def save_csv(cls, df, name_and_path):
+    def save_csv(cls, df, name_and_path, append=False):
         """
         Save DataFrame to CSV file.
 
         Args:
             df (pd.DataFrame): DataFrame to be saved.
             name_and_path (str): Path and name of the CSV file.
+            append (bool): Append the rows, without header, to an existing file.
         """
-        df.to_csv(name_and_path, index=False)
+        df.to_csv(
+            name_and_path, index=False, mode="a" if append else "w", header=not append
+        )
 
     @classmethod
     def load_json(cls, path_and_name):
@@ -0,0 +1,280 @@
+"""
+SQLite index of the metadata of the generated datasets.
+
+Usage:
+    python -m src.dataset_catalog query --target-type NON_LINEAR --cardinality 1000 \
+        --min-vars 20 --max-degree 5
+    python -m src.dataset_catalog rebuild
+"""
+import argparse
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+
+from config.base import PATH_TO_CATALOG, PATH_TO_METADATA_FILES
+from src.data_manager import DataManager
+from src.polynomial import Polynomial
+
+_COLUMNS = (
+    "dataset_name",
+    "relative_path_to_dataset",
+    "dataset_format",
+    "relative_path_to_target",
+    "target",
+    "target_type",
+    "cardinality",
+    "num_of_vars",
+    "num_of_cat_vars",
+    "num_of_terms",
+    "degree",
+    "total_degree",
+    "num_of_rows",
+    "metadata",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    dataset_name TEXT PRIMARY KEY,
+    relative_path_to_dataset TEXT,
+    dataset_format TEXT,
+    relative_path_to_target TEXT,
+    target TEXT,
+    target_type TEXT,
+    cardinality INTEGER,
+    num_of_vars INTEGER,
+    num_of_cat_vars INTEGER,
+    num_of_terms INTEGER,
+    degree INTEGER,
+    total_degree INTEGER,
+    num_of_rows INTEGER,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS datasets_target_cardinality
+    ON datasets (target_type, cardinality);
+CREATE INDEX IF NOT EXISTS datasets_num_of_vars ON datasets (num_of_vars);
+CREATE INDEX IF NOT EXISTS datasets_degree ON datasets (degree);
+"""
+
+# query argument -> (column, comparison)
+_FILTERS = {
+    "target_type": ("target_type", "="),
+    "cardinality": ("cardinality", "="),
+    "dataset_format": ("dataset_format", "="),
+    "min_num_of_vars": ("num_of_vars", ">="),
+    "max_num_of_vars": ("num_of_vars", "<="),
+    "min_num_of_terms": ("num_of_terms", ">="),
+    "max_num_of_terms": ("num_of_terms", "<="),
+    "min_degree": ("degree", ">="),
+    "max_degree": ("degree", "<="),
+    "min_num_of_rows": ("num_of_rows", ">="),
+    "max_num_of_rows": ("num_of_rows", "<="),
+}
+
+
+class DatasetCatalog:
+    """
+    Index of dataset metadata in a SQLite database.
+
+    Every metadata file is stored whole, next to the fields datasets are usually
+    searched by: target type, cardinality, number of variables, terms and rows,
+    and degree. `degree` is the largest exponent of a variable, as `min_degree`
+    and `max_degree` in the polynomial parameters, and `total_degree` the largest
+    sum of the exponents of a term.
+    """
+
+    def __init__(self, path=PATH_TO_CATALOG):
+        """
+        Args:
+            path (str): Path of the SQLite database, created if it does not exist.
+        """
+        self.path = path
+
+    def add(self, metadata_list):
+        """
+        Index datasets, replacing the entries of datasets with the same name, in a
+        single transaction.
+
+        Args:
+            metadata_list (list): Metadata dictionaries.
+        """
+        with self._connect() as connection:
+            self._insert(connection, metadata_list)
+
+    def rebuild(self, path_to_metadata_files=PATH_TO_METADATA_FILES):
+        """
+        Replace the whole index with the metadata files of a directory, in a single
+        transaction.
+
+        Args:
+            path_to_metadata_files (str): Directory of the metadata files.
+
+        Returns:
+            int: Number of indexed datasets.
+        """
+        metadata_list = [
+            DataManager.load_json(os.path.join(path_to_metadata_files, name))
+            for name in sorted(os.listdir(path_to_metadata_files))
+            if name.endswith(".json")
+        ]
+        with self._connect() as connection:
+            connection.execute("DELETE FROM datasets")
+            self._insert(connection, metadata_list)
+
+        return len(metadata_list)
+
+    def query(self, limit=None, **filters):
+        """
+        Find datasets.
+
+        Args:
+            limit (int, optional): Maximum number of datasets returned.
+            **filters: Any of target_type, cardinality, dataset_format, and
+                min_/max_ bounds (inclusive) of num_of_vars, num_of_terms, degree
+                and num_of_rows. Filters set to None are ignored.
+
+        Returns:
+            list: Indexed fields of each matching dataset, ordered by name.
+        """
+        conditions = []
+        values = []
+        for name, value in filters.items():
+            if name not in _FILTERS:
+                raise ValueError(
+                    f"Unknown filter {name!r}, expected one of {sorted(_FILTERS)}"
+                )
+            if value is None:
+                continue
+            column, comparison = _FILTERS[name]
+            conditions.append(f"{column} {comparison} ?")
+            values.append(value)
+
+        sql = f"SELECT {', '.join(_COLUMNS[:-1])} FROM datasets"
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        sql += " ORDER BY dataset_name"
+        if limit is not None:
+            sql += " LIMIT ?"
+            values.append(limit)
+
+        with self._connect() as connection:
+            connection.row_factory = sqlite3.Row
+            return [dict(row) for row in connection.execute(sql, values)]
+
+    def get(self, dataset_name):
+        """
+        Get the metadata of a dataset.
+
+        Args:
+            dataset_name (str): Name of the dataset.
+
+        Returns:
+            dict: Metadata of the dataset, None if it is not indexed.
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT metadata FROM datasets WHERE dataset_name = ?", (dataset_name,)
+            ).fetchone()
+
+        return json.loads(row[0]) if row is not None else None
+
+    @contextmanager
+    def _connect(self):
+        # wait for the writes of other processes instead of failing
+        connection = sqlite3.connect(self.path, timeout=60)
+        try:
+            connection.executescript(_SCHEMA)
+            # commit or roll back the transaction, then close the connection
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @classmethod
+    def _insert(cls, connection, metadata_list):
+        connection.executemany(
+            f"INSERT OR REPLACE INTO datasets ({', '.join(_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+            [cls._to_row(metadata) for metadata in metadata_list],
+        )
+
+    @classmethod
+    def _to_row(cls, metadata):
+        """
+        Extract the indexed fields of a metadata dictionary.
+
+        Args:
+            metadata (dict): Metadata of a dataset.
+
+        Returns:
+            tuple: Value of each column of the index.
+        """
+        generation = metadata.get("generation") or {}
+        polynomial = generation.get("polynomial")
+        num_of_terms = degree = total_degree = None
+        if polynomial is not None:
+            polynomial = Polynomial.from_dict(polynomial)
+            num_of_terms = polynomial.num_of_terms
+            degree = int(polynomial.term_exponents.max(initial=0))
+            total_degree = int(polynomial.term_degrees.max(initial=0))
+
+        return (
+            metadata["dataset_name"],
+            metadata.get("relative_path_to_dataset"),
+            metadata.get("dataset_format"),
+            metadata.get("relative_path_to_target"),
+            metadata.get("target"),
+            generation.get("target_type"),
+            generation.get("cardinality"),
+            len(metadata["num_cols"]) + len(metadata["cat_cols"]),
+            len(metadata["cat_cols"]),
+            num_of_terms,
+            degree,
+            total_degree,
+            generation.get("num_of_rows"),
+            json.dumps(metadata),
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the dataset catalog.")
+    parser.add_argument("--catalog", default=PATH_TO_CATALOG)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser(
+        "rebuild", help="re-index every metadata file of a directory"
+    )
+    rebuild.add_argument("--metadata-dir", default=PATH_TO_METADATA_FILES)
+
+    query = commands.add_parser("query", help="find datasets")
+    query.add_argument("--target-type", choices=["LINEAR", "NON_LINEAR"])
+    query.add_argument("--cardinality", type=int)
+    query.add_argument("--format", dest="dataset_format")
+    for bound in ("min", "max"):
+        query.add_argument(f"--{bound}-vars", dest=f"{bound}_num_of_vars", type=int)
+        query.add_argument(f"--{bound}-terms", dest=f"{bound}_num_of_terms", type=int)
+        query.add_argument(f"--{bound}-degree", dest=f"{bound}_degree", type=int)
+        query.add_argument(f"--{bound}-rows", dest=f"{bound}_num_of_rows", type=int)
+    query.add_argument("--limit", type=int)
+    query.add_argument(
+        "--metadata", action="store_true", help="print the whole metadata"
+    )
+
+    args = vars(parser.parse_args(argv))
+    catalog = DatasetCatalog(args.pop("catalog"))
+    command = args.pop("command")
+
+    if command == "rebuild":
+        num_of_datasets = catalog.rebuild(args["metadata_dir"])
+        print(f"indexed {num_of_datasets} datasets")
+        return
+
+    print_metadata = args.pop("metadata")
+    for row in catalog.query(**args):
+        if print_metadata:
+            row = catalog.get(row["dataset_name"])
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
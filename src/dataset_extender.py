@@ -0,0 +1,218 @@
+"""
+Append rows to generated datasets.
+
+Usage:
+    python -m src.dataset_extender dataset_metadata/sdata_<exec_id>_linear_binary.json 100000
+"""
+import argparse
+import numbers
+
+import numpy as np
+
+from config.base import (
+    MAX_QUEUED_CHUNKS,
+    NUM_OF_WRITER_THREADS,
+    PATH_TO_CATALOG,
+    WRITE_CHUNK_SIZE,
+)
+from src.background_writer import BackgroundWriterPool
+from src.column_statistics import StatisticsCollector
+from src.data_manager import DataManager
+from src.dataset_catalog import DatasetCatalog
+from src.dataset_writers import CSV_COMPRESSIONS, CsvWriter, get_dataset_writer
+from src.run_manifest import RunManifest
+from src.streaming_manager import StreamingManager
+from src.virtual_dataset_manager import VIRTUAL_DATASET_FORMAT, VirtualDatasetManager
+
+# Child of the run seed the quantile sketch of the column statistics is seeded
+# from, as in `main_routine._get_child_seed`.
+_STATISTICS_STREAM = 3
+
+
+class DatasetExtender:
+    """
+    Grows a dataset by appending new rows, without regenerating the existing ones.
+
+    The new rows continue the random stream of the dataset, are evaluated with its
+    polynomial, and are labelled with the target thresholds and categorical bin
+    edges stored in its metadata, so the existing rows and their labels do not
+    change. The new rows are only approximately balanced: the thresholds balance
+    the rows they were computed on exactly, and other rows in expectation.
+
+    The extended dataset is written next to the stored one, which it replaces once
+    complete, and its number of rows is updated in the metadata, the catalog and
+    the manifest of its run. The extended dataset equals the one
+    `VirtualDatasetManager.load` rebuilds from the updated metadata.
+
+    Column statistics stored in the metadata are collected for the new rows and
+    merged with the stored ones.
+    """
+
+    @classmethod
+    def extend(cls, metadata_path, num_of_new_rows, chunk_size=WRITE_CHUNK_SIZE):
+        """
+        Append rows to a dataset.
+
+        Args:
+            metadata_path (str): Path of the metadata file of the dataset.
+            num_of_new_rows (int): Number of rows to append.
+            chunk_size (int): Number of rows built and written at once.
+
+        Returns:
+            dict: Updated metadata of the dataset.
+
+        Raises:
+            ValueError: If num_of_new_rows is not a positive integer, or the dataset
+                cannot be extended.
+        """
+        if (
+            not isinstance(num_of_new_rows, numbers.Integral)
+            or isinstance(num_of_new_rows, bool)
+            or num_of_new_rows < 1
+        ):
+            raise ValueError(
+                f"num_of_new_rows must be a positive integer, got {num_of_new_rows!r}"
+            )
+
+        metadata = DataManager.load_json(metadata_path)
+        if metadata.get("generation") is None:
+            raise ValueError(
+                f"{metadata_path} has no generation parameters, so its dataset "
+                "cannot be extended"
+            )
+        if metadata.get("relative_path_to_shard_manifest") is not None:
+            raise ValueError(
+                f"{metadata['dataset_name']} is sharded, and sharded datasets cannot "
+                "be extended"
+            )
+        if metadata.get("relative_path_to_target") is not None:
+            raise ValueError(
+                f"The files of {metadata['dataset_name']} are shared with other "
+                "datasets, which would fall out of step if it was extended alone"
+            )
+
+        num_of_rows = metadata["generation"]["num_of_rows"]
+        total_num_of_rows = num_of_rows + num_of_new_rows
+
+        statistics = cls._create_statistics_collector(metadata, num_of_rows)
+        chunks = StreamingManager.iter_chunks(num_of_new_rows, chunk_size)
+
+        if metadata["dataset_format"] != VIRTUAL_DATASET_FORMAT:
+            with cls._get_writer(
+                metadata, total_num_of_rows
+            ) as writer, BackgroundWriterPool(
+                min(NUM_OF_WRITER_THREADS, 1), MAX_QUEUED_CHUNKS
+            ) as writer_pool:
+                writer.copy_existing(num_of_rows)
+                for start, stop in chunks:
+                    df = VirtualDatasetManager.build_rows(
+                        metadata, num_of_rows + start, num_of_rows + stop
+                    )
+                    cls._collect_statistics(statistics, metadata, df)
+                    writer_pool.write(writer, df)
+                writer_pool.close_writer(writer)
+            RunManifest.update([writer.path])
+        elif statistics is not None:
+            for start, stop in chunks:
+                cls._collect_statistics(
+                    statistics,
+                    metadata,
+                    VirtualDatasetManager.build_rows(
+                        metadata, num_of_rows + start, num_of_rows + stop
+                    ),
+                )
+
+        if statistics is not None:
+            metadata["statistics"] = StatisticsCollector.merge(
+                metadata["statistics"],
+                statistics.to_dict(
+                    metadata["cat_cols"], None, metadata["target"], metadata["target"]
+                ),
+            )
+        metadata["generation"]["num_of_rows"] = total_num_of_rows
+        DataManager.save_dict_to_json(metadata, metadata_path)
+        if PATH_TO_CATALOG is not None:
+            DatasetCatalog(PATH_TO_CATALOG).add([metadata])
+        RunManifest.update([metadata_path])
+
+        return metadata
+
+    @classmethod
+    def _create_statistics_collector(cls, metadata, num_of_rows):
+        """
+        Create the collector of the column statistics of the new rows of a dataset.
+
+        Args:
+            metadata (dict): Metadata of the dataset.
+            num_of_rows (int): Number of rows of the dataset before it is extended.
+
+        Returns:
+            StatisticsCollector: Collector, None if the metadata has no statistics.
+        """
+        if metadata.get("statistics") is None:
+            return None
+        seed = metadata["seed"]
+        return StatisticsCollector(
+            [var for var in metadata["num_cols"] if var not in metadata["cat_cols"]],
+            np.random.SeedSequence(
+                seed["entropy"],
+                spawn_key=tuple(seed["spawn_key"]) + (_STATISTICS_STREAM, num_of_rows),
+            ),
+        )
+
+    @classmethod
+    def _collect_statistics(cls, statistics, metadata, df):
+        """
+        Add new rows of a dataset to the statistics of the new rows.
+
+        Args:
+            statistics (StatisticsCollector): Collector, None to skip.
+            metadata (dict): Metadata of the dataset.
+            df (pd.DataFrame): New rows.
+        """
+        if statistics is not None:
+            statistics.update_rows(df, metadata["cat_cols"], metadata["target"])
+
+    @classmethod
+    def _get_writer(cls, metadata, num_of_rows):
+        """
+        Create a writer of a dataset with the format it was stored with.
+
+        Args:
+            metadata (dict): Metadata of the dataset.
+            num_of_rows (int): Total number of rows of the extended dataset.
+
+        Returns:
+            DatasetWriter: Writer whose path is the stored dataset.
+        """
+        path = metadata["relative_path_to_dataset"]
+        writer_class = get_dataset_writer(metadata["dataset_format"])
+        if writer_class is not CsvWriter:
+            path_without_extension = path[: len(path) - len(writer_class.extension)]
+            return writer_class(path_without_extension, num_of_rows)
+
+        # datasets stored before CSV options existed have full precision floats
+        # and no compression
+        format_options = metadata.get("format_options") or {}
+        compression = format_options.get("compression")
+        extension = f"{CsvWriter.extension}{CSV_COMPRESSIONS[compression][0]}"
+        return CsvWriter(
+            path[: len(path) - len(extension)],
+            num_of_rows,
+            format_options.get("float_precision"),
+            compression,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append rows to a dataset.")
+    parser.add_argument("metadata", help="path of the metadata file of the dataset")
+    parser.add_argument("rows", type=int, help="number of rows to append")
+    args = parser.parse_args(argv)
+
+    metadata = DatasetExtender.extend(args.metadata, args.rows)
+    print(f"{metadata['dataset_name']}: {metadata['generation']['num_of_rows']} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,646 @@
+import gzip
+import hashlib
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config.base import (
+    CSV_COMPRESSION,
+    CSV_FLOAT_PRECISION,
+    NUM_OF_CSV_FORMAT_WORKERS,
+    SHARD_BYTES,
+    SHARD_ROWS,
+)
+from src.categorical_manager import CategoricalManager
+from src.csv_formatter import CsvFormatter
+from src.data_manager import DataManager
+from src.run_cancellation import RunCancelled, is_cancelled
+from src.stage_profiler import get_output_bytes
+
+# Extension and compression level of each CSV compression.
+CSV_COMPRESSIONS = {None: ("", None), "gzip": (".gz", 1), "zstd": (".zst", 3)}
+# Name of the manifest listing the shards of a sharded dataset.
+SHARD_MANIFEST_NAME = "manifest.json"
+# Number of first rows written to estimate the number of rows of a shard of a
+# given size.
+_SHARD_SIZE_SAMPLE_ROWS = 10_000
+
+
+class DatasetWriter:
+    """
+    Base class of the dataset writers.
+
+    A writer receives the rows of a dataset as consecutive DataFrame chunks, in
+    order, and stores them under `path`. Categorical columns are expected as
+    pandas Categoricals and are stored dictionary-encoded when the format allows it.
+
+    Rows are written to a temporary path next to `path`, which is renamed to `path`
+    when the writer is closed, so `path` only ever holds complete datasets. If an
+    exception leaves the writer context, the temporary output is removed instead.
+    """
+
+    file_format = None
+    extension = None
+    # Settings of the format the dataset was written with, stored in the metadata.
+    format_options = None
+    # Path of the manifest listing the shards of a sharded dataset.
+    shard_manifest_path = None
+
+    def __init__(self, path_without_extension, num_of_rows):
+        """
+        Args:
+            path_without_extension (str): Path and name of the dataset.
+            num_of_rows (int): Total number of rows that will be written.
+        """
+        self.path = f"{path_without_extension}{self.extension}"
+        self.num_of_rows = num_of_rows
+        self.rows_written = 0
+        self._write_path = DataManager.get_tmp_path(self.path)
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, df):
+        """
+        Append a chunk of rows.
+
+        Args:
+            df (pd.DataFrame): Rows to append.
+        """
+        self._write(df)
+        self.rows_written += len(df)
+
+    def split(self, df):
+        """
+        Split a chunk of rows among the writers that store it.
+
+        Args:
+            df (pd.DataFrame): Rows to append.
+
+        Returns:
+            list: (writer, rows) pairs, to be written in order for each writer.
+        """
+        return [(self, df)]
+
+    def get_part_writers(self):
+        """
+        Get the writers `split` hands rows to, when they are not the writer itself.
+
+        Returns:
+            list: Writers to close before this one.
+        """
+        return []
+
+    def copy_existing(self, num_of_existing_rows):
+        """
+        Start from the dataset already stored at `path`, so the rows written next
+        are appended to it. `path` is replaced when the writer is closed, and is
+        left untouched if the writer is aborted.
+
+        Args:
+            num_of_existing_rows (int): Number of rows of the stored dataset.
+        """
+        self._copy_existing()
+        self.rows_written = num_of_existing_rows
+
+    def close(self):
+        """
+        Finish writing the dataset and move it to its path.
+
+        Raises:
+            RunCancelled: If the run was cancelled, in which case the dataset is
+                aborted instead.
+        """
+        if self._closed:
+            return
+        if is_cancelled():
+            self.abort()
+            raise RunCancelled(f"{self.path} was not written, the run was cancelled")
+        self._finish()
+        self._closed = True
+        if os.path.exists(self._write_path):
+            _remove(self.path)
+            os.replace(self._write_path, self.path)
+
+    def abort(self):
+        """
+        Stop writing the dataset and remove what was written.
+        """
+        if self._closed:
+            return
+        self._finish()
+        self._closed = True
+        _remove(self._write_path)
+
+    def _write(self, df):
+        raise NotImplementedError
+
+    def _copy_existing(self):
+        raise NotImplementedError(f"{self.file_format} datasets cannot be appended to")
+
+    def _finish(self):
+        """
+        Flush and close the output.
+        """
+
+
+class CsvWriter(DatasetWriter):
+    """
+    Writes a CSV file, optionally compressed with gzip or zstd.
+
+    Rows are formatted with `CsvFormatter`, in blocks on a pool of threads, and
+    floats are rounded to `float_precision` decimals when it is set.
+    """
+
+    file_format = "csv"
+    extension = ".csv"
+
+    def __init__(
+        self,
+        path_without_extension,
+        num_of_rows,
+        float_precision=CSV_FLOAT_PRECISION,
+        compression=CSV_COMPRESSION,
+        num_of_workers=NUM_OF_CSV_FORMAT_WORKERS,
+    ):
+        """
+        Args:
+            path_without_extension (str): Path and name of the dataset.
+            num_of_rows (int): Total number of rows that will be written.
+            float_precision (int, optional): Number of decimals of the floats. Floats
+                are written with full precision if not given.
+            compression (str, optional): "gzip" or "zstd". zstd requires zstandard.
+            num_of_workers (int): Number of threads rows are formatted on.
+        """
+        if compression not in CSV_COMPRESSIONS:
+            raise ValueError(
+                f"Unknown CSV compression {compression!r}, "
+                f"expected one of {list(CSV_COMPRESSIONS)}"
+            )
+        compression_extension, self._compression_level = CSV_COMPRESSIONS[compression]
+        self.extension = f"{CsvWriter.extension}{compression_extension}"
+        super().__init__(path_without_extension, num_of_rows)
+        self.compression = compression
+        self.format_options = {
+            "float_precision": float_precision,
+            "compression": compression,
+        }
+        self._formatter = CsvFormatter(float_precision, num_of_workers)
+        self._file = None
+
+    def _write(self, df):
+        if self._file is None:
+            self._file = self._open()
+            self._file.write(self._formatter.format_header(df.columns))
+        self._file.write(self._formatter.format_rows(df))
+
+    def _copy_existing(self):
+        # gzip members and zstd frames can be concatenated, so the new rows are
+        # compressed on their own after the existing ones
+        shutil.copyfile(self.path, self._write_path)
+        self._file = self._open(mode="ab")
+
+    def _open(self, mode="wb"):
+        if self.compression == "gzip":
+            return gzip.open(self._write_path, mode, self._compression_level)
+        if self.compression == "zstd":
+            zstandard = _import_zstandard()
+            return zstandard.ZstdCompressor(self._compression_level).stream_writer(
+                open(self._write_path, mode)
+            )
+        return open(self._write_path, mode)
+
+    def _finish(self):
+        self._formatter.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ParquetWriter(DatasetWriter):
+    """
+    Writes a Parquet file with one row group per chunk.
+    """
+
+    file_format = "parquet"
+    extension = ".parquet"
+
+    def __init__(self, path_without_extension, num_of_rows):
+        super().__init__(path_without_extension, num_of_rows)
+        self._pa = _import_pyarrow()
+        import pyarrow.parquet as pq
+
+        self._pq = pq
+        self._writer = None
+
+    def _write(self, df):
+        table = self._pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._write_path, table.schema)
+        elif not table.schema.equals(self._writer.schema, check_metadata=False):
+            # dictionary indices of the row groups of a stored file are read back
+            # as int32, so appended chunks are cast to the schema of the file
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+
+    def _copy_existing(self):
+        existing = self._pq.ParquetFile(self.path)
+        self._writer = self._pq.ParquetWriter(self._write_path, existing.schema_arrow)
+        for row_group in range(existing.num_row_groups):
+            self._writer.write_table(existing.read_row_group(row_group))
+
+    def _finish(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class FeatherWriter(DatasetWriter):
+    """
+    Writes an Arrow IPC (Feather v2) file with one record batch per chunk. The
+    file is uncompressed, so it can be memory-mapped with `pyarrow.memory_map`.
+    """
+
+    file_format = "feather"
+    extension = ".feather"
+
+    def __init__(self, path_without_extension, num_of_rows):
+        super().__init__(path_without_extension, num_of_rows)
+        self._pa = _import_pyarrow()
+        self._writer = None
+
+    def _write(self, df):
+        table = self._pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._writer = self._pa.ipc.new_file(self._write_path, table.schema)
+        self._writer.write_table(table)
+
+    def _copy_existing(self):
+        existing = self._pa.ipc.open_file(self._pa.memory_map(self.path))
+        self._writer = self._pa.ipc.new_file(self._write_path, existing.schema)
+        for batch in range(existing.num_record_batches):
+            self._writer.write_batch(existing.get_batch(batch))
+
+    def _finish(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class NpyWriter(DatasetWriter):
+    """
+    Writes a directory with one .npy file per column, which can be loaded with
+    `np.load(path, mmap_mode="r")`.
+
+    Numeric columns are stored with their dtype, categorical columns as their codes
+    (the label dictionary is in the metadata) and the target as bool. A
+    `columns.json` file lists the columns in order.
+    """
+
+    file_format = "npy"
+    extension = ""
+
+    def __init__(self, path_without_extension, num_of_rows):
+        super().__init__(path_without_extension, num_of_rows)
+        self._columns = None
+
+    def _write(self, df):
+        if self._columns is None:
+            os.makedirs(self._write_path, exist_ok=True)
+            self._columns = {
+                column: np.lib.format.open_memmap(
+                    os.path.join(self._write_path, f"{column}.npy"),
+                    mode="w+",
+                    dtype=self._column_values(df[column]).dtype,
+                    shape=(self.num_of_rows,),
+                )
+                for column in df.columns
+            }
+            DataManager.save_dict_to_json(
+                {"columns": df.columns.tolist()},
+                os.path.join(self._write_path, "columns.json"),
+            )
+
+        stop = self.rows_written + len(df)
+        for column, values in self._columns.items():
+            values[self.rows_written : stop] = self._column_values(df[column])
+
+    def _copy_existing(self):
+        columns = DataManager.load_json(os.path.join(self.path, "columns.json"))
+        os.makedirs(self._write_path, exist_ok=True)
+        self._columns = {}
+        for column in columns["columns"]:
+            existing = np.load(os.path.join(self.path, f"{column}.npy"), mmap_mode="r")
+            self._columns[column] = np.lib.format.open_memmap(
+                os.path.join(self._write_path, f"{column}.npy"),
+                mode="w+",
+                dtype=existing.dtype,
+                shape=(self.num_of_rows,),
+            )
+            self._columns[column][: len(existing)] = existing
+        DataManager.save_dict_to_json(
+            columns, os.path.join(self._write_path, "columns.json")
+        )
+
+    def _finish(self):
+        if self._columns is not None:
+            for values in self._columns.values():
+                values.flush()
+            self._columns = None
+
+    @classmethod
+    def _column_values(cls, series):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            code_dtype = CategoricalManager.get_code_dtype(
+                len(series.cat.categories) - 1
+            )
+            return series.cat.codes.to_numpy().astype(code_dtype)
+        return series.to_numpy()
+
+
+DATASET_WRITERS = {
+    writer.file_format: writer
+    for writer in (CsvWriter, ParquetWriter, FeatherWriter, NpyWriter)
+}
+
+
+def get_dataset_writer(file_format):
+    """
+    Get the writer class of an output format.
+
+    Args:
+        file_format (str): One of "csv", "parquet", "feather" or "npy".
+
+    Returns:
+        type: Subclass of DatasetWriter.
+    """
+    if file_format not in DATASET_WRITERS:
+        raise ValueError(
+            f"Unknown dataset format {file_format!r}, "
+            f"expected one of {sorted(DATASET_WRITERS)}"
+        )
+    return DATASET_WRITERS[file_format]
+
+
+class ShardedWriter(DatasetWriter):
+    """
+    Writes a dataset as a directory of shards, each a complete dataset of the
+    output format holding a range of consecutive rows, so that they can be read
+    independently and in parallel.
+
+    Every `shard_rows` rows go to a new shard, written by its own writer. When only
+    `shard_bytes` is given, the number of rows of the shards is estimated from the
+    size of the first rows written in the output format. A `manifest.json` file
+    lists the shards in order with their first row, number of rows, size, SHA-256
+    checksum and the number of negative and positive values of each bool column.
+    """
+
+    extension = ""
+
+    def __init__(
+        self,
+        writer_class,
+        path_without_extension,
+        num_of_rows,
+        shard_rows=None,
+        shard_bytes=None,
+        **writer_options,
+    ):
+        """
+        Args:
+            writer_class (type): Subclass of DatasetWriter the shards are written
+                with.
+            path_without_extension (str): Path and name of the dataset directory.
+            num_of_rows (int): Total number of rows that will be written.
+            shard_rows (int, optional): Number of rows of each shard.
+            shard_bytes (int, optional): Target size of each shard in bytes, used
+                when `shard_rows` is not given.
+            **writer_options: Arguments of `writer_class` besides the path and
+                number of rows.
+        """
+        if shard_rows is None and shard_bytes is None:
+            raise ValueError("Either shard_rows or shard_bytes must be given")
+        super().__init__(path_without_extension, num_of_rows)
+        self.file_format = writer_class.file_format
+        self.shard_manifest_path = os.path.join(self.path, SHARD_MANIFEST_NAME)
+        self.shard_rows = shard_rows
+        self.shard_bytes = shard_bytes
+        self.format_options = {"shard_rows": shard_rows, "shard_bytes": shard_bytes}
+        self._writer_class = writer_class
+        self._writer_options = writer_options
+        self._shards = []
+
+    def write(self, df):
+        for shard, rows in self.split(df):
+            shard.write(rows)
+
+    def split(self, df):
+        if self.shard_rows is None:
+            self.shard_rows = self._estimate_shard_rows(df)
+            self.format_options["shard_rows"] = self.shard_rows
+
+        parts = []
+        start = 0
+        while start < len(df):
+            index = (self.rows_written + start) // self.shard_rows
+            if index == len(self._shards):
+                self._open_shard()
+            stop = min(len(df), (index + 1) * self.shard_rows - self.rows_written)
+            parts.append((self._shards[index], df.iloc[start:stop]))
+            start = stop
+        self.rows_written += len(df)
+        return parts
+
+    def get_part_writers(self):
+        return list(self._shards)
+
+    def abort(self):
+        if self._closed:
+            return
+        for shard in self._shards:
+            shard.writer.abort()
+        self._closed = True
+        _remove(self._write_path)
+
+    def _finish(self):
+        os.makedirs(self._write_path, exist_ok=True)
+        for shard in self._shards:
+            shard.close()
+        DataManager.save_dict_to_json(
+            {
+                "file_format": self.file_format,
+                "num_of_rows": self.rows_written,
+                "shard_rows": self.shard_rows,
+                "shards": [shard.to_dict() for shard in self._shards],
+            },
+            os.path.join(self._write_path, SHARD_MANIFEST_NAME),
+        )
+
+    def _open_shard(self):
+        os.makedirs(self._write_path, exist_ok=True)
+        first_row = len(self._shards) * self.shard_rows
+        writer = self._writer_class(
+            os.path.join(self._write_path, f"part-{len(self._shards):05d}"),
+            min(self.shard_rows, self.num_of_rows - first_row),
+            **self._writer_options,
+        )
+        if writer.format_options is not None:
+            self.format_options.update(writer.format_options)
+        self._shards.append(_Shard(writer, first_row))
+
+    def _estimate_shard_rows(self, df):
+        """
+        Estimate the number of rows of `shard_bytes` bytes, by writing the first
+        rows of the dataset in the output format.
+
+        Args:
+            df (pd.DataFrame): First chunk of the dataset.
+
+        Returns:
+            int: Number of rows of each shard.
+        """
+        sample = df.iloc[:_SHARD_SIZE_SAMPLE_ROWS]
+        os.makedirs(self._write_path, exist_ok=True)
+        with self._writer_class(
+            os.path.join(self._write_path, "size-sample"),
+            len(sample),
+            **self._writer_options,
+        ) as writer:
+            writer.write(sample)
+        sample_bytes = get_output_bytes(writer.path)
+        _remove(writer.path)
+        return max(1, int(self.shard_bytes * len(sample) / max(sample_bytes, 1)))
+
+
+class _Shard:
+    """
+    Writer of a shard, which counts the values of the bool columns and computes
+    the checksum of the shard once it is closed.
+    """
+
+    def __init__(self, writer, first_row):
+        self.writer = writer
+        self.first_row = first_row
+        self.class_balance = {}
+        self.sha256 = None
+        self._lock = threading.Lock()
+
+    def write(self, df):
+        self.writer.write(df)
+        for column in df.columns:
+            if pd.api.types.is_bool_dtype(df[column].dtype):
+                positives = int(np.count_nonzero(df[column].to_numpy()))
+                counts = self.class_balance.setdefault(column, [0, 0])
+                counts[0] += len(df) - positives
+                counts[1] += positives
+
+    def close(self):
+        # a shard can be closed by a writer thread and then by the sharded writer
+        with self._lock:
+            if self.sha256 is None:
+                self.writer.close()
+                self.sha256 = _get_sha256(self.writer.path)
+
+    def to_dict(self):
+        return {
+            "path": os.path.basename(self.writer.path),
+            "first_row": self.first_row,
+            "num_of_rows": self.writer.rows_written,
+            "bytes": get_output_bytes(self.writer.path),
+            "sha256": self.sha256,
+            "class_balance": {
+                column: {"negative": negative, "positive": positive}
+                for column, (negative, positive) in self.class_balance.items()
+            },
+        }
+
+
+def create_dataset_writer(
+    file_format,
+    path_without_extension,
+    num_of_rows,
+    shard_rows=SHARD_ROWS,
+    shard_bytes=SHARD_BYTES,
+):
+    """
+    Create the writer of a dataset, sharded if a shard size is given.
+
+    Args:
+        file_format (str): One of "csv", "parquet", "feather" or "npy".
+        path_without_extension (str): Path and name of the dataset.
+        num_of_rows (int): Total number of rows that will be written.
+        shard_rows (int, optional): Number of rows of each shard.
+        shard_bytes (int, optional): Target size of each shard in bytes.
+
+    Returns:
+        DatasetWriter: Writer of the dataset.
+    """
+    writer_class = get_dataset_writer(file_format)
+    if shard_rows is None and shard_bytes is None:
+        return writer_class(path_without_extension, num_of_rows)
+    return ShardedWriter(
+        writer_class, path_without_extension, num_of_rows, shard_rows, shard_bytes
+    )
+
+
+def _get_sha256(path):
+    """
+    Compute the checksum of a stored dataset.
+
+    Args:
+        path (str): Path of a file, or of a directory of files, which are hashed in
+            the order of their names.
+
+    Returns:
+        str: Hexadecimal SHA-256 digest.
+    """
+    paths = (
+        [os.path.join(path, name) for name in sorted(os.listdir(path))]
+        if os.path.isdir(path)
+        else [path]
+    )
+    digest = hashlib.sha256()
+    for file_path in paths:
+        with open(file_path, "rb") as file:
+            for block in iter(lambda: file.read(2**20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as error:
+        raise ImportError(
+            "pyarrow is required to write parquet and feather datasets: "
+            "pip install pyarrow"
+        ) from error
+    return pyarrow
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError as error:
+        raise ImportError(
+            "zstandard is required to write zstd compressed CSV datasets: "
+            "pip install zstandard"
+        ) from error
+    return zstandard
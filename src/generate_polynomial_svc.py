@@ -1,6 +1,7 @@
-import random
+import numpy as np
 
 from config.logging import set_logger
+from src.polynomial import Polynomial
 
 logger = set_logger()
 
@@ -14,6 +15,7 @@ class GeneratePolynomialSvc:
         max_num_of_terms,
         min_coef_value,
         max_coef_value,
+        rng=None,
     ):
         """
         Define parameters for generating a polynomial.
@@ -24,20 +26,24 @@ class GeneratePolynomialSvc:
             max_num_of_terms (int): Maximum number of terms in the polynomial.
             min_coef_value (float): Minimum value for the coefficients.
             max_coef_value (float): Maximum value for the coefficients.
+            rng (np.random.Generator, optional): Source of randomness. A fresh
+                unseeded generator is used if not given.
 
         Returns:
             tuple: A tuple containing the number of variables, number of terms, and coefficients.
         """
+        rng = rng if rng is not None else np.random.default_rng()
+
         # Select a random number of variables.
-        num_of_vars = random.randint(min_num_of_vars, max_num_of_vars)
+        num_of_vars = int(rng.integers(min_num_of_vars, max_num_of_vars, endpoint=True))
         # Select a random number of terms.
-        num_of_terms = random.randint(1, max_num_of_terms)
+        num_of_terms = int(rng.integers(1, max_num_of_terms, endpoint=True))
 
         # Generate coefficients for each term.
         coefficients = {}
         for term in range(num_of_terms):
-            coefficients["c_term_" + str((term + 1))] = random.uniform(
-                min_coef_value, max_coef_value
+            coefficients["c_term_" + str((term + 1))] = float(
+                rng.uniform(min_coef_value, max_coef_value)
             )
 
         logger.debug(f"Number of variables: {num_of_vars}")
@@ -46,9 +52,83 @@ class GeneratePolynomialSvc:
 
         return num_of_vars, num_of_terms, coefficients
 
+    @classmethod
+    def create_polynomial(
+        cls,
+        num_of_vars,
+        min_degree,
+        max_degree,
+        num_of_terms,
+        coefficients,
+        rng=None,
+        max_num_of_vars_in_terms=None,
+    ):
+        """
+        Create a structured polynomial.
+
+        Args:
+            num_of_vars (int): Number of variables.
+            min_degree (int): Minimum degree for variables.
+            max_degree (int): Maximum degree for variables.
+            num_of_terms (int): Number of terms in the polynomial.
+            coefficients (dict): Coefficients for each term.
+            rng (np.random.Generator, optional): Source of randomness. A fresh
+                unseeded generator is used if not given.
+            max_num_of_vars_in_terms (int, optional): Maximum number of variables
+                drawn for a term, those drawn with exponent 0 being left out of it.
+                Every term uses every variable if not given.
+
+        Returns:
+            Polynomial: Polynomial with a coefficient vector and the variables and
+                exponents of each term.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        variables = cls._get_vars(num_of_vars)
+
+        term_coefficients = [
+            coefficients["c_term_" + str(term + 1)] for term in range(num_of_terms)
+        ]
+
+        if max_num_of_vars_in_terms is None:
+            # Select exponent for each variable of each term.
+            exponents = rng.integers(
+                min_degree, max_degree, size=(num_of_terms, num_of_vars), endpoint=True
+            )
+            return Polynomial.from_dense(term_coefficients, exponents, variables)
+
+        # Select the variables of each term, and an exponent for each of them. A
+        # variable drawn with exponent 0 is a factor of 1, so it is left out of its
+        # term, as the dense path leaves it in with no effect.
+        term_vars = []
+        term_exponents = []
+        for _ in range(num_of_terms):
+            num_of_term_vars = int(
+                rng.integers(
+                    1, min(max_num_of_vars_in_terms, num_of_vars), endpoint=True
+                )
+            )
+            vars_of_term = np.sort(
+                rng.choice(num_of_vars, num_of_term_vars, replace=False)
+            )
+            exponents_of_term = rng.integers(
+                min_degree, max_degree, size=num_of_term_vars, endpoint=True
+            )
+            used = exponents_of_term > 0
+            term_vars.append(vars_of_term[used])
+            term_exponents.append(exponents_of_term[used])
+
+        return Polynomial(term_coefficients, term_vars, term_exponents, variables)
+
     @classmethod
     def create_string_expression(
-        cls, num_of_vars, min_degree, max_degree, num_of_terms, coefficients
+        cls,
+        num_of_vars,
+        min_degree,
+        max_degree,
+        num_of_terms,
+        coefficients,
+        rng=None,
+        max_num_of_vars_in_terms=None,
     ):
         """
         Create a string expression for the polynomial.
@@ -59,31 +139,25 @@ class GeneratePolynomialSvc:
             max_degree (int): Maximum degree for variables.
             num_of_terms (int): Number of terms in the polynomial.
             coefficients (dict): Coefficients for each term.
+            rng (np.random.Generator, optional): Source of randomness. A fresh
+                unseeded generator is used if not given.
+            max_num_of_vars_in_terms (int, optional): Maximum number of variables
+                of a term. Every term uses every variable if not given.
 
         Returns:
             tuple: A tuple containing the polynomial expression and variables used.
         """
-        variables = cls._get_vars(num_of_vars)
-
-        # Create terms for the polynomial.
-        terms = {}
-        for term in range(num_of_terms):
-            term_name = "term_" + str(term + 1)
-            vars_with_exp = []
-            for var in variables:
-                # Select exponent for each variable.
-                var_exponent = random.randint(min_degree, max_degree)
-                vars_with_exp.append(f"({var}**{var_exponent})")
-            # Join variables with their exponents.
-            term_expression = " * ".join(vars_with_exp)
-            # Multiply the term by its coefficient.
-            term_expression = f"{coefficients['c_' + term_name]} * {term_expression}"
-            terms[term_name] = term_expression
-
-        # Join terms to create the polynomial expression.
-        polynomial_expression = " + ".join(terms.values())
-
-        return polynomial_expression, variables
+        polynomial = cls.create_polynomial(
+            num_of_vars,
+            min_degree,
+            max_degree,
+            num_of_terms,
+            coefficients,
+            rng,
+            max_num_of_vars_in_terms,
+        )
+
+        return polynomial.to_string_expression(), polynomial.variables
 
     @classmethod
     def _get_vars(cls, num_of_vars):
@@ -0,0 +1,246 @@
+import dataclasses
+import sys
+from contextlib import contextmanager
+from functools import partial
+from typing import Optional
+
+from config import (
+    base,
+    cat_vars_config,
+    datasets_config,
+    poly_params_config,
+    streaming_config,
+)
+from src.dataset_writers import DATASET_WRITERS
+from src.virtual_dataset_manager import VIRTUAL_DATASET_FORMAT
+
+# field -> (config module, constant), or (config module, dict constant, key) for
+# the polynomial parameters
+_CONSTANTS = {
+    "num_of_rows": (poly_params_config, "NUMBER_OF_INSTANCES"),
+    "min_num_of_vars": (poly_params_config, "params", "min_num_of_vars"),
+    "max_num_of_vars": (poly_params_config, "params", "max_num_of_vars"),
+    "min_degree": (poly_params_config, "params", "min_degree"),
+    "max_degree": (poly_params_config, "params", "max_degree"),
+    "max_num_of_terms": (poly_params_config, "params", "max_num_of_terms"),
+    "min_coef_value": (poly_params_config, "params", "min_coef_value"),
+    "max_coef_value": (poly_params_config, "params", "max_coef_value"),
+    "max_num_of_vars_in_terms": (
+        poly_params_config,
+        "params",
+        "max_num_of_vars_in_terms",
+    ),
+    "feature_dtype": (poly_params_config, "FEATURE_DTYPE"),
+    "num_of_polynomials": (poly_params_config, "NUM_OF_POLYNOMIALS"),
+    "perc_of_cat_vars": (cat_vars_config, "PERC_OF_CAT_VARS"),
+    "high_cardinality": (cat_vars_config, "INSTANCES_IN_HIGH_CARD_CAT_VAR"),
+    "low_cardinality": (cat_vars_config, "INSTANCES_IN_LOW_CARD_CAT_VAR"),
+    "generate_linear_target": (datasets_config, "GENERATE_LINEAR_TARGET"),
+    "generate_non_linear_target": (datasets_config, "GENERATE_NON_LINEAR_TARGET"),
+    "generate_only_numbers_dataset": (
+        datasets_config,
+        "GENERATE_ONLY_NUMBERS_DATASET",
+    ),
+    "generate_high_cardinality_dataset": (
+        datasets_config,
+        "GENERATE_DATASET_WITH_HIGH_CARDINALITY_CAT_ATTRIBUTES",
+    ),
+    "generate_low_cardinality_dataset": (
+        datasets_config,
+        "GENERATE_DATASET_WITH_LOW_CARDINALITY_CAT_ATTRIBUTES",
+    ),
+    "generate_binary_dataset": (
+        datasets_config,
+        "GENERATE_DATASET_WITH_BINARY_CAT_ATTRIBUTES",
+    ),
+    "streaming": (streaming_config, "STREAMING_MODE"),
+    "chunk_size": (streaming_config, "CHUNK_SIZE"),
+    "dataset_format": (base, "DATASET_FORMAT"),
+}
+
+# grid keys that set several fields to the same value
+GRID_ALIASES = {
+    "num_of_vars": ("min_num_of_vars", "max_num_of_vars"),
+    "degree": ("max_degree",),
+    "num_of_terms": ("max_num_of_terms",),
+    "cardinality": ("high_cardinality",),
+}
+
+
+def _read_constant(name):
+    module, constant, *key = _CONSTANTS[name]
+    value = getattr(module, constant)
+    return value[key[0]] if key else value
+
+
+def _default(name):
+    return dataclasses.field(default_factory=lambda: _read_constant(name))
+
+
+@dataclasses.dataclass
+class GenerationConfig:
+    """
+    Settings of a run, one field per constant of the config files it replaces.
+
+    Fields left out take the value of their constant when the config is created,
+    so `GenerationConfig()` is the configuration of the config files, and
+    `GenerationConfig(num_of_rows=10_000)` differs from it only by the number of
+    rows. Paths, output options and the seed are not part of it.
+
+    `apply` sets the constants of the config files to the fields of a config while
+    a run is generated, so the generation code keeps reading them as it does for
+    runs configured by the files.
+    """
+
+    num_of_rows: int = _default("num_of_rows")
+    min_num_of_vars: int = _default("min_num_of_vars")
+    max_num_of_vars: int = _default("max_num_of_vars")
+    min_degree: int = _default("min_degree")
+    max_degree: int = _default("max_degree")
+    max_num_of_terms: int = _default("max_num_of_terms")
+    min_coef_value: float = _default("min_coef_value")
+    max_coef_value: float = _default("max_coef_value")
+    max_num_of_vars_in_terms: Optional[int] = _default("max_num_of_vars_in_terms")
+    feature_dtype: str = _default("feature_dtype")
+    num_of_polynomials: int = _default("num_of_polynomials")
+    perc_of_cat_vars: float = _default("perc_of_cat_vars")
+    high_cardinality: int = _default("high_cardinality")
+    low_cardinality: int = _default("low_cardinality")
+    generate_linear_target: bool = _default("generate_linear_target")
+    generate_non_linear_target: bool = _default("generate_non_linear_target")
+    generate_only_numbers_dataset: bool = _default("generate_only_numbers_dataset")
+    generate_high_cardinality_dataset: bool = _default(
+        "generate_high_cardinality_dataset"
+    )
+    generate_low_cardinality_dataset: bool = _default(
+        "generate_low_cardinality_dataset"
+    )
+    generate_binary_dataset: bool = _default("generate_binary_dataset")
+    streaming: bool = _default("streaming")
+    chunk_size: int = _default("chunk_size")
+    dataset_format: str = _default("dataset_format")
+
+    def __post_init__(self):
+        if self.num_of_rows < 1:
+            raise ValueError(f"num_of_rows must be positive, got {self.num_of_rows}")
+        # the linear target labels exactly half of the rows as positive, and the
+        # non-linear target exactly a quarter at each end
+        rows_multiple = 4 if self.generate_non_linear_target else 2
+        if self.num_of_rows % rows_multiple:
+            raise ValueError(
+                f"num_of_rows must be a multiple of {rows_multiple} for the targets "
+                f"to be exactly balanced, got {self.num_of_rows}"
+            )
+        if not 1 <= self.min_num_of_vars <= self.max_num_of_vars:
+            raise ValueError(
+                "Expected 1 <= min_num_of_vars <= max_num_of_vars, got "
+                f"{self.min_num_of_vars} and {self.max_num_of_vars}"
+            )
+        if not 0 <= self.min_degree <= self.max_degree:
+            raise ValueError(
+                "Expected 0 <= min_degree <= max_degree, got "
+                f"{self.min_degree} and {self.max_degree}"
+            )
+        if not (self.generate_linear_target or self.generate_non_linear_target):
+            raise ValueError(
+                "At least one of generate_linear_target or "
+                "generate_non_linear_target must be True"
+            )
+        if self.feature_dtype not in ("float64", "float32"):
+            raise ValueError(
+                f"Unknown feature dtype {self.feature_dtype!r}, "
+                "expected 'float64' or 'float32'"
+            )
+        if (
+            self.dataset_format not in DATASET_WRITERS
+            and self.dataset_format != VIRTUAL_DATASET_FORMAT
+        ):
+            raise ValueError(
+                f"Unknown dataset format {self.dataset_format!r}, expected one of "
+                f"{sorted(DATASET_WRITERS) + [VIRTUAL_DATASET_FORMAT]}"
+            )
+        if self.num_of_polynomials > 1 and (
+            self.streaming or self.dataset_format == VIRTUAL_DATASET_FORMAT
+        ):
+            raise ValueError(
+                "Streaming mode and virtual datasets support a single polynomial "
+                "per run"
+            )
+
+    def to_dict(self):
+        """
+        Get the fields of the config.
+
+        Returns:
+            dict: Value of each field.
+        """
+        return dataclasses.asdict(self)
+
+    def replace(self, **changes):
+        """
+        Copy the config with some fields changed.
+
+        Args:
+            **changes: New value of fields, or of the keys of GRID_ALIASES.
+
+        Returns:
+            GenerationConfig: Changed copy.
+        """
+        fields = {}
+        for name, value in changes.items():
+            for field in GRID_ALIASES.get(name, (name,)):
+                fields[field] = value
+        return dataclasses.replace(self, **fields)
+
+    @contextmanager
+    def apply(self):
+        """
+        Set the constants of the config files to the fields of the config, and
+        restore them on exit.
+
+        Constants are set in their config module and in every loaded module of
+        `src` that imported them by name. Modules of `src` imported while the config
+        is applied import the set values, and are restored on exit too. The
+        polynomial parameters are updated in place. Default values of function
+        arguments are bound when their module is imported, so the generation code
+        passes the fields it needs explicitly. Constants are global to the process,
+        so configs must not be applied by several threads at once.
+        """
+        modules = _get_src_modules()
+        restore = []
+        originals = {}
+        try:
+            for name, value in self.to_dict().items():
+                module, constant, *key = _CONSTANTS[name]
+                if key:
+                    params = getattr(module, constant)
+                    restore.append((params.__setitem__, key[0], params[key[0]]))
+                    params[key[0]] = value
+                    continue
+                originals[constant] = getattr(module, constant)
+                for target in [module] + [
+                    module for module in modules if constant in vars(module)
+                ]:
+                    restore.append(
+                        (partial(setattr, target), constant, getattr(target, constant))
+                    )
+                    setattr(target, constant, value)
+            yield self
+        finally:
+            for set_value, name, value in reversed(restore):
+                set_value(name, value)
+            # modules imported in the meantime hold the values of the config
+            for module in _get_src_modules():
+                if any(module is loaded for loaded in modules):
+                    continue
+                for constant, value in originals.items():
+                    if constant in vars(module):
+                        setattr(module, constant, value)
+
+
+def _get_src_modules():
+    return [
+        module
+        for name, module in list(sys.modules.items())
+        if module is not None and (name == "src" or name.startswith("src."))
+    ]
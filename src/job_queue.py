@@ -0,0 +1,503 @@
+"""
+Queue of the runs of a batch in a SQLite database, shared by workers on any
+number of machines.
+
+Usage:
+    python -m src.job_queue enqueue --total 1000 --master-seed 42
+    python -m src.job_queue work
+    python -m src.job_queue status
+"""
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from functools import partial
+
+import numpy as np
+
+from config.base import (
+    DATASET_FORMAT,
+    MASTER_SEED,
+    TOTAL_DATASETS_TO_GENERATE,
+)
+from config.job_queue_config import (
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_SECONDS,
+    PATH_TO_JOB_QUEUE,
+)
+from config.logging import set_logger
+from config.poly_params_config import NUM_OF_POLYNOMIALS
+from config.streaming_config import STREAMING_MODE
+from src.batch_runner import get_routine, spawn_runs
+from src.generation_config import GenerationConfig
+from src.run_cancellation import RunCancelled, cancellable
+from src.run_manifest import RunManifest
+
+logger = set_logger()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    exec_id TEXT NOT NULL UNIQUE,
+    spec TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_token TEXT,
+    lease_expires_at REAL,
+    error TEXT,
+    enqueued_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires_at);
+"""
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueue:
+    """
+    Runs of a batch waiting to be generated, in a SQLite database.
+
+    Each job holds the seed and generation config of a run, keyed by its execution
+    ID, so enqueuing a batch again only adds the runs that are not queued yet, and
+    every worker generates a run with the config it was queued with rather than
+    the one of its own config files. A worker claims a job with a lease, which it
+    renews while the job runs, and reports the job as done or failed. A job whose
+    lease expires, because its worker died or lost access to the database, can be
+    claimed by any worker. Each claim is a single UPDATE statement, so two workers
+    never hold the same lease.
+
+    A run is generated again only if its worker stopped renewing its lease, and a
+    worker that loses the lease of its run cancels it before it publishes more
+    outputs. Outputs are written atomically and named after the run key, so a run
+    generated twice writes the same files.
+    """
+
+    def __init__(self, path=PATH_TO_JOB_QUEUE, max_attempts=JOB_MAX_ATTEMPTS):
+        """
+        Args:
+            path (str): Path of the SQLite database, created if it does not exist.
+            max_attempts (int): Number of times a job is claimed before it is marked
+                as failed.
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+
+    def enqueue(self, specs):
+        """
+        Add jobs, skipping those whose execution ID is already queued, in a single
+        transaction.
+
+        Args:
+            specs (list): Job specs, as `create_spec` returns them.
+
+        Returns:
+            int: Number of jobs added.
+        """
+        now = time.time()
+        with self._connect() as connection:
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO jobs (exec_id, spec, status, enqueued_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(spec["exec_id"], json.dumps(spec), PENDING, now) for spec in specs],
+            )
+            return connection.total_changes - before
+
+    def claim(self, worker, lease_seconds=JOB_LEASE_SECONDS):
+        """
+        Claim the oldest pending job, or a running job whose lease expired.
+
+        Args:
+            worker (str): Name of the worker, recorded with the job.
+            lease_seconds (float): Seconds the job is held for unless renewed.
+
+        Returns:
+            dict: job_id, exec_id, spec, attempts and lease_token of the claimed
+                job, None if no job can be claimed.
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, "
+                "lease_token = NULL WHERE status = ? AND lease_expires_at < ? "
+                "AND attempts >= ?",
+                (FAILED, "lease expired", now, RUNNING, now, self.max_attempts),
+            )
+            connection.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, worker = ?, "
+                "lease_token = ?, lease_expires_at = ? WHERE job_id = ("
+                "SELECT job_id FROM jobs WHERE status = ? "
+                "OR (status = ? AND lease_expires_at < ?) ORDER BY job_id LIMIT 1)",
+                (RUNNING, worker, token, now + lease_seconds, PENDING, RUNNING, now),
+            )
+            row = connection.execute(
+                "SELECT job_id, exec_id, spec, attempts FROM jobs "
+                "WHERE lease_token = ?",
+                (token,),
+            ).fetchone()
+
+        if row is None:
+            return None
+        job_id, exec_id, spec, attempts = row
+        return {
+            "job_id": job_id,
+            "exec_id": exec_id,
+            "spec": json.loads(spec),
+            "attempts": attempts,
+            "lease_token": token,
+        }
+
+    def renew(self, job, lease_seconds=JOB_LEASE_SECONDS):
+        """
+        Extend the lease of a claimed job.
+
+        Args:
+            job (dict): Job, as `claim` returns it.
+            lease_seconds (float): Seconds the job is held for from now.
+
+        Returns:
+            bool: False if the lease was lost to another worker.
+        """
+        return self._update_leased(
+            job, "lease_expires_at = ?", time.time() + lease_seconds
+        )
+
+    def complete(self, job):
+        """
+        Report a claimed job as done.
+
+        Args:
+            job (dict): Job, as `claim` returns it.
+
+        Returns:
+            bool: False if the lease was lost to another worker.
+        """
+        return self._update_leased(
+            job,
+            "status = ?, finished_at = ?, lease_token = NULL",
+            DONE,
+            time.time(),
+        )
+
+    def fail(self, job, error):
+        """
+        Report a claimed job as failed. It is queued again until it has been
+        claimed `max_attempts` times.
+
+        Args:
+            job (dict): Job, as `claim` returns it.
+            error (str): Description of the error.
+
+        Returns:
+            bool: False if the lease was lost to another worker.
+        """
+        status = PENDING if job["attempts"] < self.max_attempts else FAILED
+        return self._update_leased(
+            job,
+            "status = ?, error = ?, finished_at = ?, lease_token = NULL",
+            status,
+            error,
+            time.time() if status == FAILED else None,
+        )
+
+    def get_counts(self):
+        """
+        Count the jobs by status.
+
+        Returns:
+            dict: Number of jobs of each status.
+        """
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+
+        counts = dict.fromkeys((PENDING, RUNNING, DONE, FAILED), 0)
+        counts.update(rows)
+        return counts
+
+    def get_failed(self):
+        """
+        Get the jobs that failed for good.
+
+        Returns:
+            list: exec_id, worker, attempts and error of each failed job.
+        """
+        with self._connect() as connection:
+            connection.row_factory = sqlite3.Row
+            return [
+                dict(row)
+                for row in connection.execute(
+                    "SELECT exec_id, worker, attempts, error FROM jobs "
+                    "WHERE status = ? ORDER BY job_id",
+                    (FAILED,),
+                )
+            ]
+
+    def _update_leased(self, job, assignments, *values):
+        with self._connect() as connection:
+            cursor = connection.execute(
+                f"UPDATE jobs SET {assignments} "
+                "WHERE job_id = ? AND lease_token = ?",
+                (*values, job["job_id"], job["lease_token"]),
+            )
+            return cursor.rowcount == 1
+
+    @contextmanager
+    def _connect(self):
+        # wait for the writes of other processes instead of failing
+        connection = sqlite3.connect(self.path, timeout=60)
+        try:
+            connection.executescript(_SCHEMA)
+            # commit or roll back the transaction, then close the connection
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+
+def create_spec(seed, exec_id, config):
+    """
+    Describe a run as a job.
+
+    Args:
+        seed (np.random.SeedSequence): Seed of the run.
+        exec_id (str): Execution ID of the run.
+        config (GenerationConfig): Settings of the run.
+
+    Returns:
+        dict: JSON serializable spec of the job.
+    """
+    return {
+        "exec_id": exec_id,
+        # the entropy can exceed 64 bits, so it is stored as text
+        "seed": {"entropy": str(seed.entropy), "spawn_key": list(seed.spawn_key)},
+        "config": config.to_dict(),
+    }
+
+
+def enqueue_batch(
+    queue,
+    total_datasets=TOTAL_DATASETS_TO_GENERATE,
+    master_seed=MASTER_SEED,
+    streaming=STREAMING_MODE,
+    dataset_format=DATASET_FORMAT,
+    num_of_polynomials=NUM_OF_POLYNOMIALS,
+):
+    """
+    Queue the runs of a batch, as `run_batch` would generate them.
+
+    Args:
+        queue (JobQueue): Queue of the jobs.
+        total_datasets (int): Number of datasets to generate.
+        master_seed (int, optional): Seed the dataset seeds are spawned from. Fresh
+            entropy is used if not given.
+        streaming (bool): Generate each dataset chunk by chunk.
+        dataset_format (str): Output format of the datasets.
+        num_of_polynomials (int): Number of polynomials evaluated over the same
+            independent variables in each run.
+
+    Returns:
+        list: Execution IDs of the runs of the batch, in batch order.
+    """
+    runs = spawn_runs(
+        total_datasets, master_seed, streaming, dataset_format, num_of_polynomials
+    )
+    config = GenerationConfig(
+        streaming=streaming,
+        dataset_format=dataset_format,
+        num_of_polynomials=num_of_polynomials,
+    )
+    num_of_new_jobs = queue.enqueue(
+        [create_spec(seed, exec_id, config) for seed, exec_id in runs]
+    )
+    logger.info(f"queued {num_of_new_jobs} of {len(runs)} runs")
+
+    return [exec_id for _, exec_id in runs]
+
+
+def run_worker(
+    queue,
+    worker=None,
+    lease_seconds=JOB_LEASE_SECONDS,
+    poll_seconds=JOB_POLL_SECONDS,
+    max_jobs=None,
+):
+    """
+    Generate queued runs until no job is pending or running.
+
+    Args:
+        queue (JobQueue): Queue of the jobs.
+        worker (str, optional): Name of the worker, host and process ID by default.
+        lease_seconds (float): Seconds a job is held for unless renewed.
+        poll_seconds (float): Seconds to wait for the jobs of other workers to
+            finish or expire.
+        max_jobs (int, optional): Stop after this many jobs.
+
+    Returns:
+        int: Number of jobs the worker completed.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    num_of_jobs = 0
+    while max_jobs is None or num_of_jobs < max_jobs:
+        job = queue.claim(worker, lease_seconds)
+        if job is None:
+            if queue.get_counts()[RUNNING] == 0:
+                break
+            # jobs of other workers may still fail or expire and be queued again
+            time.sleep(poll_seconds)
+            continue
+
+        logger.info(f"{worker} running {job['exec_id']} (attempt {job['attempts']})")
+        try:
+            _run_job(queue, job, lease_seconds)
+        except RunCancelled:
+            # the job is held by another worker, which reports it
+            logger.warning(f"{worker} stopped {job['exec_id']}: its lease was lost")
+        except Exception:
+            logger.exception(f"{worker} failed {job['exec_id']}")
+            queue.fail(job, traceback.format_exc())
+        else:
+            queue.complete(job)
+            num_of_jobs += 1
+
+    return num_of_jobs
+
+
+def _run_job(queue, job, lease_seconds):
+    """
+    Generate the run of a job with the config it was queued with, renewing its
+    lease until it is done.
+
+    The run key is computed again on the worker, so a worker whose config files
+    differ from the queuing machine in a setting the job does not carry, such as
+    an output option, fails the job instead of writing other data under its
+    execution ID.
+
+    The run is cancelled as soon as the lease is lost, or may have expired because
+    it could not be renewed in time, so it stops at its next chunk and publishes
+    none of its outputs.
+
+    Args:
+        queue (JobQueue): Queue of the jobs.
+        job (dict): Claimed job.
+        lease_seconds (float): Seconds the job is held for at each renewal.
+
+    Raises:
+        ValueError: If the run key of the job differs on the worker.
+        RunCancelled: If the lease was lost before the run finished.
+    """
+    spec = job["spec"]
+    config = GenerationConfig(**spec["config"])
+    seed = np.random.SeedSequence(
+        int(spec["seed"]["entropy"]), spawn_key=tuple(spec["seed"]["spawn_key"])
+    )
+
+    with config.apply():
+        exec_id = RunManifest.get_run_key(
+            seed,
+            dataset_format=config.dataset_format,
+            streaming=config.streaming,
+            num_of_polynomials=config.num_of_polynomials,
+        )
+        if exec_id != spec["exec_id"]:
+            raise ValueError(
+                f"Run key {exec_id} of job {spec['exec_id']} differs on this worker: "
+                "its config files differ from those the job was queued with"
+            )
+        if RunManifest.is_complete(exec_id):
+            return
+
+        routine = get_routine(
+            config.streaming, config.dataset_format, config.num_of_polynomials
+        )
+        _run_leased(queue, job, lease_seconds, partial(routine, seed, exec_id))
+
+
+def _run_leased(queue, job, lease_seconds, routine):
+    exec_id = job["exec_id"]
+    stopped = threading.Event()
+    lease_lost = threading.Event()
+
+    def renew_lease():
+        # the lease was taken at the claim, shortly before
+        expires_at = time.time() + lease_seconds
+        while not stopped.wait(lease_seconds / 3):
+            renewed_at = time.time()
+            try:
+                renewed = queue.renew(job, lease_seconds)
+            except sqlite3.Error:
+                logger.exception(f"could not renew the lease of {exec_id}")
+                renewed = None
+            if renewed:
+                expires_at = renewed_at + lease_seconds
+            elif renewed is False or time.time() >= expires_at:
+                logger.warning(f"lease of {exec_id} lost to another worker")
+                lease_lost.set()
+                return
+
+    renewer = threading.Thread(target=renew_lease, daemon=True)
+    renewer.start()
+    try:
+        with cancellable(lease_lost):
+            routine()
+    finally:
+        stopped.set()
+        renewer.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate batches over a job queue.")
+    parser.add_argument("--queue", default=PATH_TO_JOB_QUEUE)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="queue the runs of a batch")
+    enqueue.add_argument("--total", type=int, default=TOTAL_DATASETS_TO_GENERATE)
+    enqueue.add_argument("--master-seed", type=int, default=MASTER_SEED)
+    enqueue.add_argument("--format", default=DATASET_FORMAT)
+    enqueue.add_argument("--polynomials", type=int, default=NUM_OF_POLYNOMIALS)
+    enqueue.add_argument("--streaming", action="store_true", default=STREAMING_MODE)
+
+    work = commands.add_parser("work", help="generate queued runs")
+    work.add_argument("--worker", help="name of the worker")
+    work.add_argument("--max-jobs", type=int)
+
+    commands.add_parser("status", help="count the jobs by status")
+
+    args = parser.parse_args(argv)
+    os.makedirs(os.path.dirname(args.queue) or ".", exist_ok=True)
+    queue = JobQueue(args.queue)
+
+    if args.command == "enqueue":
+        enqueue_batch(
+            queue,
+            args.total,
+            args.master_seed,
+            args.streaming,
+            args.format,
+            args.polynomials,
+        )
+    elif args.command == "work":
+        num_of_jobs = run_worker(queue, args.worker, max_jobs=args.max_jobs)
+        print(f"completed {num_of_jobs} jobs")
+    else:
+        print(json.dumps(queue.get_counts()))
+        for job in queue.get_failed():
+            print(json.dumps(job))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
 import os
+import tempfile
+from contextlib import ExitStack
 from datetime import datetime
 
-import pandas as pd
+import numpy as np
 
 from config.base import (
     BASE_NAME,
+    DATASET_FORMAT,
+    MAX_QUEUED_CHUNKS,
+    NUM_OF_WRITER_THREADS,
+    PATH_TO_CATALOG,
     PATH_TO_METADATA_FILES,
     PATH_TO_STORE_GENERATED_DATASETS,
+    WRITE_CHUNK_SIZE,
 )
 from config.cat_vars_config import (
     BINARY,
@@ -16,29 +23,55 @@ from config.cat_vars_config import (
 )
 from config.datasets_config import GENERATE_LINEAR_TARGET, GENERATE_NON_LINEAR_TARGET
 from config.logging import set_logger
+from config.poly_params_config import (
+    FEATURE_DTYPE,
+    NUM_OF_POLYNOMIALS,
+    NUMBER_OF_INSTANCES,
+    STORE_POLYNOMIAL_EXPRESSION,
+)
 from config.poly_params_config import params as pol_params
+from config.profiling_config import PATH_TO_PROFILE_FILE
+from config.statistics_config import COLLECT_STATISTICS
+from config.streaming_config import CHUNK_SIZE, MEMMAP_FEATURES, QUANTILE_SKETCH_SIZE
+from src.background_writer import BackgroundWriterPool
 from src.categorical_manager import CategoricalManager
+from src.column_statistics import StatisticsCollector
 from src.data_manager import DataManager
+from src.dataset_catalog import DatasetCatalog
+from src.dataset_writers import create_dataset_writer
 from src.generate_polynomial_svc import GeneratePolynomialSvc
+from src.polynomial import evaluate_polynomials
+from src.quantile_sketch import QuantileSketch
+from src.run_manifest import RunManifest
+from src.stage_profiler import StageProfiler, get_output_bytes
 from src.services.dataset_configuration_service import (  # Import the function
     CatAttributeType,
     TargetType,
     get_datasets_properties,
     map_cat_attributes,
 )
+from src.streaming_manager import StreamingManager
+from src.virtual_dataset_manager import VIRTUAL_DATASET_FORMAT, VirtualDatasetManager
 
 logger = set_logger()
 
 
-def start():
+def start(seed=None, exec_id=None, dataset_format=DATASET_FORMAT):
     """
     Generates synthetic datasets based on specified parameters, including polynomial expressions and categorical attributes.
 
+    Args:
+        seed (int | np.random.SeedSequence, optional): Seed of every random draw of the
+            run. Fresh entropy is used if not given.
+        exec_id (str, optional): Identifier of the set of generated datasets. The
+            current date and time is used if not given.
+        dataset_format (str): Output format of the datasets.
+
     Steps:
         1. Load main configuration file.
         2. Generate an execution ID based on the current date and time.
-        3. Define polynomial parameters and create a polynomial expression string.
-        4. Generate random values for independent variables and evaluate the polynomial expression.
+        3. Define polynomial parameters and create a structured polynomial.
+        4. Generate random values for independent variables and evaluate the polynomial.
         5. Create a dataset with numerical and categorical variables.
         6. Optionally generate linear and non-linear target variables.
         7. Iterate through dataset properties and generate datasets according to specified properties:
@@ -50,93 +83,1027 @@ def start():
 
     path_to_gen_datasets = PATH_TO_STORE_GENERATED_DATASETS
 
+    exec_id, seed, seed_description = _init_run(seed, exec_id)
+    profiler = StageProfiler()
+
+    with profiler.stage("create_polynomial"):
+        polynomial = _create_polynomial(_get_child_seed(seed, 0))
+    vars = polynomial.variables
+    string_expression = None
+    if STORE_POLYNOMIAL_EXPRESSION:
+        with profiler.stage("build_expression"):
+            string_expression = polynomial.to_string_expression()
+
+    # generate random numbers in a determined range for independnt vars V1, V2, ... Vn.
+    with profiler.stage("generate_vars") as record:
+        independent_vars = DataManager.generate_independent_var_data(
+            len(vars),
+            _get_child_seed(seed, 1),
+            dtype=FEATURE_DTYPE,
+            out=_allocate_features(NUMBER_OF_INSTANCES, len(vars)),
+        )
+        _set_output_bytes(record, independent_vars)
+
+    # evaluate polynomial
+    with profiler.stage("evaluate") as record:
+        num_target = polynomial.evaluate(independent_vars)
+        _set_output_bytes(record, num_target)
+
+    datasets_properties = get_datasets_properties()
+
+    # Every dataset shares the independent variables, and only differs by its
+    # target and its categorical variables. Those are built once and composed with
+    # the shared variables block by block when each dataset is written.
+
+    ################ create targets
+    targets = {}
+    thresholds = {}
+    if GENERATE_LINEAR_TARGET:
+        with profiler.stage("linear_target") as record:
+            (
+                targets[TargetType.LINEAR.value],
+                thresholds[TargetType.LINEAR.value],
+            ) = DataManager.compute_binary_linear_target(num_target)
+            _set_output_bytes(record, targets[TargetType.LINEAR.value])
+        logger.info(f"linear target thresholds: {thresholds[TargetType.LINEAR.value]}")
+
+    if GENERATE_NON_LINEAR_TARGET:
+        with profiler.stage("non_linear_target") as record:
+            (
+                targets[TargetType.NON_LINEAR.value],
+                thresholds[TargetType.NON_LINEAR.value],
+            ) = DataManager.compute_binary_non_linear_target(num_target)
+            _set_output_bytes(record, targets[TargetType.NON_LINEAR.value])
+        logger.info(
+            f"non linear target thresholds: {thresholds[TargetType.NON_LINEAR.value]}"
+        )
+
+    ################ create categorical variables
+    cat_vars = CategoricalManager.select_cat_vars(vars)
+    bin_edges = {}
+    cat_codes = {}
+    labels = {}
+    for cardinality in _get_cardinalities(datasets_properties):
+        with profiler.stage(f"create_cat_codes_{cardinality}") as record:
+            (
+                bin_edges[cardinality],
+                cat_codes[cardinality],
+                labels[cardinality],
+            ) = _create_cat_codes(independent_vars[:, : len(cat_vars)], cardinality)
+            _set_output_bytes(record, cat_codes[cardinality])
+
+    statistics = _create_statistics_collector(vars, seed)
+    with profiler.stage("statistics"):
+        _collect_statistics(statistics, independent_vars, cat_codes, labels, targets)
+
+    # store datasets: chunks of every dataset are composed in turn and written on
+    # background threads
+    if dataset_format == VIRTUAL_DATASET_FORMAT:
+        # virtual datasets are only described by their metadata
+        writers = [None] * len(datasets_properties)
+    else:
+        with profiler.stage("write_datasets") as record, ExitStack() as writers_stack:
+            writers = [
+                writers_stack.enter_context(
+                    create_dataset_writer(
+                        dataset_format,
+                        os.path.join(
+                            path_to_gen_datasets,
+                            _build_dataset_name(exec_id, properties),
+                        ),
+                        len(num_target),
+                    )
+                )
+                for properties in datasets_properties
+            ]
+            with BackgroundWriterPool(
+                NUM_OF_WRITER_THREADS, MAX_QUEUED_CHUNKS
+            ) as writer_pool:
+                for start, stop in StreamingManager.iter_chunks(
+                    len(num_target), WRITE_CHUNK_SIZE
+                ):
+                    for properties, writer in zip(datasets_properties, writers):
+                        writer_pool.write(
+                            writer,
+                            _compose_dataset(
+                                properties,
+                                independent_vars,
+                                vars,
+                                targets,
+                                cat_vars,
+                                cat_codes,
+                                labels,
+                                start,
+                                stop,
+                            ),
+                        )
+                for writer in writers:
+                    writer_pool.close_writer(writer)
+            _set_output_bytes(record, *writers)
+
+    # store metadata
+    _store_datasets_metadata(
+        exec_id,
+        datasets_properties,
+        writers,
+        polynomial,
+        string_expression,
+        len(num_target),
+        thresholds,
+        cat_vars,
+        bin_edges,
+        labels,
+        seed_description,
+        profiler,
+        statistics,
+    )
+
+
+def start_streaming(
+    seed=None,
+    exec_id=None,
+    num_of_instances=NUMBER_OF_INSTANCES,
+    chunk_size=CHUNK_SIZE,
+    dataset_format=DATASET_FORMAT,
+):
+    """
+    Generates the same datasets as `start`, chunk by chunk, so datasets larger than
+    memory can be generated.
+
+    Rows are generated, evaluated and written in chunks of `chunk_size` rows. The
+    numerical target is kept in a temporary memory-mapped file next to the
+    datasets, and the decisions that depend on every row are taken between a first
+    pass, which evaluates the polynomial, and a second pass, which builds each
+    chunk of every dataset and appends it with the dataset writer of
+    `dataset_format`. Virtual datasets skip the second pass and are only described
+    by their metadata. Peak memory depends on the chunk size and the quantile
+    sketch size, not on the number of rows.
+
+    Balance guarantees:
+        - Targets are exact: the thresholds are found with an exact bounded-memory
+          selection, so linear and non-linear targets are exactly balanced and equal
+          to the ones `start` builds for the same seed.
+        - Categorical groups are approximate: bin edges are estimated from a uniform
+          sample of QUANTILE_SKETCH_SIZE rows, so group sizes deviate from
+          num_of_instances / cardinality by a relative error of roughly
+          sqrt(cardinality / QUANTILE_SKETCH_SIZE). They are exact, and equal to the
+          ones of `start`, when num_of_instances <= QUANTILE_SKETCH_SIZE.
+
+    Args:
+        seed (int | np.random.SeedSequence, optional): Seed of every random draw of the
+            run. Fresh entropy is used if not given.
+        exec_id (str, optional): Identifier of the set of generated datasets. The
+            current date and time is used if not given.
+        num_of_instances (int): Number of rows of the datasets.
+        chunk_size (int): Number of rows generated and written at once.
+        dataset_format (str): Output format of the datasets, one of the formats of
+            DATASET_WRITERS or VIRTUAL_DATASET_FORMAT.
+    """
+    path_to_gen_datasets = PATH_TO_STORE_GENERATED_DATASETS
+
+    exec_id, seed, seed_description = _init_run(seed, exec_id)
+    profiler = StageProfiler()
+
+    with profiler.stage("create_polynomial"):
+        polynomial = _create_polynomial(_get_child_seed(seed, 0))
+    vars = polynomial.variables
+    string_expression = None
+    if STORE_POLYNOMIAL_EXPRESSION:
+        with profiler.stage("build_expression"):
+            string_expression = polynomial.to_string_expression()
+    data_seed = _get_child_seed(seed, 1)
+
+    datasets_properties = get_datasets_properties()
+    cardinalities = _get_cardinalities(datasets_properties)
+    cat_vars = CategoricalManager.select_cat_vars(vars)
+    sketch = QuantileSketch(QUANTILE_SKETCH_SIZE, _get_child_seed(seed, 2))
+    statistics = _create_statistics_collector(vars, seed)
+
+    with tempfile.TemporaryDirectory(
+        dir=path_to_gen_datasets
+    ) as tmp_dir, ExitStack() as writers_stack:
+        num_target = np.lib.format.open_memmap(
+            os.path.join(tmp_dir, "num_target.npy"),
+            mode="w+",
+            dtype=np.float64,
+            shape=(num_of_instances,),
+        )
+
+        # first pass: numerical target and distribution of the categorical vars
+        with profiler.stage("first_pass") as record:
+            for start, stop in StreamingManager.iter_chunks(
+                num_of_instances, chunk_size
+            ):
+                independent_vars = DataManager.generate_independent_var_data(
+                    len(vars), data_seed, start, stop, FEATURE_DTYPE
+                )
+                num_target[start:stop] = polynomial.evaluate(independent_vars)
+                if cardinalities:
+                    sketch.update(independent_vars[:, : len(cat_vars)])
+                _collect_statistics(statistics, independent_vars)
+            _set_output_bytes(record, num_target)
+
+        thresholds = {}
+        if GENERATE_LINEAR_TARGET:
+            with profiler.stage("linear_target"):
+                thresholds[
+                    TargetType.LINEAR.value
+                ] = StreamingManager.compute_linear_thresholds(num_target, chunk_size)
+            logger.info(
+                f"linear target thresholds: {thresholds[TargetType.LINEAR.value]}"
+            )
+        if GENERATE_NON_LINEAR_TARGET:
+            with profiler.stage("non_linear_target"):
+                thresholds[
+                    TargetType.NON_LINEAR.value
+                ] = StreamingManager.compute_non_linear_thresholds(
+                    num_target, chunk_size
+                )
+            logger.info(
+                f"non linear target thresholds: {thresholds[TargetType.NON_LINEAR.value]}"
+            )
+
+        with profiler.stage("bin_edges"):
+            bin_edges = {
+                cardinality: sketch.values_at_ranks(
+                    CategoricalManager.get_bin_edge_ranks(num_of_instances, cardinality)
+                )
+                for cardinality in cardinalities
+            }
+        labels = {
+            cardinality: CategoricalManager.get_cat_labels(edges.shape[1] + 1)
+            for cardinality, edges in bin_edges.items()
+        }
+
+        # second pass: build every dataset chunk by chunk
+        if dataset_format == VIRTUAL_DATASET_FORMAT:
+            writers = [None] * len(datasets_properties)
+        else:
+            with profiler.stage("second_pass") as record, BackgroundWriterPool(
+                NUM_OF_WRITER_THREADS, MAX_QUEUED_CHUNKS
+            ) as writer_pool:
+                writers = [
+                    writers_stack.enter_context(
+                        create_dataset_writer(
+                            dataset_format,
+                            os.path.join(
+                                path_to_gen_datasets,
+                                _build_dataset_name(exec_id, properties),
+                            ),
+                            num_of_instances,
+                        )
+                    )
+                    for properties in datasets_properties
+                ]
+                for start, stop in StreamingManager.iter_chunks(
+                    num_of_instances, chunk_size
+                ):
+                    independent_vars = DataManager.generate_independent_var_data(
+                        len(vars), data_seed, start, stop, FEATURE_DTYPE
+                    )
+                    targets = {
+                        TargetType.LINEAR.value: DataManager.apply_binary_linear_target,
+                        TargetType.NON_LINEAR.value: DataManager.apply_binary_non_linear_target,
+                    }
+                    targets = {
+                        target_type: targets[target_type](
+                            num_target[start:stop], target_thresholds, start
+                        )
+                        for target_type, target_thresholds in thresholds.items()
+                    }
+                    cat_codes = {
+                        cardinality: CategoricalManager.apply_bin_edges(
+                            independent_vars[:, : len(cat_vars)], edges
+                        )
+                        for cardinality, edges in bin_edges.items()
+                    }
+                    _collect_statistics(statistics, None, cat_codes, labels, targets)
+
+                    for properties, writer in zip(datasets_properties, writers):
+                        writer_pool.write(
+                            writer,
+                            _compose_dataset(
+                                properties,
+                                independent_vars,
+                                vars,
+                                targets,
+                                cat_vars,
+                                cat_codes,
+                                labels,
+                            ),
+                        )
+                # close the writers so the size of the stored datasets is known
+                for writer in writers:
+                    writer_pool.close_writer(writer)
+                writer_pool.close()
+                _set_output_bytes(record, *writers)
+
+        del num_target
+
+    _store_datasets_metadata(
+        exec_id,
+        datasets_properties,
+        writers,
+        polynomial,
+        string_expression,
+        num_of_instances,
+        thresholds,
+        cat_vars,
+        bin_edges,
+        labels,
+        seed_description,
+        profiler,
+        statistics,
+    )
+
+
+def start_multi_polynomial(
+    num_of_polynomials=NUM_OF_POLYNOMIALS,
+    seed=None,
+    exec_id=None,
+    dataset_format=DATASET_FORMAT,
+):
+    """
+    Generates datasets for several polynomials over the same independent variables.
+
+    Every polynomial has its own terms, degrees and coefficients, and they are all
+    evaluated in a single pass over the shared independent variables. Instead of
+    one file per dataset, each feature variant (numeric only, or with categorical
+    variables of a cardinality) is stored once, and the binary targets of every
+    polynomial are stored together in one targets file. One metadata file is
+    created per polynomial, target type and feature variant, pointing to its
+    features file and to its column of the targets file.
+
+    Args:
+        num_of_polynomials (int): Number of polynomials.
+        seed (int | np.random.SeedSequence, optional): Seed of every random draw of the
+            run. Fresh entropy is used if not given.
+        exec_id (str, optional): Identifier of the set of generated datasets. The
+            current date and time is used if not given.
+        dataset_format (str): Output format of the datasets.
+    """
+    path_to_gen_datasets = PATH_TO_STORE_GENERATED_DATASETS
+
+    exec_id, seed, seed_description = _init_run(seed, exec_id)
+    profiler = StageProfiler()
+
+    # polynomial k is drawn from the k-th child of the polynomial stream, and every
+    # polynomial after the first one uses the variables of the first one
+    with profiler.stage("create_polynomials"):
+        polynomial_seed = _get_child_seed(seed, 0)
+        polynomials = [_create_polynomial(_get_child_seed(polynomial_seed, 0))]
+        for index in range(1, num_of_polynomials):
+            polynomials.append(
+                _create_polynomial(
+                    _get_child_seed(polynomial_seed, index), polynomials[0].num_of_vars
+                )
+            )
+    vars = polynomials[0].variables
+    string_expressions = [None] * len(polynomials)
+    if STORE_POLYNOMIAL_EXPRESSION:
+        with profiler.stage("build_expression"):
+            string_expressions = [
+                polynomial.to_string_expression() for polynomial in polynomials
+            ]
+
+    with profiler.stage("generate_vars") as record:
+        independent_vars = DataManager.generate_independent_var_data(
+            len(vars),
+            _get_child_seed(seed, 1),
+            dtype=FEATURE_DTYPE,
+            out=_allocate_features(NUMBER_OF_INSTANCES, len(vars)),
+        )
+        _set_output_bytes(record, independent_vars)
+
+    # evaluate every polynomial at once
+    with profiler.stage("evaluate") as record:
+        num_targets = evaluate_polynomials(polynomials, independent_vars)
+        _set_output_bytes(record, num_targets)
+
+    datasets_properties = get_datasets_properties()
+
+    ################ create targets
+    targets = {}
+    thresholds = {}
+    for index, num_target in enumerate(num_targets):
+        if GENERATE_LINEAR_TARGET:
+            column = _build_target_name(index, TargetType.LINEAR.value)
+            with profiler.stage(column) as record:
+                (
+                    targets[column],
+                    thresholds[column],
+                ) = DataManager.compute_binary_linear_target(num_target)
+                _set_output_bytes(record, targets[column])
+            logger.info(f"{column} thresholds: {thresholds[column]}")
+
+        if GENERATE_NON_LINEAR_TARGET:
+            column = _build_target_name(index, TargetType.NON_LINEAR.value)
+            with profiler.stage(column) as record:
+                (
+                    targets[column],
+                    thresholds[column],
+                ) = DataManager.compute_binary_non_linear_target(num_target)
+                _set_output_bytes(record, targets[column])
+            logger.info(f"{column} thresholds: {thresholds[column]}")
+
+    ################ create categorical variables
+    cat_vars = CategoricalManager.select_cat_vars(vars)
+    bin_edges = {}
+    cat_codes = {}
+    labels = {}
+    for cardinality in _get_cardinalities(datasets_properties):
+        with profiler.stage(f"create_cat_codes_{cardinality}") as record:
+            (
+                bin_edges[cardinality],
+                cat_codes[cardinality],
+                labels[cardinality],
+            ) = _create_cat_codes(independent_vars[:, : len(cat_vars)], cardinality)
+            _set_output_bytes(record, cat_codes[cardinality])
+
+    num_of_rows = len(independent_vars)
+
+    statistics = _create_statistics_collector(vars, seed)
+    with profiler.stage("statistics"):
+        _collect_statistics(statistics, independent_vars, cat_codes, labels, targets)
+
+    # store the targets, and each feature variant once, written on background
+    # threads
+    features_properties = {}
+    for properties in datasets_properties:
+        features_properties.setdefault(
+            properties["cat_attributes_properties"], properties
+        )
+
+    with profiler.stage("write_datasets") as record, ExitStack() as writers_stack:
+        targets_writer = writers_stack.enter_context(
+            create_dataset_writer(
+                dataset_format,
+                os.path.join(path_to_gen_datasets, f"{BASE_NAME}_{exec_id}_targets"),
+                num_of_rows,
+            )
+        )
+        features_writers = {
+            cat_attributes: writers_stack.enter_context(
+                create_dataset_writer(
+                    dataset_format,
+                    os.path.join(
+                        path_to_gen_datasets,
+                        f"{BASE_NAME}_{exec_id}_features_{cat_attributes.lower()}",
+                    ),
+                    num_of_rows,
+                )
+            )
+            for cat_attributes in features_properties
+        }
+        with BackgroundWriterPool(
+            NUM_OF_WRITER_THREADS, MAX_QUEUED_CHUNKS
+        ) as writer_pool:
+            for start, stop in StreamingManager.iter_chunks(
+                num_of_rows, WRITE_CHUNK_SIZE
+            ):
+                writer_pool.write(
+                    targets_writer,
+                    DataManager.compose_targets(
+                        {
+                            column: target[start:stop]
+                            for column, target in targets.items()
+                        }
+                    ),
+                )
+                for cat_attributes, writer in features_writers.items():
+                    writer_pool.write(
+                        writer,
+                        _compose_dataset(
+                            features_properties[cat_attributes],
+                            independent_vars,
+                            vars,
+                            None,
+                            cat_vars,
+                            cat_codes,
+                            labels,
+                            start,
+                            stop,
+                        ),
+                    )
+            writer_pool.close_writer(targets_writer)
+            for writer in features_writers.values():
+                writer_pool.close_writer(writer)
+        _set_output_bytes(record, targets_writer, *features_writers.values())
+
+    # store metadata
+    profile = profiler.to_dict()
+    metadata_paths = []
+    for index, (polynomial, string_expression) in enumerate(
+        zip(polynomials, string_expressions)
+    ):
+        for properties in datasets_properties:
+            cat_attributes_property = map_cat_attributes(properties)
+            target = _build_target_name(index, properties["target_type"])
+            metadata_path = _store_metadata(
+                _build_dataset_name(exec_id, properties, index),
+                vars,
+                cat_vars if cat_attributes_property != NO_CAT_INSTANCES else [],
+                string_expression,
+                CategoricalManager.get_cat_encoding(
+                    labels.get(cat_attributes_property)
+                ),
+                seed_description,
+                features_writers[properties["cat_attributes_properties"]],
+                target,
+                targets_writer,
+                profile,
+                VirtualDatasetManager.create_generation_params(
+                    num_of_rows,
+                    polynomial,
+                    properties["target_type"],
+                    thresholds[target],
+                    cat_attributes_property,
+                    bin_edges.get(cat_attributes_property),
+                    FEATURE_DTYPE,
+                ),
+                _get_dataset_statistics(
+                    statistics, properties, cat_vars, target, target
+                ),
+            )
+            metadata_paths.append(metadata_path)
+
+    RunManifest.write(
+        exec_id,
+        [targets_writer.path]
+        + [writer.path for writer in features_writers.values()]
+        + metadata_paths,
+    )
+    profiler.close(exec_id, PATH_TO_PROFILE_FILE)
+
+
+def _init_run(seed, exec_id):
+    """
+    Set up the identifier and the seed of a run.
+
+    Args:
+        seed (int | np.random.SeedSequence, optional): Seed of the run.
+        exec_id (str, optional): Identifier of the set of generated datasets.
+
+    Returns:
+        tuple: A tuple containing the execution ID, the seed sequence and its
+            description to store in the metadata.
+    """
     # use date as identifier of the set of generated datasets
-    exec_id = datetime.today().strftime("%Y%m%d%H%M%S")
+    if exec_id is None:
+        exec_id = datetime.today().strftime("%Y%m%d%H%M%S")
+
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    seed_description = {"entropy": seed.entropy, "spawn_key": list(seed.spawn_key)}
+
     logger.info("Generating synthetic dataset")
     logger.info(pol_params)
+    logger.info(f"seed: {seed_description}")
+
+    return exec_id, seed, seed_description
+
+
+def _get_child_seed(seed, index):
+    """
+    Derive the seed of one of the random streams of a run.
+
+    Unlike `SeedSequence.spawn`, the same child is returned on every call.
+
+    Args:
+        seed (np.random.SeedSequence): Seed of the run.
+        index (int): Stream: 0 for the polynomial, 1 for the independent variables,
+            2 for the quantile sketch, 3 for the sketch of the column statistics.
+
+    Returns:
+        np.random.SeedSequence: Seed of the stream.
+    """
+    return np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (index,))
+
+
+def _create_polynomial(seed, num_of_vars=None):
+    """
+    Define polynomial parameters and create a structured polynomial.
+
+    Args:
+        seed (np.random.SeedSequence): Seed of the polynomial.
+        num_of_vars (int, optional): Number of variables of the polynomial. It is
+            drawn from the configured range if not given.
+
+    Returns:
+        Polynomial: The polynomial.
+    """
+    rng = np.random.default_rng(seed)
 
     num_of_vars, num_of_terms, coeficients = GeneratePolynomialSvc.define_params(
-        pol_params["min_num_of_vars"],
-        pol_params["max_num_of_vars"],
+        num_of_vars or pol_params["min_num_of_vars"],
+        num_of_vars or pol_params["max_num_of_vars"],
         pol_params["max_num_of_terms"],
         pol_params["min_coef_value"],
         pol_params["max_coef_value"],
+        rng,
     )
 
-    string_expression, vars = GeneratePolynomialSvc.create_string_expression(
+    polynomial = GeneratePolynomialSvc.create_polynomial(
         num_of_vars,
         pol_params["min_degree"],
         pol_params["max_degree"],
         num_of_terms,
         coeficients,
+        rng,
+        pol_params["max_num_of_vars_in_terms"],
     )
 
-    logger.info(f"string_expression: {string_expression}")
+    # degree is the largest exponent, as in the polynomial parameters and the
+    # dataset catalog
+    logger.info(
+        f"polynomial of {polynomial.num_of_terms} terms, degree "
+        f"{int(polynomial.term_exponents.max(initial=0))} and total degree "
+        f"{int(polynomial.term_degrees.max(initial=0))}"
+    )
 
-    dict_to_convert_to_dataframe = {}
+    return polynomial
 
-    # generate random numbers in a determined range for independnt vars V1, V2, ... Vn.
-    # store those vars as global.
-    for num in range(num_of_vars):
-        globals()["v" + str(num + 1)] = DataManager.generate_independent_var_data()
-        dict_to_convert_to_dataframe["v" + str(num + 1)] = globals()[
-            "v" + str(num + 1)
-        ].flatten()
 
-    # evaluate string polynomial
-    final_result = eval(string_expression)
+def _allocate_features(num_of_rows, num_of_vars):
+    """
+    Allocate the feature matrix of a run in a memory-mapped temporary file, when
+    MEMMAP_FEATURES is set.
 
-    ## add numerical dependent variable
-    dict_to_convert_to_dataframe["num_target"] = final_result.flatten()
+    The file is removed as soon as it is created and closed once it is mapped, so
+    its space is released when the matrix is garbage collected.
 
-    ################ create targets
-    df = pd.DataFrame(dict_to_convert_to_dataframe)
+    Args:
+        num_of_rows (int): Number of rows of the matrix.
+        num_of_vars (int): Number of variables of the matrix.
 
-    datasets_properties = get_datasets_properties()
+    Returns:
+        np.memmap: Matrix to generate the features into, None to allocate it in
+            memory.
+    """
+    if not MEMMAP_FEATURES:
+        return None
+    with tempfile.TemporaryFile(dir=PATH_TO_STORE_GENERATED_DATASETS) as features_file:
+        return np.memmap(
+            features_file,
+            dtype=FEATURE_DTYPE,
+            mode="w+",
+            shape=(num_of_rows, num_of_vars),
+        )
 
-    if GENERATE_LINEAR_TARGET:
-        df_linear_target = DataManager.generate_binary_linear_target(df)
-        del df_linear_target["num_target"]
 
-    if GENERATE_NON_LINEAR_TARGET:
-        df_non_linear_target = DataManager.generate_binary_non_linear_target(df)
-        del df_non_linear_target["num_target"]
+def _build_dataset_name(exec_id, properties, polynomial_index=None):
+    """
+    Build the name of a dataset.
 
-    for properties in datasets_properties:
-        base_dataset = (
-            df_linear_target
-            if properties["target_type"] == TargetType.LINEAR
-            else df_non_linear_target
-        )
+    Args:
+        exec_id (str): Identifier of the set of generated datasets.
+        properties (dict): Target type and categorical attribute properties.
+        polynomial_index (int, optional): Polynomial of the dataset, in runs with
+            several polynomials.
 
-        # Map the categorical attribute properties
-        cat_attributes_property = map_cat_attributes(properties)
+    Returns:
+        str: Name of the dataset.
+    """
+    target_type_name = properties["target_type"].lower()
+    cat_attributes_name = properties["cat_attributes_properties"].lower()
+    if polynomial_index is not None:
+        exec_id = f"{exec_id}_p{polynomial_index}"
+    return f"{BASE_NAME}_{exec_id}_{target_type_name}_{cat_attributes_name}"
 
-        # if cat_attributes_property:
-        (
-            dataset_to_store,
-            cat_vars,
-        ) = CategoricalManager.create_cat_vars(
-            base_dataset, vars, cat_attributes_property
-        )
-        num_vars = vars.copy()
-        for cat_var in cat_vars:
-            num_vars.remove(cat_var)
-
-        # build dataset name and path
-        target_type_name = properties["target_type"].lower()
-        cat_attributes_name = properties["cat_attributes_properties"].lower()
-        main_name = f"{BASE_NAME}_{exec_id}_{target_type_name}_{cat_attributes_name}"
-        name_and_path = os.path.join(path_to_gen_datasets, f"{main_name}.csv")
-        # store dataset and metadata
-        DataManager.save_csv(dataset_to_store, name_and_path)
-
-        # Store dataset
-        metadata = DataManager.create_metadata(
-            num_vars, string_expression, cat_vars, main_name
-        )
-        # Store metadata
-        metadata_file_path_and_name = os.path.join(
-            PATH_TO_METADATA_FILES, f'{metadata["dataset_name"]}.json'
+
+def _build_target_name(polynomial_index, target_type):
+    """
+    Build the name of a target column of the targets file of a run with several
+    polynomials.
+
+    Args:
+        polynomial_index (int): Polynomial of the target.
+        target_type (str): Target type.
+
+    Returns:
+        str: Name of the target column.
+    """
+    return f"target_p{polynomial_index}_{target_type.lower()}"
+
+
+def _get_cardinalities(datasets_properties):
+    """
+    Get the cardinalities of the categorical variables of a run.
+
+    Args:
+        datasets_properties (list): Properties of every dataset of the run.
+
+    Returns:
+        list: Distinct non-zero cardinalities, in ascending order.
+    """
+    return sorted(
+        {map_cat_attributes(properties) for properties in datasets_properties}
+        - {NO_CAT_INSTANCES}
+    )
+
+
+def _compose_dataset(
+    properties,
+    independent_vars,
+    vars,
+    targets,
+    cat_vars,
+    cat_codes,
+    labels,
+    start=0,
+    stop=None,
+):
+    """
+    Compose rows of a dataset from the arrays shared by every dataset of a run.
+
+    Args:
+        properties (dict): Target type and categorical attribute properties.
+        independent_vars (np.ndarray): Matrix of the independent variables.
+        vars (list): List of all the variables.
+        targets (dict): Binary target of each target type, or None to compose the
+            rows without target.
+        cat_vars (list): List of the variables converted into categorical ones.
+        cat_codes (dict): Codes of the categorical variables of each cardinality.
+        labels (dict): Label dictionary of each cardinality.
+        start (int): First row to compose.
+        stop (int, optional): Row after the last row to compose.
+
+    Returns:
+        pd.DataFrame: Rows of the dataset.
+    """
+    target = (
+        targets[properties["target_type"]][start:stop] if targets is not None else None
+    )
+    cat_attributes_property = map_cat_attributes(properties)
+    if cat_attributes_property == NO_CAT_INSTANCES:
+        return DataManager.compose_dataset(independent_vars[start:stop], vars, target)
+
+    return DataManager.compose_dataset(
+        independent_vars[start:stop],
+        vars,
+        target,
+        cat_vars,
+        cat_codes[cat_attributes_property][start:stop],
+        labels[cat_attributes_property],
+    )
+
+
+def _create_cat_codes(cat_values, cardinality):
+    """
+    Convert numeric columns into dictionary-encoded categorical columns.
+
+    Args:
+        cat_values (np.ndarray): Matrix of shape (rows, columns) with the values to
+            convert.
+        cardinality (int): Desired cardinality of the categorical variables.
+
+    Returns:
+        tuple: A tuple containing the bin edges of each column, the matrix of codes
+            and the label dictionary shared by all the columns.
+    """
+    bin_edges = CategoricalManager.compute_bin_edges(cat_values, cardinality)
+    codes = CategoricalManager.apply_bin_edges(cat_values, bin_edges)
+
+    return bin_edges, codes, CategoricalManager.get_cat_labels(bin_edges.shape[1] + 1)
+
+
+def _store_datasets_metadata(
+    exec_id,
+    datasets_properties,
+    writers,
+    polynomial,
+    string_expression,
+    num_of_rows,
+    thresholds,
+    cat_vars,
+    bin_edges,
+    labels,
+    seed_description,
+    profiler,
+    statistics=None,
+):
+    """
+    Create and store the metadata files of every dataset of a run, record the
+    completed run in its manifest, and append the profile of the run to the
+    profile file.
+
+    Args:
+        exec_id (str): Identifier of the set of generated datasets.
+        datasets_properties (list): Properties of every dataset of the run.
+        writers (list): Writer each dataset was stored with, None for virtual
+            datasets.
+        polynomial (Polynomial): Polynomial of the run.
+        string_expression (str): Polynomial expression, None if
+            STORE_POLYNOMIAL_EXPRESSION is not set.
+        num_of_rows (int): Number of rows of the datasets.
+        thresholds (dict): Thresholds of the binary target of each target type.
+        cat_vars (list): List of the variables converted into categorical ones.
+        bin_edges (dict): Bin edges of the categorical variables of each cardinality.
+        labels (dict): Label dictionary of each cardinality.
+        seed_description (dict): Entropy and spawn key of the seed of the run.
+        profiler (StageProfiler): Profiler of the stages of the run.
+        statistics (StatisticsCollector, optional): Statistics of the columns of
+            the run.
+    """
+    profile = profiler.to_dict()
+    paths = [writer.path for writer in writers if writer is not None]
+    for properties, writer in zip(datasets_properties, writers):
+        cat_attributes_property = map_cat_attributes(properties)
+        metadata_path = _store_metadata(
+            _build_dataset_name(exec_id, properties),
+            polynomial.variables,
+            cat_vars if cat_attributes_property != NO_CAT_INSTANCES else [],
+            string_expression,
+            CategoricalManager.get_cat_encoding(labels.get(cat_attributes_property)),
+            seed_description,
+            writer,
+            profile=profile,
+            generation=VirtualDatasetManager.create_generation_params(
+                num_of_rows,
+                polynomial,
+                properties["target_type"],
+                thresholds[properties["target_type"]],
+                cat_attributes_property,
+                bin_edges.get(cat_attributes_property),
+                FEATURE_DTYPE,
+            ),
+            statistics=_get_dataset_statistics(
+                statistics, properties, cat_vars, properties["target_type"]
+            ),
         )
-        DataManager.save_dict_to_json(metadata, metadata_file_path_and_name)
+        paths.append(metadata_path)
+
+    RunManifest.write(exec_id, paths)
+    profiler.close(exec_id, PATH_TO_PROFILE_FILE)
+
+
+def _store_metadata(
+    main_name,
+    vars,
+    cat_vars,
+    string_expression,
+    cat_encoding,
+    seed_description,
+    writer,
+    target="target",
+    targets_writer=None,
+    profile=None,
+    generation=None,
+    statistics=None,
+):
+    """
+    Create and store the metadata file of a dataset.
+
+    Args:
+        main_name (str): Name of the dataset.
+        vars (list): List of all the variables.
+        cat_vars (list): List of categorical variables.
+        string_expression (str): Polynomial expression, None if
+            STORE_POLYNOMIAL_EXPRESSION is not set.
+        cat_encoding (dict): Code dtype and label dictionary of the categorical vars.
+        seed_description (dict): Entropy and spawn key of the seed of the run.
+        writer (DatasetWriter): Writer the dataset was stored with, None for a
+            virtual dataset.
+        target (str): Name of the target column.
+        targets_writer (DatasetWriter, optional): Writer the target column was
+            stored with, when it is stored apart from the dataset.
+        profile (dict, optional): Profile of the stages of the run.
+        generation (dict, optional): Parameters to regenerate the dataset with.
+        statistics (dict, optional): Statistics of the columns of the dataset.
+
+    Returns:
+        str: Path of the metadata file.
+    """
+    num_vars = vars.copy()
+    for cat_var in cat_vars:
+        num_vars.remove(cat_var)
+
+    metadata = DataManager.create_metadata(
+        num_vars,
+        string_expression,
+        cat_vars,
+        main_name,
+        cat_encoding,
+        seed_description,
+        _get_unsharded_path(writer),
+        writer.file_format if writer is not None else VIRTUAL_DATASET_FORMAT,
+        target,
+        _get_unsharded_path(targets_writer),
+        profile,
+        generation,
+        writer.format_options if writer is not None else None,
+        statistics,
+        writer.shard_manifest_path if writer is not None else None,
+        targets_writer.shard_manifest_path if targets_writer is not None else None,
+    )
+    # Store metadata
+    metadata_file_path_and_name = os.path.join(
+        PATH_TO_METADATA_FILES, f'{metadata["dataset_name"]}.json'
+    )
+    DataManager.save_dict_to_json(metadata, metadata_file_path_and_name)
+    if PATH_TO_CATALOG is not None:
+        DatasetCatalog(PATH_TO_CATALOG).add([metadata])
+
+    return metadata_file_path_and_name
+
+
+def _get_unsharded_path(writer):
+    """
+    Get the path of a dataset stored as a single file.
+
+    Args:
+        writer (DatasetWriter): Writer the dataset was stored with, or None.
+
+    Returns:
+        str: Path of the dataset, None if it is sharded or there is no writer.
+    """
+    if writer is None or writer.shard_manifest_path is not None:
+        return None
+    return writer.path
+
+
+def _create_statistics_collector(vars, seed):
+    """
+    Create the collector of the column statistics of a run.
+
+    Args:
+        vars (list): List of all the variables.
+        seed (np.random.SeedSequence): Seed of the run.
+
+    Returns:
+        StatisticsCollector: Collector, None if COLLECT_STATISTICS is not set.
+    """
+    if not COLLECT_STATISTICS:
+        return None
+    return StatisticsCollector(vars, _get_child_seed(seed, 3))
+
+
+def _collect_statistics(
+    statistics, independent_vars, cat_codes=None, labels=None, targets=None
+):
+    """
+    Add rows of the arrays shared by the datasets of a run to its statistics.
+
+    Args:
+        statistics (StatisticsCollector): Collector, None to skip.
+        independent_vars (np.ndarray): Rows of the independent variables, None to
+            skip them.
+        cat_codes (dict, optional): Codes of the categorical variables of each
+            cardinality.
+        labels (dict, optional): Label dictionary of each cardinality.
+        targets (dict, optional): Binary target by name.
+    """
+    if statistics is None:
+        return
+    if independent_vars is not None:
+        statistics.update_numeric(independent_vars)
+    for cardinality, codes in (cat_codes or {}).items():
+        statistics.update_categorical(cardinality, codes, len(labels[cardinality]))
+    for name, target in (targets or {}).items():
+        statistics.update_target(name, target)
+
+
+def _get_dataset_statistics(
+    statistics, properties, cat_vars, target_name, target_column="target"
+):
+    """
+    Get the column statistics of a dataset.
+
+    Args:
+        statistics (StatisticsCollector): Collector of the run, None if statistics
+            are not collected.
+        properties (dict): Target type and categorical attribute properties.
+        cat_vars (list): List of the variables converted into categorical ones.
+        target_name (str): Name the target of the dataset was collected under.
+        target_column (str): Name of the target column of the dataset.
+
+    Returns:
+        dict: Statistics of the dataset, None if they are not collected.
+    """
+    if statistics is None:
+        return None
+    cat_attributes_property = map_cat_attributes(properties)
+    return statistics.to_dict(
+        cat_vars if cat_attributes_property != NO_CAT_INSTANCES else [],
+        cat_attributes_property,
+        target_name,
+        target_column,
+    )
+
+
+def _set_output_bytes(record, *outputs):
+    """
+    Set the output bytes of a profiled stage.
+
+    Args:
+        record (dict): Record of the stage, None if the profiler is disabled.
+        *outputs: Arrays the stage built, or writers of the datasets it stored.
+    """
+    if record is None:
+        return
+    record["output_bytes"] = sum(
+        output.nbytes
+        if isinstance(output, np.ndarray)
+        else get_output_bytes(output.path)
+        for output in outputs
+    )
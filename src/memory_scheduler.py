@@ -0,0 +1,370 @@
+"""
+Generate a sweep of runs within a memory budget.
+
+The peak memory of every run is estimated with the cost model. Runs that do not fit
+in the budget are switched to streaming mode with the largest chunk size that
+fits, and the runs are then generated on as many processes, and as many at once,
+as their estimates fit in the budget. The predicted and observed peak memory and
+time of every run are logged, and written to a JSON report.
+
+Usage:
+    python -m src.memory_scheduler '{"num_of_rows": [100000, 1000000]}' \
+        --memory-budget 4GiB
+    python -m src.memory_scheduler '{"num_of_vars": [10, 50]}' --memory-budget 16GiB \
+        --workers 8 --master-seed 42 --report scheduler_report.json
+"""
+import argparse
+import json
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from statistics import median
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from config.base import MASTER_SEED
+from config.logging import set_logger
+from config.scheduler_config import (
+    MAX_SCHEDULED_WORKERS,
+    MEMORY_BUDGET_BYTES,
+    MIN_SCHEDULED_CHUNK_SIZE,
+    PATH_TO_SCHEDULER_REPORT,
+)
+from src.cost_model import CostModel
+from src.generation_config import GenerationConfig
+from src.sweep_runner import expand_grid, generate
+
+logger = set_logger()
+
+_PATH_TO_PROCESS_STATUS = "/proc/self/status"
+_PATH_TO_CLEAR_REFS = "/proc/self/clear_refs"
+
+_BYTE_UNITS = {
+    "": 1,
+    "k": 10**3,
+    "m": 10**6,
+    "g": 10**9,
+    "t": 10**12,
+    "ki": 2**10,
+    "mi": 2**20,
+    "gi": 2**30,
+    "ti": 2**40,
+}
+
+
+def plan_run(config, memory_budget, model=None):
+    """
+    Fit a run in a memory budget, lowering its memory by streaming if needed.
+
+    Args:
+        config (GenerationConfig): Settings of the run.
+        memory_budget (int): Bytes the run may use on top of its process.
+        model (CostModel, optional): Cost model, unscaled if not given.
+
+    Returns:
+        tuple: The config to generate, the config itself if it fits, or a copy in
+        streaming mode with the largest chunk size that fits, and its CostEstimate.
+
+    Raises:
+        ValueError: If the run does not fit in the budget.
+    """
+    model = model or CostModel()
+    estimate = model.estimate(config)
+    if estimate.peak_bytes <= memory_budget:
+        return config, estimate
+
+    # the multi-polynomial mode has no streaming mode
+    if config.num_of_polynomials == 1:
+        chunk_size = min(config.chunk_size, config.num_of_rows)
+        while chunk_size >= MIN_SCHEDULED_CHUNK_SIZE:
+            streaming_config = config.replace(streaming=True, chunk_size=chunk_size)
+            streaming_estimate = model.estimate(streaming_config)
+            if streaming_estimate.peak_bytes <= memory_budget:
+                return streaming_config, streaming_estimate
+            chunk_size //= 2
+
+    raise ValueError(
+        f"Run of {config.num_of_rows} rows and {config.max_num_of_vars} variables "
+        f"needs about {estimate.peak_bytes} bytes, more than the budget of "
+        f"{memory_budget} bytes even in streaming mode"
+    )
+
+
+def schedule(configs, memory_budget=MEMORY_BUDGET_BYTES, max_workers=None, model=None):
+    """
+    Fit the runs of a sweep in a memory budget, and choose how many processes to
+    generate them on.
+
+    Every worker process holds about as much memory as the current process before
+    it generates anything, so the budget of the runs is the memory budget minus
+    this baseline per worker. The number of workers is the largest one for which
+    the largest run fits in the budget left, and the smallest runs fit together.
+
+    Args:
+        configs (list): GenerationConfig of each run.
+        memory_budget (int): Bytes the workers and their runs may use together.
+        max_workers (int, optional): Maximum number of workers,
+            MAX_SCHEDULED_WORKERS if not given.
+        model (CostModel, optional): Cost model, unscaled if not given.
+
+    Returns:
+        tuple: (config, CostEstimate) to generate for each run, the number of
+        workers and the bytes the runs generated at once may use together.
+
+    Raises:
+        ValueError: If a run does not fit in the budget.
+    """
+    baseline = _get_memory_usage()[0]
+    plans = [plan_run(config, memory_budget - baseline, model) for config in configs]
+
+    peaks = sorted(estimate.peak_bytes for _, estimate in plans)
+    num_of_workers = 1
+    for candidate in range(
+        2, min(max_workers or MAX_SCHEDULED_WORKERS, len(plans)) + 1
+    ):
+        runs_budget = memory_budget - candidate * baseline
+        if peaks[-1] > runs_budget or sum(peaks[:candidate]) > runs_budget:
+            break
+        num_of_workers = candidate
+
+    return plans, num_of_workers, memory_budget - num_of_workers * baseline
+
+
+def run_scheduled(
+    configs,
+    master_seed=MASTER_SEED,
+    memory_budget=MEMORY_BUDGET_BYTES,
+    max_workers=None,
+    model=None,
+    path_to_report=PATH_TO_SCHEDULER_REPORT,
+):
+    """
+    Generate a run for every config within a memory budget.
+
+    Runs are started largest first, each as soon as a worker is free and its
+    estimated peak memory fits next to the estimates of the runs being generated.
+    As in `run_sweep`, every run is generated from its own child of the master
+    seed.
+
+    Args:
+        configs (list): GenerationConfig of each run.
+        master_seed (int, optional): Seed the seeds of the runs are spawned from.
+            Fresh entropy is used if not given.
+        memory_budget (int): Bytes the workers and their runs may use together.
+        max_workers (int, optional): Maximum number of processes,
+            MAX_SCHEDULED_WORKERS if not given.
+        model (CostModel, optional): Cost model, unscaled if not given.
+        path_to_report (str, optional): JSON file the report is written to.
+
+    Returns:
+        list: Report of each run, in the order of the configs: its execution ID,
+        chunk size and mode, and its predicted and observed peak memory and time.
+    """
+    plans, num_of_workers, runs_budget = schedule(
+        configs, memory_budget, max_workers, model
+    )
+    master_seed_sequence = np.random.SeedSequence(master_seed)
+    logger.info(f"master seed entropy: {master_seed_sequence.entropy}")
+    seeds = master_seed_sequence.spawn(len(configs))
+    logger.info(
+        f"{len(plans)} runs on {num_of_workers} workers, "
+        f"{runs_budget} bytes for the runs"
+    )
+
+    observations = [None] * len(plans)
+    if num_of_workers == 1:
+        for index, (config, _) in enumerate(plans):
+            observations[index] = _generate_measured(config, seeds[index])
+    else:
+        pending = sorted(
+            range(len(plans)),
+            key=lambda index: plans[index][1].peak_bytes,
+            reverse=True,
+        )
+        running = {}
+        with ProcessPoolExecutor(max_workers=num_of_workers) as executor:
+            while pending or running:
+                reserved = sum(plans[index][1].peak_bytes for index in running.values())
+                while pending and len(running) < num_of_workers:
+                    index = next(
+                        (
+                            index
+                            for index in pending
+                            if reserved + plans[index][1].peak_bytes <= runs_budget
+                        ),
+                        None,
+                    )
+                    if index is None:
+                        break
+                    pending.remove(index)
+                    reserved += plans[index][1].peak_bytes
+                    future = executor.submit(
+                        _generate_measured, plans[index][0], seeds[index]
+                    )
+                    running[future] = index
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    observations[running.pop(future)] = future.result()
+
+    report = [
+        _report_run(config, estimate, *observation)
+        for (config, estimate), observation in zip(plans, observations)
+    ]
+    _log_report(report)
+    if path_to_report is not None:
+        with open(path_to_report, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+    return report
+
+
+def parse_bytes(value):
+    """
+    Parse a number of bytes.
+
+    Args:
+        value (str | int): Number of bytes, with an optional unit such as "512M",
+            "4GB" or "4GiB".
+
+    Returns:
+        int: Number of bytes.
+
+    Raises:
+        ValueError: If the value is not a number of bytes.
+    """
+    match = re.fullmatch(
+        r"\s*([0-9]*\.?[0-9]+)\s*([kmgt]i?)?b?\s*", str(value), re.IGNORECASE
+    )
+    if match is None:
+        raise ValueError(f"Expected a number of bytes such as 4GiB, got {value!r}")
+    number, unit = match.groups()
+    return int(float(number) * _BYTE_UNITS[(unit or "").lower()])
+
+
+def _generate_measured(config, seed):
+    """
+    Generate a run and measure its peak memory and wall time.
+
+    The peak is measured from the high water mark of the resident memory of the
+    process, reset before the run where the platform allows it. Elsewhere it is the
+    peak of the whole life of the process, an upper bound.
+
+    Returns:
+        tuple: Execution ID, peak bytes on top of the memory before the run, None if
+        it cannot be measured, and seconds.
+    """
+    rss_before, _ = _get_memory_usage()
+    _reset_peak_memory()
+    start = time.perf_counter()
+    exec_id = generate(config, seed)
+    seconds = time.perf_counter() - start
+    _, peak = _get_memory_usage()
+    observed_peak = None if peak is None else max(0, peak - rss_before)
+    return exec_id, observed_peak, seconds
+
+
+def _get_memory_usage():
+    """
+    Get the resident memory of the process and its high water mark.
+
+    Returns:
+        tuple: Current and peak bytes, 0 and ru_maxrss where /proc is not
+        available, and None for the peak without resource either.
+    """
+    try:
+        with open(_PATH_TO_PROCESS_STATUS) as status_file:
+            status = dict(line.split(":", 1) for line in status_file if ":" in line)
+        # the values are in kilobytes
+        return (
+            int(status["VmRSS"].split()[0]) * 1024,
+            int(status["VmHWM"].split()[0]) * 1024,
+        )
+    except (OSError, KeyError):
+        if resource is None:
+            return 0, None
+        # ru_maxrss is in kilobytes on Linux
+        return 0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _reset_peak_memory():
+    try:
+        with open(_PATH_TO_CLEAR_REFS, "w") as clear_refs_file:
+            # resets the high water mark of the resident memory
+            clear_refs_file.write("5")
+    except OSError:
+        pass
+
+
+def _report_run(config, estimate, exec_id, observed_peak, observed_seconds):
+    return {
+        "exec_id": exec_id,
+        "num_of_rows": config.num_of_rows,
+        "max_num_of_vars": config.max_num_of_vars,
+        "dataset_format": config.dataset_format,
+        "streaming": config.streaming,
+        "chunk_size": config.chunk_size if config.streaming else None,
+        "predicted_peak_bytes": estimate.peak_bytes,
+        "observed_peak_bytes": observed_peak,
+        "predicted_seconds": round(estimate.seconds, 3),
+        "observed_seconds": round(observed_seconds, 3),
+    }
+
+
+def _log_report(report):
+    for run in report:
+        logger.info(
+            f"{run['exec_id']}: peak {_format_megabytes(run['predicted_peak_bytes'])} "
+            f"predicted, {_format_megabytes(run['observed_peak_bytes'])} observed; "
+            f"{run['predicted_seconds']:.1f} s predicted, "
+            f"{run['observed_seconds']:.1f} s observed"
+        )
+    memory_ratios = [
+        run["observed_peak_bytes"] / run["predicted_peak_bytes"]
+        for run in report
+        if run["observed_peak_bytes"] is not None
+    ]
+    time_ratios = [run["observed_seconds"] / run["predicted_seconds"] for run in report]
+    if memory_ratios:
+        logger.info(f"median observed / predicted peak: {median(memory_ratios):.2f}")
+    logger.info(f"median observed / predicted time: {median(time_ratios):.2f}")
+
+
+def _format_megabytes(num_of_bytes):
+    if num_of_bytes is None:
+        return "unknown"
+    return f"{num_of_bytes / 2**20:.0f} MiB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate a sweep over a grid within a memory budget."
+    )
+    parser.add_argument(
+        "grid", help="JSON object of the list of values of each config field"
+    )
+    parser.add_argument(
+        "--memory-budget", type=parse_bytes, default=MEMORY_BUDGET_BYTES
+    )
+    parser.add_argument("--workers", type=int, default=MAX_SCHEDULED_WORKERS)
+    parser.add_argument("--master-seed", type=int, default=MASTER_SEED)
+    parser.add_argument("--format", dest="dataset_format")
+    parser.add_argument("--report", default=PATH_TO_SCHEDULER_REPORT)
+    args = parser.parse_args(argv)
+
+    base_config = GenerationConfig()
+    if args.dataset_format is not None:
+        base_config = base_config.replace(dataset_format=args.dataset_format)
+    configs = expand_grid(json.loads(args.grid), base_config)
+    report = run_scheduled(
+        configs, args.master_seed, args.memory_budget, args.workers, None, args.report
+    )
+    for run in report:
+        print(json.dumps(run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+import base64
+
+import numpy as np
+
+from config.poly_params_config import EVALUATION_BLOCK_SIZE
+
+# Number of terms whose factors are gathered from the power table at once.
+_TERMS_PER_GATHER = 8
+
+# Encoding recorded in the compact descriptions of `Polynomial.to_dict`.
+COMPACT_ENCODING = "base64"
+
+# Arrays of a polynomial description, with the dtype they are loaded as.
+_ARRAYS = {
+    "coefficients": np.float64,
+    "term_offsets": np.int64,
+    "term_vars": np.int64,
+    "term_exponents": np.int64,
+}
+
+
+class Polynomial:
+    """
+    Structured representation of a polynomial.
+
+    A polynomial is stored as a coefficient vector (one value per term) and a
+    sparse list of the factors of its terms: factor i is variable term_vars[i]
+    raised to term_exponents[i], and the factors of term t are the ones in
+    [term_offsets[t], term_offsets[t + 1]). Variables a term does not use take no
+    space and no evaluation time.
+    """
+
+    def __init__(self, coefficients, term_vars, term_exponents, variables):
+        """
+        Args:
+            coefficients (array-like): Coefficient of each term.
+            term_vars (list): Indices (into `variables`) of the variables of each
+                term, in ascending order.
+            term_exponents (list): Exponents of the variables of each term.
+            variables (list): Variable names.
+        """
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.variables = list(variables)
+
+        if len(term_vars) != len(self.coefficients) or len(term_exponents) != len(
+            self.coefficients
+        ):
+            raise ValueError("Every term needs its variables and exponents")
+
+        lengths = [len(vars_of_term) for vars_of_term in term_vars]
+        if lengths != [len(exponents_of_term) for exponents_of_term in term_exponents]:
+            raise ValueError("Every variable of a term needs an exponent")
+
+        self.term_offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        self.term_vars = np.concatenate(
+            [np.asarray(v, dtype=np.int64) for v in term_vars] + [np.empty(0, np.int64)]
+        )
+        self.term_exponents = np.concatenate(
+            [np.asarray(e, dtype=np.int64) for e in term_exponents]
+            + [np.empty(0, np.int64)]
+        )
+
+    @classmethod
+    def from_dense(cls, coefficients, exponents, variables):
+        """
+        Build a polynomial in which every term uses every variable.
+
+        Args:
+            coefficients (array-like): Coefficient of each term.
+            exponents (array-like): Integer exponent matrix (terms x vars).
+            variables (list): Variable names, one per column of the exponent matrix.
+
+        Returns:
+            Polynomial: The polynomial.
+        """
+        exponents = np.asarray(exponents, dtype=np.int64).reshape(
+            len(coefficients), len(variables)
+        )
+        var_index = np.arange(len(variables))
+        return cls(
+            coefficients, [var_index] * len(exponents), list(exponents), variables
+        )
+
+    @property
+    def num_of_terms(self):
+        return len(self.coefficients)
+
+    @property
+    def num_of_vars(self):
+        return len(self.variables)
+
+    @property
+    def exponents(self):
+        """
+        np.ndarray: Dense exponent matrix (terms x vars), 0 where a term does not
+            use a variable.
+        """
+        exponents = np.zeros((self.num_of_terms, self.num_of_vars), dtype=np.int64)
+        terms = np.repeat(np.arange(self.num_of_terms), np.diff(self.term_offsets))
+        exponents[terms, self.term_vars] = self.term_exponents
+        return exponents
+
+    @property
+    def term_degrees(self):
+        """
+        np.ndarray: Total degree of each term, the sum of its exponents.
+        """
+        terms = np.repeat(np.arange(self.num_of_terms), np.diff(self.term_offsets))
+        return np.bincount(
+            terms, weights=self.term_exponents, minlength=self.num_of_terms
+        ).astype(np.int64)
+
+    def iter_terms(self):
+        """
+        Iterate over the terms of the polynomial.
+
+        Yields:
+            tuple: Coefficient, variable indices and exponents of each term.
+        """
+        for term, coefficient in enumerate(self.coefficients):
+            factors = slice(self.term_offsets[term], self.term_offsets[term + 1])
+            yield coefficient, self.term_vars[factors], self.term_exponents[factors]
+
+    def to_dict(self, compact=False):
+        """
+        Build a JSON-serializable description of the polynomial.
+
+        Args:
+            compact (bool): Store each array as the base64 string of its bytes, in
+                the smallest dtype holding its values, instead of a list. The
+                description is then several times smaller, and loads without
+                parsing a number per factor.
+
+        Returns:
+            dict: Variables, coefficients and sparse factors of the polynomial.
+        """
+        if not compact:
+            return {
+                "variables": self.variables,
+                "coefficients": self.coefficients.tolist(),
+                "term_offsets": self.term_offsets.tolist(),
+                "term_vars": self.term_vars.tolist(),
+                "term_exponents": self.term_exponents.tolist(),
+            }
+
+        description = {"encoding": COMPACT_ENCODING, "variables": self.variables}
+        for name in _ARRAYS:
+            array = getattr(self, name)
+            if array.dtype.kind == "i":
+                # offsets, variable indices and exponents are never negative
+                array = array.astype(np.min_scalar_type(array.max(initial=0)))
+            description[name] = _encode_array(array)
+        return description
+
+    @classmethod
+    def from_dict(cls, description):
+        """
+        Build a polynomial from the description returned by `to_dict`, compact or
+        not.
+
+        Args:
+            description (dict): Description of the polynomial.
+
+        Returns:
+            Polynomial: The polynomial.
+        """
+        if description.get("encoding") == COMPACT_ENCODING:
+            arrays = {
+                name: _decode_array(description[name]).astype(dtype)
+                for name, dtype in _ARRAYS.items()
+            }
+        else:
+            arrays = {
+                name: np.asarray(description[name], dtype=dtype)
+                for name, dtype in _ARRAYS.items()
+            }
+
+        offsets = arrays["term_offsets"]
+        if (
+            len(offsets) != len(arrays["coefficients"]) + 1
+            or offsets[0] != 0
+            or np.any(np.diff(offsets) < 0)
+            or offsets[-1] != len(arrays["term_vars"])
+            or offsets[-1] != len(arrays["term_exponents"])
+        ):
+            raise ValueError("Inconsistent term offsets in polynomial description")
+
+        # the arrays are already in the layout of the polynomial, so they are set
+        # directly rather than split into terms and joined again
+        polynomial = cls.__new__(cls)
+        polynomial.variables = list(description["variables"])
+        for name, array in arrays.items():
+            setattr(polynomial, name, array)
+        return polynomial
+
+    def to_string_expression(self):
+        """
+        Build the text form of the polynomial.
+
+        Returns:
+            str: Polynomial expression, e.g. "c1 * (v1**2) * (v4**1) + c2 * ...".
+        """
+        terms = []
+        for coefficient, term_vars, term_exponents in self.iter_terms():
+            factors = [
+                f"({self.variables[var]}**{exponent})"
+                for var, exponent in zip(term_vars, term_exponents)
+            ]
+            terms.append(" * ".join([f"{float(coefficient)}"] + factors))
+
+        return " + ".join(terms)
+
+    def evaluate(self, data, block_size=EVALUATION_BLOCK_SIZE):
+        """
+        Evaluate the polynomial over a matrix of independent variables.
+
+        Rows are processed in blocks. For each block a power table holding
+        v**k for every used variable and every exponent up to the maximum degree
+        is built once by repeated multiplication, and every term is computed by
+        gathering its factors from that table.
+
+        Args:
+            data (np.ndarray): Matrix of shape (rows, vars), columns ordered as `variables`.
+            block_size (int): Number of rows evaluated at once.
+
+        Returns:
+            np.ndarray: Value of the polynomial for each row.
+        """
+        return evaluate_polynomials([self], data, block_size)[0]
+
+
+def _encode_array(array):
+    """
+    Encode an array as a JSON-serializable dict.
+
+    Args:
+        array (np.ndarray): 1-D array.
+
+    Returns:
+        dict: dtype, with its byte order, and base64 string of the bytes of the
+            array.
+    """
+    return {
+        "dtype": array.dtype.str,
+        "data": base64.b64encode(np.ascontiguousarray(array).tobytes()).decode("ascii"),
+    }
+
+
+def _decode_array(encoded):
+    """
+    Decode an array encoded by `_encode_array`.
+
+    Args:
+        encoded (dict): Encoded array.
+
+    Returns:
+        np.ndarray: The array.
+    """
+    return np.frombuffer(base64.b64decode(encoded["data"]), dtype=encoded["dtype"])
+
+
+def evaluate_polynomials(polynomials, data, block_size=EVALUATION_BLOCK_SIZE):
+    """
+    Evaluate several polynomials over the same matrix of independent variables.
+
+    The terms of the polynomials are stacked, so a single power table per block of
+    rows serves every term of every polynomial. The table only holds the
+    variables some term uses, and each term only multiplies its own factors, so
+    the cost grows with the number of factors rather than terms x vars. The value
+    of each polynomial is the same as the one `Polynomial.evaluate` returns for it.
+
+    Args:
+        polynomials (list): Polynomials over the same variables.
+        data (np.ndarray): Matrix of shape (rows, vars), columns ordered as the
+            variables of the polynomials, of float64 or float32 values. Polynomials
+            are evaluated in float64 either way.
+        block_size (int): Number of rows evaluated at once.
+
+    Returns:
+        np.ndarray: Matrix of shape (polynomials, rows) with the value of each
+            polynomial for each row.
+    """
+    if any(
+        polynomial.variables != polynomials[0].variables for polynomial in polynomials
+    ):
+        raise ValueError("Polynomials evaluated together must share their variables")
+
+    coefficients = np.concatenate(
+        [polynomial.coefficients for polynomial in polynomials]
+    )
+    # polynomial each stacked term belongs to
+    owners = np.repeat(
+        np.arange(len(polynomials)),
+        [polynomial.num_of_terms for polynomial in polynomials],
+    )
+
+    # variables used by some term; the extra last column of the power table is
+    # all ones and pads terms with fewer factors than the longest one
+    used_vars = np.unique(
+        np.concatenate([polynomial.term_vars for polynomial in polynomials])
+    )
+    ones_column = len(used_vars)
+
+    terms = [
+        (term_vars, term_exponents)
+        for polynomial in polynomials
+        for _, term_vars, term_exponents in polynomial.iter_terms()
+    ]
+    max_factors = max([len(term_vars) for term_vars, _ in terms] + [1])
+    factor_vars = np.full((len(terms), max_factors), ones_column, dtype=np.int64)
+    factor_exponents = np.zeros((len(terms), max_factors), dtype=np.int64)
+    for term, (term_vars, term_exponents) in enumerate(terms):
+        factor_vars[term, : len(term_vars)] = np.searchsorted(used_vars, term_vars)
+        factor_exponents[term, : len(term_vars)] = term_exponents
+
+    # float32 data is converted to float64 block by block, in the power table
+    data = np.asarray(data)
+    num_of_rows = data.shape[0]
+    result = np.empty((len(polynomials), num_of_rows), dtype=np.float64)
+
+    max_exponent = int(factor_exponents.max()) if factor_exponents.size else 0
+
+    for start in range(0, num_of_rows, block_size):
+        block = data[start : start + block_size, used_vars]
+
+        powers = np.empty((max_exponent + 1, len(used_vars) + 1, len(block)))
+        powers[0] = 1.0
+        powers[:, ones_column] = 1.0
+        if max_exponent:
+            powers[1, :ones_column] = block.T
+        for exponent in range(2, max_exponent + 1):
+            np.multiply(
+                powers[exponent - 1, :ones_column],
+                powers[1, :ones_column],
+                out=powers[exponent, :ones_column],
+            )
+
+        block_result = result[:, start : start + block_size]
+        block_result[:] = 0.0
+
+        # gather the factors of a few terms at a time, so the gathered factors stay
+        # in cache however many polynomials are stacked
+        for first_term in range(0, len(terms), _TERMS_PER_GATHER):
+            last_term = first_term + _TERMS_PER_GATHER
+            # (terms, factors, rows) -> product over factors -> (terms, rows)
+            term_values = powers[
+                factor_exponents[first_term:last_term],
+                factor_vars[first_term:last_term],
+            ].prod(axis=1)
+
+            # add terms one by one, so the value of a row never depends on the
+            # rows it is evaluated with
+            for owner, coefficient, values in zip(
+                owners[first_term:last_term],
+                coefficients[first_term:last_term],
+                term_values,
+            ):
+                block_result[owner] += coefficient * values
+
+    return result
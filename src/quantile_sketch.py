@@ -0,0 +1,64 @@
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    Bounded-memory sketch of the distribution of one or more columns.
+
+    The sketch keeps a uniform random sample of at most `sample_size` rows: every
+    row gets a random priority and the rows with the smallest priorities are
+    kept. While fewer rows than `sample_size` have been seen, the sample holds
+    every row and the quantiles it returns are exact.
+    """
+
+    def __init__(self, sample_size, seed=None):
+        """
+        Args:
+            sample_size (int): Maximum number of rows kept.
+            seed (int | np.random.SeedSequence, optional): Seed of the priorities.
+        """
+        self.sample_size = sample_size
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+        self._priorities = np.empty(0)
+        self._sample = None
+
+    def update(self, values):
+        """
+        Add rows to the sketch.
+
+        Args:
+            values (np.ndarray): Matrix of shape (rows, columns).
+        """
+        priorities = np.concatenate((self._priorities, self._rng.random(len(values))))
+        sample = (
+            values if self._sample is None else np.concatenate((self._sample, values))
+        )
+
+        if len(priorities) > self.sample_size:
+            kept = np.argpartition(priorities, self.sample_size)[: self.sample_size]
+            kept.sort()
+            priorities = priorities[kept]
+            sample = sample[kept]
+
+        self._priorities = priorities
+        self._sample = sample
+        self.count += len(values)
+
+    def values_at_ranks(self, ranks):
+        """
+        Estimate the values at the given ranks of each column.
+
+        Args:
+            ranks (np.ndarray): Ranks (positions in the ascending sort of all the
+                rows seen) to estimate.
+
+        Returns:
+            np.ndarray: Matrix of shape (columns, ranks) with the estimated values.
+        """
+        sorted_sample = np.sort(self._sample, axis=0)
+        positions = np.rint(
+            np.asarray(ranks) * (len(sorted_sample) - 1) / max(self.count - 1, 1)
+        ).astype(np.int64)
+
+        return sorted_sample[positions].T
@@ -0,0 +1,62 @@
+"""
+Cancellation of the run in progress in a process.
+
+A job queue worker cancels its run when it loses the lease of the job to another
+worker. The run stops at its next chunk, and no dataset or metadata file it was
+writing is moved to its path, so the run of the worker holding the lease is never
+mixed with a stale one.
+"""
+import threading
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+# event cancelling the run in progress, None outside `cancellable`
+_cancel_event = None
+
+
+class RunCancelled(Exception):
+    """
+    Raised in a run cancelled before it finished.
+    """
+
+
+@contextmanager
+def cancellable(cancel_event):
+    """
+    Run the code of the block as a run cancelled when an event is set.
+
+    Args:
+        cancel_event (threading.Event): Event set to cancel the run, from any
+            thread.
+    """
+    global _cancel_event
+    with _lock:
+        previous_event = _cancel_event
+        _cancel_event = cancel_event
+    try:
+        yield
+    finally:
+        with _lock:
+            _cancel_event = previous_event
+
+
+def is_cancelled():
+    """
+    Tell whether the run in progress was cancelled.
+
+    Returns:
+        bool: True if the event of the enclosing `cancellable` block is set.
+    """
+    cancel_event = _cancel_event
+    return cancel_event is not None and cancel_event.is_set()
+
+
+def raise_if_cancelled():
+    """
+    Stop the run in progress if it was cancelled.
+
+    Raises:
+        RunCancelled: If the event of the enclosing `cancellable` block is set.
+    """
+    if is_cancelled():
+        raise RunCancelled("the run was cancelled")
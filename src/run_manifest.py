@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+
+from config import cat_vars_config, datasets_config, poly_params_config
+from config.base import (
+    BASE_NAME,
+    CSV_COMPRESSION,
+    CSV_FLOAT_PRECISION,
+    PATH_TO_MANIFESTS,
+    SHARD_BYTES,
+    SHARD_ROWS,
+)
+from config.statistics_config import COLLECT_STATISTICS
+from config.streaming_config import QUANTILE_SKETCH_SIZE
+from src.data_manager import DataManager
+from src.stage_profiler import get_output_bytes
+
+# Number of hexadecimal digits of the run keys.
+_RUN_KEY_LENGTH = 16
+
+
+class RunManifest:
+    """
+    Content-addressed identifiers and manifests of runs.
+
+    A run is identified by a key hashed from its seed and every setting its
+    output depends on, so the same seed and config always map to the same dataset
+    names, and different ones never collide. When a run completes, a manifest
+    listing its files with their sizes and SHA-256 checksums is written; a run
+    whose files all match its manifest is complete and does not need to be
+    generated again.
+    """
+
+    @classmethod
+    def get_run_key(cls, seed, **settings):
+        """
+        Compute the key of a run.
+
+        Args:
+            seed (np.random.SeedSequence): Seed of the run.
+            **settings: Run settings the output depends on besides the config files,
+                such as the dataset format.
+
+        Returns:
+            str: Hexadecimal key of the run.
+        """
+        key_material = {
+            "seed": {"entropy": seed.entropy, "spawn_key": list(seed.spawn_key)},
+            "config": cls.get_config_snapshot(),
+            "settings": settings,
+        }
+        digest = hashlib.sha256(
+            json.dumps(key_material, sort_keys=True).encode()
+        ).hexdigest()
+
+        return digest[:_RUN_KEY_LENGTH]
+
+    @classmethod
+    def get_config_snapshot(cls):
+        """
+        Collect the settings of the config files the generated data depends on.
+
+        Returns:
+            dict: Settings by name.
+        """
+        return {
+            "base_name": BASE_NAME,
+            "number_of_instances": poly_params_config.NUMBER_OF_INSTANCES,
+            "feature_dtype": poly_params_config.FEATURE_DTYPE,
+            "polynomial": poly_params_config.params,
+            "cat_vars": {
+                name: getattr(cat_vars_config, name)
+                for name in dir(cat_vars_config)
+                if name.isupper()
+            },
+            "datasets": {
+                name: getattr(datasets_config, name)
+                for name in dir(datasets_config)
+                if name.isupper()
+            },
+            "quantile_sketch_size": QUANTILE_SKETCH_SIZE,
+            "csv_float_precision": CSV_FLOAT_PRECISION,
+            "csv_compression": CSV_COMPRESSION,
+            "collect_statistics": COLLECT_STATISTICS,
+            "shard_rows": SHARD_ROWS,
+            "shard_bytes": SHARD_BYTES,
+            "compact_polynomial_metadata": (
+                poly_params_config.COMPACT_POLYNOMIAL_METADATA
+            ),
+            "store_polynomial_expression": (
+                poly_params_config.STORE_POLYNOMIAL_EXPRESSION
+            ),
+        }
+
+    @classmethod
+    def get_path(cls, exec_id, path_to_manifests=PATH_TO_MANIFESTS):
+        """
+        Get the path of the manifest of a run.
+
+        Args:
+            exec_id (str): Identifier of the run.
+            path_to_manifests (str): Directory of the manifests.
+
+        Returns:
+            str: Path of the manifest.
+        """
+        return os.path.join(path_to_manifests, f"{BASE_NAME}_{exec_id}.json")
+
+    @classmethod
+    def write(cls, exec_id, paths, path_to_manifests=PATH_TO_MANIFESTS):
+        """
+        Record the files of a completed run.
+
+        Args:
+            exec_id (str): Identifier of the run.
+            paths (list): Paths of the datasets and metadata files of the run.
+            path_to_manifests (str): Directory of the manifests.
+        """
+        os.makedirs(path_to_manifests, exist_ok=True)
+        manifest = {
+            "exec_id": exec_id,
+            "files": [
+                {
+                    "path": path,
+                    "bytes": get_output_bytes(path),
+                    "sha256": _get_sha256(path),
+                }
+                for path in sorted(paths)
+            ],
+        }
+        DataManager.save_dict_to_json(
+            manifest, cls.get_path(exec_id, path_to_manifests)
+        )
+
+    @classmethod
+    def update(cls, paths, path_to_manifests=PATH_TO_MANIFESTS):
+        """
+        Record the new size and checksum of files changed after their run
+        completed, in every manifest listing them.
+
+        Args:
+            paths (list): Paths of the changed files.
+            path_to_manifests (str): Directory of the manifests.
+        """
+        if not os.path.isdir(path_to_manifests):
+            return
+
+        paths = set(paths)
+        for name in sorted(os.listdir(path_to_manifests)):
+            if not name.endswith(".json"):
+                continue
+            manifest_path = os.path.join(path_to_manifests, name)
+            manifest = DataManager.load_json(manifest_path)
+            changed = [file for file in manifest["files"] if file["path"] in paths]
+            if not changed:
+                continue
+            for file in changed:
+                file["bytes"] = get_output_bytes(file["path"])
+                file["sha256"] = _get_sha256(file["path"])
+            DataManager.save_dict_to_json(manifest, manifest_path)
+
+    @classmethod
+    def is_complete(cls, exec_id, path_to_manifests=PATH_TO_MANIFESTS):
+        """
+        Check whether a run completed and its files are still there, unchanged.
+
+        Sizes are compared first, so missing and resized files are found without
+        reading any file; the files are then read to verify their checksums.
+
+        Args:
+            exec_id (str): Identifier of the run.
+            path_to_manifests (str): Directory of the manifests.
+
+        Returns:
+            bool: True if the run has a manifest and every file it lists exists
+                with the recorded size and checksum. Manifests written before
+                checksums were recorded are only checked for sizes.
+        """
+        manifest_path = cls.get_path(exec_id, path_to_manifests)
+        if not os.path.exists(manifest_path):
+            return False
+
+        manifest = DataManager.load_json(manifest_path)
+        return all(
+            os.path.exists(file["path"])
+            and get_output_bytes(file["path"]) == file["bytes"]
+            for file in manifest["files"]
+        ) and all(
+            file.get("sha256") in (None, _get_sha256(file["path"]))
+            for file in manifest["files"]
+        )
+
+
+def _get_sha256(path):
+    """
+    Compute the checksum of an output of a run.
+
+    Args:
+        path (str): Path of a file, or of a directory, whose files are hashed with
+            their relative paths, walked in the order of their names.
+
+    Returns:
+        str: Hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    _update_digest(digest, path, "")
+    return digest.hexdigest()
+
+
+def _update_digest(digest, path, relative_path):
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            _update_digest(digest, os.path.join(path, name), f"{relative_path}/{name}")
+        return
+
+    digest.update(relative_path.encode() + b"\0")
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(2**20), b""):
+            digest.update(block)
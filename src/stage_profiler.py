@@ -0,0 +1,142 @@
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from config.profiling_config import PROFILE_MEMORY, PROFILE_STAGES
+
+
+class StageProfiler:
+    """
+    Records the wall time, CPU time, peak memory and output bytes of the stages of
+    a run.
+
+    The peak RSS of a process only grows, so each stage records both the peak of
+    the process when it ends (`process_max_rss_bytes`) and how much the stage
+    raised it (`max_rss_growth_bytes`), which is 0 for stages that stayed below an
+    earlier peak. `peak_memory_bytes`, recorded when memory is traced, is the peak
+    allocated by the stage itself.
+
+    A disabled profiler records nothing, so stages can always be wrapped in
+    `stage`.
+    """
+
+    def __init__(self, enabled=PROFILE_STAGES, trace_memory=PROFILE_MEMORY):
+        """
+        Args:
+            enabled (bool): Record the stages.
+            trace_memory (bool): Trace the memory allocated by each stage with
+                tracemalloc.
+        """
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.stages = []
+        self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Record a stage.
+
+        Args:
+            name (str): Name of the stage.
+
+        Yields:
+            dict: Record of the stage, None if the profiler is disabled. Its
+                "output_bytes" can be set by the caller.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            traced_at_start, _ = tracemalloc.get_traced_memory()
+
+        record = {"stage": name, "output_bytes": None}
+        max_rss_at_start = _get_max_rss_bytes()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_seconds"] = time.perf_counter() - wall_start
+            record["cpu_seconds"] = time.process_time() - cpu_start
+            record["peak_memory_bytes"] = (
+                tracemalloc.get_traced_memory()[1] - traced_at_start
+                if self.trace_memory
+                else None
+            )
+            max_rss = _get_max_rss_bytes()
+            record["process_max_rss_bytes"] = max_rss
+            record["max_rss_growth_bytes"] = (
+                max_rss - max_rss_at_start if max_rss is not None else None
+            )
+            self.stages.append(record)
+
+    def to_dict(self):
+        """
+        Get the profile of the run.
+
+        Returns:
+            dict: Recorded stages and their total wall and CPU times, None if the
+                profiler is disabled.
+        """
+        if not self.enabled:
+            return None
+
+        return {
+            "total_wall_seconds": sum(stage["wall_seconds"] for stage in self.stages),
+            "total_cpu_seconds": sum(stage["cpu_seconds"] for stage in self.stages),
+            "stages": self.stages,
+        }
+
+    def close(self, exec_id=None, path_to_profile_file=None):
+        """
+        Stop tracing memory and append the profile to a JSON Lines file.
+
+        Args:
+            exec_id (str, optional): Identifier of the run.
+            path_to_profile_file (str, optional): File the profile is appended to.
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+        if self.enabled and path_to_profile_file:
+            line = json.dumps({"exec_id": exec_id, **self.to_dict()})
+            with open(path_to_profile_file, "a") as profile_file:
+                profile_file.write(line + "\n")
+
+
+def get_output_bytes(path):
+    """
+    Get the size of a stored dataset.
+
+    Args:
+        path (str): Path of a file, or of a directory of files and directories.
+
+    Returns:
+        int: Size in bytes.
+    """
+    if os.path.isdir(path):
+        return sum(
+            get_output_bytes(os.path.join(path, name)) for name in os.listdir(path)
+        )
+    return os.path.getsize(path)
+
+
+def _get_max_rss_bytes():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
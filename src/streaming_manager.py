@@ -0,0 +1,211 @@
+import numpy as np
+
+from config.logging import set_logger
+from src.run_cancellation import raise_if_cancelled
+
+logger = set_logger()
+
+_SIGN_BIT = np.uint64(1 << 63)
+_DIGIT_BITS = 16
+_DIGIT_MASK = np.uint64((1 << _DIGIT_BITS) - 1)
+
+
+class StreamingManager:
+    @classmethod
+    def iter_chunks(cls, num_of_rows, chunk_size):
+        """
+        Split a range of rows into consecutive chunks.
+
+        Args:
+            num_of_rows (int): Total number of rows.
+            chunk_size (int): Maximum number of rows of a chunk.
+
+        Yields:
+            tuple: First row and row after the last row of each chunk.
+
+        Raises:
+            RunCancelled: If the run is cancelled before a chunk.
+        """
+        for start in range(0, num_of_rows, chunk_size):
+            raise_if_cancelled()
+            yield start, min(start + chunk_size, num_of_rows)
+
+    @classmethod
+    def compute_linear_thresholds(cls, num_target, chunk_size):
+        """
+        Compute the thresholds of the binary linear target chunk by chunk.
+
+        The result is the one `DataManager.generate_binary_linear_target` returns
+        for the same values, so both targets are exactly balanced and equal.
+
+        Args:
+            num_target (np.ndarray): Numerical target, usually memory-mapped.
+            chunk_size (int): Number of values read at once.
+
+        Returns:
+            dict: Threshold and rows tied on it which are set to True.
+        """
+        num_of_rows = len(num_target)
+        half_index = num_of_rows // 2
+        if half_index == 0:
+            return {"threshold": None, "positive_tie_rows": []}
+
+        (threshold,) = cls.select_order_statistics(
+            num_target, [num_of_rows - half_index], chunk_size
+        )
+        tie_rows, _, num_of_greater = cls._find_ties(num_target, threshold, chunk_size)
+        num_of_positive_ties = half_index - num_of_greater
+
+        return {
+            "threshold": threshold,
+            "positive_tie_rows": tie_rows[len(tie_rows) - num_of_positive_ties :],
+        }
+
+    @classmethod
+    def compute_non_linear_thresholds(cls, num_target, chunk_size):
+        """
+        Compute the thresholds of the binary non-linear target chunk by chunk.
+
+        The result is the one `DataManager.generate_binary_non_linear_target`
+        returns for the same values.
+
+        Args:
+            num_target (np.ndarray): Numerical target, usually memory-mapped.
+            chunk_size (int): Number of values read at once.
+
+        Returns:
+            dict: Lower and upper thresholds and rows tied on them which are set to
+                True.
+        """
+        num_of_rows = len(num_target)
+        quater_index_size = num_of_rows // 4
+        if quater_index_size == 0:
+            return {
+                "lower_threshold": None,
+                "lower_positive_tie_rows": [],
+                "upper_threshold": None,
+                "upper_positive_tie_rows": [],
+            }
+
+        lower_threshold, upper_threshold = cls.select_order_statistics(
+            num_target,
+            [quater_index_size - 1, num_of_rows - quater_index_size],
+            chunk_size,
+        )
+        lower_tie_rows, num_of_lower, _ = cls._find_ties(
+            num_target, lower_threshold, chunk_size
+        )
+        upper_tie_rows, _, num_of_greater = cls._find_ties(
+            num_target, upper_threshold, chunk_size
+        )
+        num_of_lower_positive_ties = quater_index_size - num_of_lower
+        num_of_upper_positive_ties = quater_index_size - num_of_greater
+
+        return {
+            "lower_threshold": lower_threshold,
+            "lower_positive_tie_rows": lower_tie_rows[:num_of_lower_positive_ties],
+            "upper_threshold": upper_threshold,
+            "upper_positive_tie_rows": upper_tie_rows[
+                len(upper_tie_rows) - num_of_upper_positive_ties :
+            ],
+        }
+
+    @classmethod
+    def select_order_statistics(cls, values, ranks, chunk_size):
+        """
+        Find the exact values at the given ranks with bounded memory.
+
+        Values are mapped to unsigned integer keys with the same order, and each
+        key is found 16 bits at a time: every pass counts the next digit of the
+        values sharing the digits found so far, which takes 4 passes over the
+        values and memory independent of their number.
+
+        Args:
+            values (np.ndarray): Values, usually memory-mapped.
+            ranks (list): Ranks (positions in the ascending sort) to find.
+            chunk_size (int): Number of values read at once.
+
+        Returns:
+            list: Value at each rank.
+        """
+        prefixes = [0] * len(ranks)
+        remaining_ranks = list(ranks)
+
+        for shift in range(64 - _DIGIT_BITS, -1, -_DIGIT_BITS):
+            counts = np.zeros((len(ranks), 1 << _DIGIT_BITS), dtype=np.int64)
+            for start, stop in cls.iter_chunks(len(values), chunk_size):
+                keys = cls._to_sortable_keys(values[start:stop])
+                digits = ((keys >> np.uint64(shift)) & _DIGIT_MASK).astype(np.intp)
+                for index, prefix in enumerate(prefixes):
+                    if shift + _DIGIT_BITS < 64:
+                        key_prefixes = keys >> np.uint64(shift + _DIGIT_BITS)
+                        matched = digits[key_prefixes == np.uint64(prefix)]
+                    else:
+                        matched = digits
+                    counts[index] += np.bincount(matched, minlength=1 << _DIGIT_BITS)
+
+            for index in range(len(ranks)):
+                cumulative_counts = np.cumsum(counts[index])
+                digit = int(
+                    np.searchsorted(cumulative_counts, remaining_ranks[index], "right")
+                )
+                if digit:
+                    remaining_ranks[index] -= int(cumulative_counts[digit - 1])
+                prefixes[index] = (prefixes[index] << _DIGIT_BITS) | digit
+
+        return [cls._from_sortable_key(prefix) for prefix in prefixes]
+
+    @classmethod
+    def _find_ties(cls, values, threshold, chunk_size):
+        """
+        Find the rows holding a value.
+
+        Args:
+            values (np.ndarray): Values, usually memory-mapped.
+            threshold (float): Value to look for.
+            chunk_size (int): Number of values read at once.
+
+        Returns:
+            tuple: A tuple containing the ascending list of rows holding the value,
+                the number of smaller values and the number of greater values.
+        """
+        tie_rows = []
+        num_of_lower = 0
+        num_of_greater = 0
+        for start, stop in cls.iter_chunks(len(values), chunk_size):
+            chunk = values[start:stop]
+            tie_rows.extend((np.flatnonzero(chunk == threshold) + start).tolist())
+            num_of_lower += int(np.count_nonzero(chunk < threshold))
+            num_of_greater += int(np.count_nonzero(chunk > threshold))
+
+        return tie_rows, num_of_lower, num_of_greater
+
+    @classmethod
+    def _to_sortable_keys(cls, values):
+        """
+        Map float64 values to uint64 keys with the same order.
+
+        Args:
+            values (np.ndarray): Values, -0.0 is mapped as 0.0.
+
+        Returns:
+            np.ndarray: Keys.
+        """
+        bits = (np.asarray(values, dtype=np.float64) + 0.0).view(np.uint64)
+        negative = (bits & _SIGN_BIT) != 0
+        return np.where(negative, ~bits, bits | _SIGN_BIT)
+
+    @classmethod
+    def _from_sortable_key(cls, key):
+        """
+        Map a key built by `_to_sortable_keys` back to its value.
+
+        Args:
+            key (int): Key.
+
+        Returns:
+            float: Value.
+        """
+        key = np.uint64(key)
+        bits = key & ~_SIGN_BIT if key & _SIGN_BIT else ~key
+        return float(np.array([bits], dtype=np.uint64).view(np.float64)[0])
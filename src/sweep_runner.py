@@ -0,0 +1,149 @@
+"""
+Generate runs from configs given in code, and sweeps over grids of configs.
+
+Usage:
+    python -m src.sweep_runner '{"num_of_rows": [1000, 10000], "degree": [2, 4, 8]}'
+    python -m src.sweep_runner '{"num_of_vars": [5, 10, 20]}' --workers 8 \
+        --master-seed 42 --format parquet
+"""
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config.base import MASTER_SEED, NUM_OF_WORKERS
+from config.logging import set_logger
+from src import main_routine
+from src.generation_config import GenerationConfig
+from src.run_manifest import RunManifest
+
+logger = set_logger()
+
+
+def generate(config=None, seed=None):
+    """
+    Generate the datasets of a run with the settings of a config instead of the
+    config files.
+
+    The run is named after a key hashed from its seed and config, as the runs of a
+    batch, and is skipped if it was already completed.
+
+    Args:
+        config (GenerationConfig, optional): Settings of the run, the ones of the
+            config files if not given.
+        seed (int | np.random.SeedSequence, optional): Seed of every random draw of
+            the run. Fresh entropy is used if not given.
+
+    Returns:
+        str: Execution ID of the run.
+    """
+    config = config or GenerationConfig()
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+
+    with config.apply():
+        exec_id = RunManifest.get_run_key(
+            seed,
+            dataset_format=config.dataset_format,
+            streaming=config.streaming,
+            num_of_polynomials=config.num_of_polynomials,
+        )
+        if RunManifest.is_complete(exec_id):
+            return exec_id
+
+        if config.num_of_polynomials > 1:
+            main_routine.start_multi_polynomial(
+                config.num_of_polynomials, seed, exec_id, config.dataset_format
+            )
+        elif config.streaming:
+            main_routine.start_streaming(
+                seed,
+                exec_id,
+                config.num_of_rows,
+                config.chunk_size,
+                config.dataset_format,
+            )
+        else:
+            main_routine.start(seed, exec_id, config.dataset_format)
+
+    return exec_id
+
+
+def expand_grid(grid, base_config=None):
+    """
+    Build a config for every combination of the values of a grid.
+
+    Args:
+        grid (dict): List of values of each field, or of each key of GRID_ALIASES
+            (num_of_vars, degree, num_of_terms and cardinality).
+        base_config (GenerationConfig, optional): Values of the fields that are not
+            in the grid, the ones of the config files if not given.
+
+    Returns:
+        list: GenerationConfig of each combination, the last field varying fastest.
+    """
+    base_config = base_config or GenerationConfig()
+    names = list(grid)
+    return [
+        base_config.replace(**dict(zip(names, values)))
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+def run_sweep(configs, master_seed=MASTER_SEED, num_of_workers=NUM_OF_WORKERS):
+    """
+    Generate a run for every config, over a pool of processes.
+
+    The processes are started once and generate many runs each, so the cost of
+    starting Python and importing numpy and pandas is paid once per process rather
+    than once per run. Every run is generated from its own child of the master seed,
+    so its content only depends on the master seed, its config and its position in
+    the sweep.
+
+    Args:
+        configs (list): GenerationConfig of each run.
+        master_seed (int, optional): Seed the seeds of the runs are spawned from.
+            Fresh entropy is used if not given.
+        num_of_workers (int): Number of processes to generate the runs on.
+
+    Returns:
+        list: Execution IDs of the runs, in the order of the configs.
+    """
+    master_seed_sequence = np.random.SeedSequence(master_seed)
+    logger.info(f"master seed entropy: {master_seed_sequence.entropy}")
+    seeds = master_seed_sequence.spawn(len(configs))
+
+    if num_of_workers <= 1:
+        return [generate(config, seed) for config, seed in zip(configs, seeds)]
+
+    # hand runs over in batches, so small runs do not wait on inter-process
+    # communication
+    chunksize = max(1, len(configs) // (num_of_workers * 4))
+    with ProcessPoolExecutor(max_workers=num_of_workers) as executor:
+        return list(executor.map(generate, configs, seeds, chunksize=chunksize))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a sweep over a grid.")
+    parser.add_argument(
+        "grid", help="JSON object of the list of values of each config field"
+    )
+    parser.add_argument("--master-seed", type=int, default=MASTER_SEED)
+    parser.add_argument("--workers", type=int, default=NUM_OF_WORKERS)
+    parser.add_argument("--format", dest="dataset_format")
+    args = parser.parse_args(argv)
+
+    base_config = GenerationConfig()
+    if args.dataset_format is not None:
+        base_config = base_config.replace(dataset_format=args.dataset_format)
+    configs = expand_grid(json.loads(args.grid), base_config)
+    exec_ids = run_sweep(configs, args.master_seed, args.workers or os.cpu_count())
+    for config, exec_id in zip(configs, exec_ids):
+        print(json.dumps({"exec_id": exec_id, **config.to_dict()}))
+
+
+if __name__ == "__main__":
+    main()
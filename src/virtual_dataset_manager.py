@@ -0,0 +1,189 @@
+import numpy as np
+
+from config.cat_vars_config import NO_CAT_INSTANCES
+from config.poly_params_config import COMPACT_POLYNOMIAL_METADATA
+from src.categorical_manager import CategoricalManager
+from src.data_manager import DataManager
+from src.polynomial import Polynomial
+from src.services.dataset_configuration_service import TargetType
+
+# Format recorded in the metadata of datasets whose data is not stored.
+VIRTUAL_DATASET_FORMAT = "virtual"
+
+# Child of the run seed the independent variables are drawn from, as in
+# `main_routine._get_child_seed`.
+_INDEPENDENT_VARS_STREAM = 1
+
+
+class VirtualDatasetManager:
+    """
+    Rebuilds datasets from their metadata.
+
+    A dataset is fully determined by the seed of its run, its polynomial, the
+    thresholds of its target and the bin edges of its categorical variables. The
+    metadata records them under "generation", so any dataset, stored or virtual,
+    can be rebuilt, whole or by row range, bit-identical to the stored one.
+    """
+
+    @classmethod
+    def create_generation_params(
+        cls,
+        num_of_rows,
+        polynomial,
+        target_type,
+        thresholds,
+        cardinality,
+        bin_edges,
+        feature_dtype="float64",
+    ):
+        """
+        Describe how to regenerate a dataset.
+
+        Args:
+            num_of_rows (int): Number of rows of the dataset.
+            polynomial (Polynomial): Polynomial of the numerical target.
+            target_type (str): Target type.
+            thresholds (dict): Thresholds of the binary target.
+            cardinality (int): Cardinality of the categorical variables, 0 if the
+                dataset has none.
+            bin_edges (np.ndarray, optional): Bin edges of each categorical variable.
+            feature_dtype (str): dtype the independent variables were drawn with.
+
+        Returns:
+            dict: Generation parameters to store in the metadata.
+        """
+        return {
+            "num_of_rows": num_of_rows,
+            "polynomial": polynomial.to_dict(compact=COMPACT_POLYNOMIAL_METADATA),
+            "target_type": target_type,
+            "target_thresholds": thresholds,
+            "cardinality": cardinality,
+            "cat_bin_edges": bin_edges.tolist() if bin_edges is not None else None,
+            "feature_dtype": feature_dtype,
+        }
+
+    @classmethod
+    def load(cls, metadata, start=0, stop=None):
+        """
+        Rebuild a dataset, or a range of its rows, from its metadata.
+
+        Args:
+            metadata (dict | str): Metadata of the dataset, or path of its file.
+            start (int): First row to rebuild.
+            stop (int, optional): Row after the last row to rebuild. Rows up to the
+                end of the dataset are rebuilt if not given.
+
+        Returns:
+            pd.DataFrame: Rows of the dataset, as they are written to its file.
+        """
+        if isinstance(metadata, str):
+            metadata = DataManager.load_json(metadata)
+        num_of_rows = metadata["generation"]["num_of_rows"]
+        stop = num_of_rows if stop is None else min(stop, num_of_rows)
+        start = min(start, stop)
+
+        return cls.build_rows(metadata, start, stop)
+
+    @classmethod
+    def load_polynomial(cls, metadata):
+        """
+        Load the polynomial of a dataset from its metadata.
+
+        Args:
+            metadata (dict | str): Metadata of the dataset, or path of its file.
+
+        Returns:
+            Polynomial: Polynomial of the numerical target of the dataset.
+        """
+        if isinstance(metadata, str):
+            metadata = DataManager.load_json(metadata)
+        return Polynomial.from_dict(metadata["generation"]["polynomial"])
+
+    @classmethod
+    def compute_target(cls, metadata, independent_vars, start=0, polynomial=None):
+        """
+        Compute the binary target of rows of a dataset from their independent
+        variables.
+
+        Args:
+            metadata (dict | str): Metadata of the dataset, or path of its file.
+            independent_vars (np.ndarray): Matrix of shape (rows, vars) of the
+                independent variables of the rows, before any is made categorical,
+                columns ordered as the variables of the polynomial.
+            start (int): Index of the first row in the dataset, which the target
+                of rows tied at a threshold depends on.
+            polynomial (Polynomial, optional): Polynomial of the dataset, loaded
+                from the metadata if not given.
+
+        Returns:
+            np.ndarray: Binary target of each row.
+        """
+        if isinstance(metadata, str):
+            metadata = DataManager.load_json(metadata)
+        polynomial = polynomial or cls.load_polynomial(metadata)
+        generation = metadata["generation"]
+        apply_target = (
+            DataManager.apply_binary_linear_target
+            if generation["target_type"] == TargetType.LINEAR.value
+            else DataManager.apply_binary_non_linear_target
+        )
+        return apply_target(
+            polynomial.evaluate(independent_vars),
+            generation["target_thresholds"],
+            start,
+        )
+
+    @classmethod
+    def build_rows(cls, metadata, start, stop):
+        """
+        Build a range of rows of a dataset from its metadata.
+
+        Rows past the end of the dataset continue the random stream of its rows,
+        and are labelled with its stored target thresholds and categorical bin
+        edges, which is how a dataset is extended.
+
+        Args:
+            metadata (dict): Metadata of the dataset.
+            start (int): First row to build.
+            stop (int): Row after the last row to build.
+
+        Returns:
+            pd.DataFrame: Rows of the dataset, as they are written to its file.
+        """
+        generation = metadata["generation"]
+        polynomial = cls.load_polynomial(metadata)
+        seed = metadata["seed"]
+        data_seed = np.random.SeedSequence(
+            seed["entropy"],
+            spawn_key=tuple(seed["spawn_key"]) + (_INDEPENDENT_VARS_STREAM,),
+        )
+        independent_vars = DataManager.generate_independent_var_data(
+            polynomial.num_of_vars,
+            data_seed,
+            start,
+            stop,
+            # metadata written before the dtype was configurable is float64
+            generation.get("feature_dtype", "float64"),
+        )
+
+        target = cls.compute_target(metadata, independent_vars, start, polynomial)
+
+        cardinality = generation["cardinality"]
+        cat_vars = metadata["cat_cols"]
+        if cardinality == NO_CAT_INSTANCES or not cat_vars:
+            return DataManager.compose_dataset(
+                independent_vars, polynomial.variables, target
+            )
+
+        cat_codes = CategoricalManager.apply_bin_edges(
+            independent_vars[:, : len(cat_vars)],
+            np.asarray(generation["cat_bin_edges"], dtype=np.float64),
+        )
+        return DataManager.compose_dataset(
+            independent_vars,
+            polynomial.variables,
+            target,
+            cat_vars,
+            cat_codes,
+            metadata["cat_encoding"]["labels"],
+        )
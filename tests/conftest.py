@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+from config.base import PATH_TO_METADATA_FILES, PATH_TO_STORE_GENERATED_DATASETS
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Run a test from an empty directory holding the dataset and metadata
+    directories, so the relative paths of the config files point into it.
+    """
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(PATH_TO_STORE_GENERATED_DATASETS)
+    os.makedirs(PATH_TO_METADATA_FILES)
+    return tmp_path
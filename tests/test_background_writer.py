@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.base import PATH_TO_STORE_GENERATED_DATASETS
+from src.background_writer import BackgroundWriterPool
+from src.dataset_writers import CsvWriter, ShardedWriter
+
+
+class _RecordingWriter:
+    """Writer recording its chunks and the threads it was used from."""
+
+    def __init__(self, delay=0.0, fail_at=None):
+        self.chunks = []
+        self.threads = set()
+        self.closed = False
+        self.delay = delay
+        self.fail_at = fail_at
+
+    def split(self, df):
+        return [(self, df)]
+
+    def get_part_writers(self):
+        return []
+
+    def write(self, df):
+        self.threads.add(threading.get_ident())
+        if len(self.chunks) == self.fail_at:
+            raise ValueError("write failed")
+        time.sleep(self.delay)
+        self.chunks.append(df)
+
+    def close(self):
+        self.threads.add(threading.get_ident())
+        self.closed = True
+
+
+def _read(path):
+    with open(path) as dataset_file:
+        return dataset_file.read()
+
+
+def _chunks(num_of_chunks, rows=10):
+    return [
+        pd.DataFrame({"v1": np.arange(index * rows, (index + 1) * rows)})
+        for index in range(num_of_chunks)
+    ]
+
+
+@pytest.mark.parametrize("num_of_threads", [0, 1, 3])
+def test_chunks_are_written_in_order_by_one_thread(num_of_threads):
+    writers = [_RecordingWriter() for _ in range(5)]
+    chunks = _chunks(20)
+
+    with BackgroundWriterPool(num_of_threads, 2) as pool:
+        for chunk in chunks:
+            for writer in writers:
+                pool.write(writer, chunk)
+        for writer in writers:
+            pool.close_writer(writer)
+
+    for writer in writers:
+        assert writer.closed
+        assert len(writer.threads) == 1
+        assert all(a is b for a, b in zip(writer.chunks, chunks))
+        assert len(writer.chunks) == len(chunks)
+    if num_of_threads == 0:
+        assert writers[0].threads == {threading.get_ident()}
+
+
+def test_queued_chunks_are_bounded():
+    writer = _RecordingWriter(delay=0.01)
+    max_queued_chunks = 2
+    max_pending = 0
+
+    with BackgroundWriterPool(1, max_queued_chunks) as pool:
+        for index, chunk in enumerate(_chunks(20)):
+            pool.write(writer, chunk)
+            max_pending = max(max_pending, index + 1 - len(writer.chunks))
+
+    # the queue, plus the chunk the thread is writing
+    assert max_pending <= max_queued_chunks + 1
+    assert len(writer.chunks) == 20
+
+
+def test_thread_error_is_raised_once():
+    failing = _RecordingWriter(fail_at=2)
+    other = _RecordingWriter()
+    pool = BackgroundWriterPool(2, 1)
+
+    with pytest.raises(ValueError, match="write failed"):
+        for chunk in _chunks(50):
+            pool.write(failing, chunk)
+            pool.write(other, chunk)
+        pool.close()
+
+    pool.close()
+    assert len(failing.chunks) == 2
+    assert not failing.closed
+
+
+def test_csv_written_in_background_matches_to_csv(workdir):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.random((1_000, 4)), columns=["v1", "v2", "v3", "v4"])
+    df["target"] = rng.random(len(df)) < 0.5
+    paths = [os.path.join(PATH_TO_STORE_GENERATED_DATASETS, f"d{i}") for i in range(3)]
+
+    with BackgroundWriterPool(2, 2) as pool:
+        writers = [CsvWriter(path, len(df)) for path in paths]
+        writers.append(
+            ShardedWriter(CsvWriter, f"{paths[0]}_sharded", len(df), shard_rows=300)
+        )
+        for start in range(0, len(df), 128):
+            for writer in writers:
+                pool.write(writer, df.iloc[start : start + 128])
+        for writer in writers:
+            pool.close_writer(writer)
+
+    for writer in writers[:3]:
+        assert _read(writer.path) == df.to_csv(index=False)
+    shards = [f"part-{index:05d}.csv" for index in range(4)]
+    assert sorted(os.listdir(writers[3].path)) == ["manifest.json"] + shards
+    # every shard is a complete CSV file with its own header
+    text = "".join(
+        _read(os.path.join(writers[3].path, shard)).split("\n", 1)[1]
+        for shard in shards
+    )
+    assert df.columns.str.cat(sep=",") + "\n" + text == df.to_csv(index=False)
@@ -0,0 +1,56 @@
+import hashlib
+import os
+import shutil
+
+import pytest
+
+from config.base import PATH_TO_METADATA_FILES, PATH_TO_STORE_GENERATED_DATASETS
+from src import main_routine
+from src.batch_runner import run_batch
+from src.generation_config import GenerationConfig
+
+
+def _hash_outputs():
+    """Hash every dataset and metadata file, by path."""
+    hashes = {}
+    for directory in (PATH_TO_STORE_GENERATED_DATASETS, PATH_TO_METADATA_FILES):
+        for root, _, names in os.walk(directory):
+            for name in names:
+                if name.endswith(".sqlite"):
+                    continue
+                path = os.path.join(root, name)
+                with open(path, "rb") as output_file:
+                    hashes[path] = hashlib.sha256(output_file.read()).hexdigest()
+    return hashes
+
+
+def _clear_outputs():
+    for directory in (PATH_TO_STORE_GENERATED_DATASETS, PATH_TO_METADATA_FILES):
+        shutil.rmtree(directory)
+        os.makedirs(directory)
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_outputs_do_not_depend_on_the_number_of_workers(
+    workdir, monkeypatch, streaming
+):
+    outputs = []
+    for num_of_workers, num_of_writer_threads in [(1, 0), (1, 4), (3, 4)]:
+        _clear_outputs()
+        with monkeypatch.context() as patch:
+            patch.setattr(main_routine, "NUM_OF_WRITER_THREADS", num_of_writer_threads)
+            with GenerationConfig(num_of_rows=400, chunk_size=128).apply():
+                exec_ids = run_batch(
+                    total_datasets=3,
+                    master_seed=42,
+                    num_of_workers=num_of_workers,
+                    streaming=streaming,
+                    dataset_format="csv",
+                    num_of_polynomials=1,
+                )
+        outputs.append((exec_ids, _hash_outputs()))
+
+    assert len(set(outputs[0][0])) == 3
+    assert {os.path.splitext(path)[1] for path in outputs[0][1]} == {".csv", ".json"}
+    assert outputs[1] == outputs[0]
+    assert outputs[2] == outputs[0]
@@ -0,0 +1,120 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.categorical_manager import CategoricalManager
+
+
+def _create_cat_labels_reference(values, cardinality_number):
+    """
+    Label the values of a column as the original row-by-row implementation of
+    `CategoricalManager.create_cat_vars` did.
+    """
+    num_values_to_convert = list(values)
+    num_values_to_convert.sort(reverse=True)
+    total_num_instance_in_each_cat = int(
+        len(num_values_to_convert) / cardinality_number
+    )
+
+    num_to_cat_map = {}
+    counter_group = 1
+    counter_iter = 0
+    for num_instance in num_values_to_convert:
+        counter_iter += 1
+        num_to_cat_map[str(num_instance)] = f"cat_inst_{counter_group}"
+        if counter_iter == total_num_instance_in_each_cat:
+            counter_iter = 0
+            counter_group += 1
+
+    return [num_to_cat_map[str(value)] for value in values]
+
+
+def _create_cat_labels(values, cardinality_number):
+    codes, labels = CategoricalManager.create_cat_codes(
+        values.reshape(-1, 1), cardinality_number
+    )
+    return [labels[code] for code in codes[:, 0]]
+
+
+@pytest.mark.parametrize(
+    "num_of_rows, cardinality_number",
+    [
+        (1_000, 10),  # multiple of the cardinality
+        (1_003, 10),  # not a multiple
+        (23, 10),  # group size 2, many leftover rows
+        (997, 2),
+        (5, 10),  # cardinality greater than the number of rows
+        (10, 10),
+    ],
+)
+def test_labels_match_reference(num_of_rows, cardinality_number):
+    rng = np.random.default_rng(num_of_rows * cardinality_number)
+    values = rng.uniform(0, 1, num_of_rows)
+
+    expected = _create_cat_labels_reference(values, cardinality_number)
+    labels = _create_cat_labels(values, cardinality_number)
+
+    assert labels == expected
+    assert Counter(labels) == Counter(expected)
+
+
+@pytest.mark.parametrize("num_of_rows, cardinality_number", [(1_000, 10), (101, 4)])
+def test_labels_match_reference_with_ties(num_of_rows, cardinality_number):
+    # few distinct values, so many ties fall across group boundaries
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 7, num_of_rows).astype(np.float64)
+
+    assert _create_cat_labels(values, cardinality_number) == (
+        _create_cat_labels_reference(values, cardinality_number)
+    )
+
+
+def test_create_cat_vars_converts_selected_vars():
+    rng = np.random.default_rng(1)
+    vars = [f"v{index + 1}" for index in range(10)]
+    df = pd.DataFrame(rng.uniform(0, 1, (200, len(vars))), columns=vars)
+
+    cat_df, cat_vars = CategoricalManager.create_cat_vars(df, vars, 10)
+
+    assert cat_vars == CategoricalManager.select_cat_vars(vars)
+    for cat_var in cat_vars:
+        assert cat_df[cat_var].astype(str).tolist() == (
+            _create_cat_labels_reference(df[cat_var].to_numpy(), 10)
+        )
+    pd.testing.assert_frame_equal(
+        cat_df.drop(columns=cat_vars), df.drop(columns=cat_vars)
+    )
+
+
+def test_apply_bin_edges_by_chunks_matches_whole_columns():
+    rng = np.random.default_rng(2)
+    values = rng.uniform(0, 1, (1_003, 3))
+    bin_edges = CategoricalManager.compute_bin_edges(values, 10)
+    codes, _ = CategoricalManager.create_cat_codes(values, 10)
+
+    for start in range(0, len(values), 250):
+        np.testing.assert_array_equal(
+            CategoricalManager.apply_bin_edges(values[start : start + 250], bin_edges),
+            codes[start : start + 250],
+        )
+
+
+@pytest.mark.parametrize("num_of_rows, cardinality_number", [(300, 200), (511, 256)])
+def test_codes_do_not_wrap_when_groups_exceed_cardinality(
+    num_of_rows, cardinality_number
+):
+    # groups of int(rows / cardinality) = 1 value give up to 2 * cardinality - 1
+    # groups, more than a dtype sized from the cardinality holds
+    values = np.random.default_rng(3).uniform(0, 1, (num_of_rows, 2))
+
+    codes, labels = CategoricalManager.create_cat_codes(values, cardinality_number)
+
+    assert codes.max() == num_of_rows - 1 == len(labels) - 1
+    assert codes.dtype == np.dtype(
+        CategoricalManager.get_cat_encoding(labels)["code_dtype"]
+    )
+    assert _create_cat_labels(values[:, 0], cardinality_number) == (
+        _create_cat_labels_reference(values[:, 0], cardinality_number)
+    )
@@ -0,0 +1,147 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.base import PATH_TO_METADATA_FILES
+from src.column_statistics import StatisticsCollector
+from src.data_manager import DataManager
+from src.generation_config import GenerationConfig
+from src.sweep_runner import generate
+
+VARS = ["v1", "v2", "v3"]
+QUANTILES = [0.0, 0.1, 0.5, 0.9, 1.0]
+
+
+def _collect(values, codes, target, chunk_size, sample_size=10_000):
+    statistics = StatisticsCollector(
+        VARS, np.random.SeedSequence(0), sample_size, QUANTILES
+    )
+    for start in range(0, len(values), chunk_size):
+        statistics.update_numeric(values[start : start + chunk_size])
+        statistics.update_categorical(10, codes[start : start + chunk_size], 12)
+        statistics.update_target("linear", target[start : start + chunk_size])
+    return statistics
+
+
+def _data(num_of_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.uniform(-1, 1, (num_of_rows, len(VARS))) * [1, 10, 100]
+    codes = rng.integers(0, 11, (num_of_rows, 1)).astype(np.uint8)
+    target = rng.random(num_of_rows) < 0.3
+    return values, codes, target
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1_000])
+def test_statistics_match_whole_columns(chunk_size):
+    values, codes, target = _data(1_000)
+
+    result = _collect(values, codes, target, chunk_size).to_dict(["v1"], 10, "linear")
+
+    assert result["num_of_rows"] == 1_000
+    assert list(result["columns"]) == ["v1", "v2", "v3", "target"]
+    counts = np.bincount(codes[:, 0], minlength=12).tolist()
+    assert result["columns"]["v1"] == {
+        "count": 1_000,
+        "cardinality": 11,
+        "min_category_count": min(counts[:11]),
+        "max_category_count": max(counts),
+        "counts": counts,
+    }
+    positives = int(target.sum())
+    assert result["columns"]["target"] == {
+        "count": 1_000,
+        "negative": 1_000 - positives,
+        "positive": positives,
+        "positive_ratio": positives / 1_000,
+    }
+    for index, var in enumerate(VARS[1:], 1):
+        column = result["columns"][var]
+        assert column["count"] == 1_000
+        assert column["mean"] == pytest.approx(values[:, index].mean())
+        assert column["std"] == pytest.approx(values[:, index].std())
+        assert column["min"] == values[:, index].min()
+        assert column["max"] == values[:, index].max()
+        # the sample holds every row, so the quantiles are exact
+        ranks = np.rint(np.array(QUANTILES) * 999).astype(int)
+        assert list(column["quantiles"].values()) == (
+            np.sort(values[:, index])[ranks].tolist()
+        )
+
+
+def test_statistics_not_collected_are_left_out():
+    values, codes, target = _data(100)
+
+    result = _collect(values, codes, target, 50).to_dict([], None, "non_linear")
+
+    assert list(result["columns"]) == VARS
+
+
+def test_update_rows_collects_a_dataset():
+    values, codes, target = _data(200)
+    df = pd.DataFrame(values, columns=VARS)
+    df["v1"] = pd.Categorical.from_codes(codes[:, 0], [f"c{i}" for i in range(12)])
+    df["target"] = target
+    statistics = StatisticsCollector(VARS[1:], quantiles=QUANTILES)
+
+    statistics.update_rows(df, ["v1"])
+
+    result = statistics.to_dict(["v1"], None, "target")
+    assert result["columns"]["v1"]["counts"] == (
+        np.bincount(codes[:, 0], minlength=12).tolist()
+    )
+    assert result["columns"]["target"]["positive"] == int(target.sum())
+    assert result["columns"]["v2"]["mean"] == pytest.approx(values[:, 1].mean())
+
+
+def test_merge_matches_statistics_of_all_rows():
+    values, codes, target = _data(20_000)
+    split = 6_000
+
+    def statistics(start, stop):
+        return _collect(
+            values[start:stop], codes[start:stop], target[start:stop], 1_000
+        ).to_dict(["v1"], 10, "linear")
+
+    merged = StatisticsCollector.merge(statistics(0, split), statistics(split, None))
+    expected = statistics(0, None)
+
+    assert merged["num_of_rows"] == expected["num_of_rows"]
+    assert merged["columns"]["v1"] == expected["columns"]["v1"]
+    assert merged["columns"]["target"] == expected["columns"]["target"]
+    for var in VARS[1:]:
+        column, expected_column = merged["columns"][var], expected["columns"][var]
+        for name in ("count", "min", "max"):
+            assert column[name] == expected_column[name]
+        for name in ("mean", "std"):
+            assert column[name] == pytest.approx(expected_column[name])
+        # quantiles are interpolated, within a fraction of the range
+        spread = expected_column["max"] - expected_column["min"]
+        for quantile, value in column["quantiles"].items():
+            assert value == pytest.approx(
+                expected_column["quantiles"][quantile], abs=0.02 * spread
+            )
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_metadata_statistics_match_the_datasets(workdir, streaming):
+    exec_id = generate(
+        GenerationConfig(num_of_rows=400, streaming=streaming, chunk_size=128),
+        seed=3,
+    )
+    paths = glob.glob(os.path.join(PATH_TO_METADATA_FILES, f"*{exec_id}*.json"))
+    assert paths
+    for metadata in map(DataManager.load_json, paths):
+        df = pd.read_csv(metadata["relative_path_to_dataset"])
+        columns = metadata["statistics"]["columns"]
+
+        assert metadata["statistics"]["num_of_rows"] == len(df)
+        for column in metadata["num_cols"]:
+            assert columns[column]["mean"] == pytest.approx(df[column].mean())
+            assert columns[column]["min"] == pytest.approx(df[column].min())
+        for column in metadata["cat_cols"]:
+            assert columns[column]["count"] == len(df)
+            assert columns[column]["cardinality"] == df[column].nunique()
+        assert columns["target"]["positive"] == int(df["target"].sum())
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.csv_formatter import CsvFormatter
+
+
+def _values(precision, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.concatenate(
+        [
+            # one more decimal than printed, so many values are close to a half
+            np.round(rng.uniform(-100, 100, 20_000), precision + 1),
+            rng.normal(size=10_000) * 10.0 ** rng.integers(-6, 9, 10_000),
+            [0.615, -0.615, 2.5, 0.5, -0.5, -0.001, 1e15, 0.0, -0.0, 5e-324],
+        ]
+    )
+
+
+@pytest.mark.parametrize("precision", [0, 1, 2, 3, 6])
+def test_fixed_precision_matches_printf(precision):
+    values = _values(precision)
+    df = pd.DataFrame({"v1": values, "v2": values[::-1]})
+
+    text = CsvFormatter(float_precision=precision).format_rows(df)
+
+    expected = "".join(
+        f"{'%.*f' % (precision, v1)},{'%.*f' % (precision, v2)}\n"
+        for v1, v2 in zip(df["v1"], df["v2"])
+    )
+    assert text == expected.encode()
+
+
+def test_full_precision_matches_to_csv():
+    rng = np.random.default_rng(1)
+    values = _values(2)
+    df = pd.DataFrame(
+        {
+            "v1": values,
+            "v2": rng.integers(-1_000, 1_000, len(values)),
+            "target": rng.random(len(values)) < 0.5,
+        }
+    )
+    df["cat"] = pd.Categorical(
+        rng.choice(["cat_inst_1", "cat_inst_2", "cat_inst_3"], len(df))
+    )
+
+    formatter = CsvFormatter(num_of_workers=3, block_size=7_000)
+    try:
+        text = formatter.format_header(df.columns) + formatter.format_rows(df)
+    finally:
+        formatter.close()
+
+    assert text == df.to_csv(index=False).encode()
+
+
+@pytest.mark.parametrize("precision", [None, 3])
+def test_columns_the_fast_path_skips_match_to_csv(precision):
+    df = pd.DataFrame(
+        {
+            "v1": [0.5, np.nan, np.inf, -1.25],
+            "text": ["a", "b,c", 'd"e', "f\ng"],
+        }
+    )
+    float_format = None if precision is None else f"%.{precision}f"
+
+    text = CsvFormatter(float_precision=precision).format_rows(df)
+
+    expected = df.to_csv(index=False, header=False, float_format=float_format)
+    assert text == expected.encode()
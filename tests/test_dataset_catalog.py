@@ -0,0 +1,75 @@
+import glob
+import os
+import sqlite3
+
+import pytest
+
+from config.base import PATH_TO_CATALOG, PATH_TO_METADATA_FILES
+from src.data_manager import DataManager
+from src.dataset_catalog import DatasetCatalog
+from src.generation_config import GenerationConfig
+from src.sweep_runner import generate
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """Record the connections opened to SQLite databases."""
+    opened = []
+    connect = sqlite3.connect
+
+    def record(*args, **kwargs):
+        connection = connect(*args, **kwargs)
+        opened.append(connection)
+        return connection
+
+    monkeypatch.setattr(sqlite3, "connect", record)
+    return opened
+
+
+def _assert_closed(connections):
+    assert connections
+    for connection in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
+
+
+def test_generated_datasets_are_indexed(workdir):
+    exec_id = generate(GenerationConfig(num_of_rows=200), seed=7)
+    paths = glob.glob(os.path.join(PATH_TO_METADATA_FILES, f"*{exec_id}*.json"))
+    catalog = DatasetCatalog(PATH_TO_CATALOG)
+
+    names = [row["dataset_name"] for row in catalog.query()]
+
+    assert names == sorted(
+        DataManager.load_json(path)["dataset_name"] for path in paths
+    )
+    assert catalog.get(names[0]) == DataManager.load_json(
+        os.path.join(PATH_TO_METADATA_FILES, f"{names[0]}.json")
+    )
+    assert catalog.rebuild() == len(names)
+    assert catalog.query(cardinality=-1) == []
+
+
+def test_connections_are_closed(workdir, connections):
+    generate(GenerationConfig(num_of_rows=200), seed=7)
+    catalog = DatasetCatalog(PATH_TO_CATALOG)
+    catalog.rebuild()
+    catalog.get(catalog.query(limit=1)[0]["dataset_name"])
+
+    _assert_closed(connections)
+
+
+def test_failed_transaction_is_rolled_back_and_closed(workdir, connections):
+    generate(GenerationConfig(num_of_rows=200), seed=7)
+    catalog = DatasetCatalog(PATH_TO_CATALOG)
+    num_of_datasets = len(catalog.query())
+
+    with pytest.raises(KeyError):
+        catalog.add([{}])
+    with pytest.raises(KeyError):
+        with catalog._connect() as connection:
+            connection.execute("DELETE FROM datasets")
+            raise KeyError("abort")
+
+    assert len(catalog.query()) == num_of_datasets
+    _assert_closed(connections)
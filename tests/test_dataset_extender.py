@@ -0,0 +1,202 @@
+import glob
+import gzip
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.base import (
+    PATH_TO_CATALOG,
+    PATH_TO_METADATA_FILES,
+    PATH_TO_STORE_GENERATED_DATASETS,
+)
+from src import main_routine
+from src.data_manager import DataManager
+from src.dataset_catalog import DatasetCatalog
+from src.dataset_extender import DatasetExtender
+from src.dataset_writers import CsvWriter, NpyWriter
+from src.generation_config import GenerationConfig
+from src.run_manifest import RunManifest
+from src.sweep_runner import generate
+from src.virtual_dataset_manager import VirtualDatasetManager
+
+NUM_OF_ROWS = 400
+NUM_OF_NEW_ROWS = 300
+FORMATS = [
+    ("csv", None),
+    ("csv", "gzip"),
+    ("csv", "zstd"),
+    ("parquet", None),
+    ("feather", None),
+    ("npy", None),
+]
+
+
+def _generate(monkeypatch, dataset_format, compression=None):
+    """Generate a run and return its execution ID and metadata paths."""
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    if dataset_format in ("parquet", "feather"):
+        pytest.importorskip("pyarrow")
+    with monkeypatch.context() as patch:
+        if compression is not None:
+            patch.setattr(
+                main_routine,
+                "create_dataset_writer",
+                lambda file_format, path, num_of_rows: CsvWriter(
+                    path, num_of_rows, compression=compression
+                ),
+            )
+        exec_id = generate(
+            GenerationConfig(num_of_rows=NUM_OF_ROWS, dataset_format=dataset_format),
+            seed=3,
+        )
+    paths = sorted(glob.glob(os.path.join(PATH_TO_METADATA_FILES, f"*{exec_id}*.json")))
+    assert paths
+    return exec_id, paths
+
+
+def _read(metadata):
+    """Read a stored dataset as CSV text or a DataFrame."""
+    path = metadata["relative_path_to_dataset"]
+    file_format = metadata["dataset_format"]
+    if file_format == "csv":
+        compression = metadata["format_options"]["compression"]
+        with open(path, "rb") as dataset_file:
+            data = dataset_file.read()
+        if compression == "gzip":
+            data = gzip.decompress(data)
+        elif compression == "zstd":
+            import zstandard
+
+            reader = zstandard.ZstdDecompressor().stream_reader(
+                data, read_across_frames=True
+            )
+            data = reader.read()
+        return data.decode()
+    if file_format == "parquet":
+        return pd.read_parquet(path)
+    if file_format == "feather":
+        return pd.read_feather(path)
+
+    with open(os.path.join(path, "columns.json")) as columns_file:
+        columns = json.load(columns_file)["columns"]
+    return pd.DataFrame(
+        {column: np.load(os.path.join(path, f"{column}.npy")) for column in columns}
+    )
+
+
+def _rebuild(metadata):
+    """Rebuild a dataset from its metadata, as `_read` reads it."""
+    df = VirtualDatasetManager.load(metadata)
+    if metadata["dataset_format"] == "csv":
+        return df.to_csv(index=False)
+    if metadata["dataset_format"] == "npy":
+        return pd.DataFrame(
+            {column: NpyWriter._column_values(df[column]) for column in df.columns}
+        )
+    return df
+
+
+def _head(dataset, num_of_rows):
+    if isinstance(dataset, str):
+        return "".join(dataset.splitlines(keepends=True)[: num_of_rows + 1])
+    return dataset.iloc[:num_of_rows]
+
+
+def _assert_equal(dataset, expected):
+    if isinstance(dataset, str):
+        assert dataset == expected
+    else:
+        pd.testing.assert_frame_equal(dataset, expected, check_categorical=False)
+
+
+@pytest.mark.parametrize("dataset_format, compression", FORMATS)
+def test_extended_dataset_is_a_generation_of_all_rows(
+    workdir, monkeypatch, dataset_format, compression
+):
+    exec_id, paths = _generate(monkeypatch, dataset_format, compression)
+    stored = {path: _read(DataManager.load_json(path)) for path in paths}
+
+    for path in paths:
+        metadata = DatasetExtender.extend(path, NUM_OF_NEW_ROWS, chunk_size=128)
+
+        assert metadata == DataManager.load_json(path)
+        if compression is not None:
+            assert metadata["format_options"]["compression"] == compression
+        assert metadata["generation"]["num_of_rows"] == NUM_OF_ROWS + NUM_OF_NEW_ROWS
+        extended = _read(metadata)
+        # the stored rows are kept, and the new rows continue them as a
+        # generation of every row with the stored thresholds and bin edges would
+        _assert_equal(_head(extended, NUM_OF_ROWS), stored[path])
+        _assert_equal(extended, _rebuild(metadata))
+
+    assert RunManifest.is_complete(exec_id)
+    # the temporary files of the extended datasets are gone
+    assert not glob.glob(os.path.join(PATH_TO_STORE_GENERATED_DATASETS, "*.tmp"))
+
+
+def test_statistics_catalog_and_manifest_are_updated(workdir, monkeypatch):
+    exec_id, paths = _generate(monkeypatch, "csv")
+    total_num_of_rows = NUM_OF_ROWS + NUM_OF_NEW_ROWS
+
+    for path in paths:
+        metadata = DatasetExtender.extend(path, NUM_OF_NEW_ROWS, chunk_size=128)
+        df = VirtualDatasetManager.load(metadata)
+        columns = metadata["statistics"]["columns"]
+
+        assert metadata["statistics"]["num_of_rows"] == total_num_of_rows
+        for column in metadata["cat_cols"]:
+            assert columns[column]["count"] == total_num_of_rows
+            assert columns[column]["counts"] == (
+                df[column].cat.codes.value_counts().sort_index().tolist()
+            )
+        for column in set(metadata["num_cols"]) - set(metadata["cat_cols"]):
+            assert columns[column]["count"] == total_num_of_rows
+            assert columns[column]["mean"] == pytest.approx(df[column].mean())
+            assert columns[column]["std"] == pytest.approx(df[column].std(ddof=0))
+            assert columns[column]["min"] == df[column].min()
+            assert columns[column]["max"] == df[column].max()
+        assert columns["target"]["positive"] == int(df["target"].sum())
+        assert columns["target"]["negative"] == int((~df["target"]).sum())
+
+        indexed = DatasetCatalog(PATH_TO_CATALOG).get(metadata["dataset_name"])
+        assert indexed["generation"]["num_of_rows"] == total_num_of_rows
+
+    assert {row["num_of_rows"] for row in DatasetCatalog(PATH_TO_CATALOG).query()} == {
+        total_num_of_rows
+    }
+    manifest = DataManager.load_json(RunManifest.get_path(exec_id))
+    for file in manifest["files"]:
+        assert file["bytes"] == os.path.getsize(file["path"])
+    assert RunManifest.is_complete(exec_id)
+
+
+def test_virtual_dataset_is_extended_in_its_metadata(workdir, monkeypatch):
+    _, paths = _generate(monkeypatch, "virtual")
+
+    for path in paths:
+        stored = VirtualDatasetManager.load(path)
+
+        metadata = DatasetExtender.extend(path, NUM_OF_NEW_ROWS)
+
+        extended = VirtualDatasetManager.load(path)
+        assert len(extended) == NUM_OF_ROWS + NUM_OF_NEW_ROWS
+        pd.testing.assert_frame_equal(extended.iloc[:NUM_OF_ROWS], stored)
+        assert metadata["statistics"]["num_of_rows"] == len(extended)
+    assert os.listdir(PATH_TO_STORE_GENERATED_DATASETS) == ["manifests"]
+
+
+@pytest.mark.parametrize("num_of_new_rows", [0, -1, 1.5, 2.0, "10", True])
+def test_invalid_numbers_of_rows_are_rejected(workdir, monkeypatch, num_of_new_rows):
+    _, paths = _generate(monkeypatch, "csv")
+    files = sorted(os.listdir(PATH_TO_STORE_GENERATED_DATASETS))
+    metadata = DataManager.load_json(paths[0])
+
+    with pytest.raises(ValueError, match="positive integer"):
+        DatasetExtender.extend(paths[0], num_of_new_rows)
+
+    assert sorted(os.listdir(PATH_TO_STORE_GENERATED_DATASETS)) == files
+    assert DataManager.load_json(paths[0]) == metadata
@@ -0,0 +1,151 @@
+import glob
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.base import PATH_TO_METADATA_FILES, PATH_TO_STORE_GENERATED_DATASETS
+from src import main_routine
+from src.data_manager import DataManager
+from src.generation_config import GenerationConfig
+from src.sweep_runner import generate
+from src.virtual_dataset_manager import VirtualDatasetManager
+
+NUM_OF_ROWS = 2_000
+
+
+def _load_metadata(exec_id, variant="*"):
+    paths = glob.glob(
+        os.path.join(PATH_TO_METADATA_FILES, f"*{exec_id}_{variant}.json")
+    )
+    assert paths
+    return [DataManager.load_json(path) for path in sorted(paths)]
+
+
+def _load_npy(metadata):
+    path = metadata["relative_path_to_dataset"]
+    columns = DataManager.load_json(os.path.join(path, "columns.json"))["columns"]
+    return {column: np.load(os.path.join(path, f"{column}.npy")) for column in columns}
+
+
+def _numeric_features(metadata, columns):
+    """Matrix of the features of a dataset without categorical attributes."""
+    return np.column_stack([columns[var] for var in metadata["num_cols"]])
+
+
+def _hash_outputs():
+    """Hash every dataset and metadata file, by path."""
+    hashes = {}
+    for directory in (PATH_TO_STORE_GENERATED_DATASETS, PATH_TO_METADATA_FILES):
+        for root, _, names in os.walk(directory):
+            for name in names:
+                if name.endswith(".sqlite"):
+                    continue
+                path = os.path.join(root, name)
+                with open(path, "rb") as output_file:
+                    hashes[path] = hashlib.sha256(output_file.read()).hexdigest()
+    return hashes
+
+
+def test_float32_datasets_store_float32_features(workdir):
+    exec_id = generate(
+        GenerationConfig(
+            num_of_rows=NUM_OF_ROWS, feature_dtype="float32", dataset_format="npy"
+        ),
+        seed=3,
+    )
+
+    for metadata in _load_metadata(exec_id):
+        columns = _load_npy(metadata)
+        assert metadata["generation"]["feature_dtype"] == "float32"
+        for var in set(metadata["num_cols"]) - set(metadata["cat_cols"]):
+            assert columns[var].dtype == np.float32
+        assert columns["target"].dtype == bool
+        assert columns["target"].sum() == NUM_OF_ROWS // 2
+
+    # the targets are the ones of the float32 features, evaluated in float64
+    for metadata in _load_metadata(exec_id, "*_no_categorical_attributes"):
+        columns = _load_npy(metadata)
+        features = _numeric_features(metadata, columns)
+        np.testing.assert_array_equal(
+            VirtualDatasetManager.compute_target(metadata, features.astype(np.float64)),
+            columns["target"],
+        )
+
+
+def test_float32_parquet_columns_are_float32(workdir):
+    pytest.importorskip("pyarrow")
+    exec_id = generate(
+        GenerationConfig(
+            num_of_rows=NUM_OF_ROWS, feature_dtype="float32", dataset_format="parquet"
+        ),
+        seed=3,
+    )
+
+    for metadata in _load_metadata(exec_id, "*_no_categorical_attributes"):
+        df = pd.read_parquet(metadata["relative_path_to_dataset"])
+        assert set(df[metadata["num_cols"]].dtypes) == {np.dtype(np.float32)}
+
+
+def test_float32_features_keep_the_targets_of_float64(workdir):
+    exec_id = generate(
+        GenerationConfig(num_of_rows=NUM_OF_ROWS, dataset_format="npy"), seed=3
+    )
+
+    for metadata in _load_metadata(exec_id, "*_no_categorical_attributes"):
+        columns = _load_npy(metadata)
+        features = _numeric_features(metadata, columns)
+        assert features.dtype == np.float64
+
+        num_target = VirtualDatasetManager.load_polynomial(metadata).evaluate(features)
+        rounded_num_target = VirtualDatasetManager.load_polynomial(metadata).evaluate(
+            features.astype(np.float32)
+        )
+        rounded_target = VirtualDatasetManager.compute_target(
+            metadata, features.astype(np.float32).astype(np.float64)
+        )
+
+        scale = np.abs(num_target).max()
+        np.testing.assert_allclose(
+            rounded_num_target, num_target, rtol=1e-4, atol=1e-6 * scale
+        )
+        # only rows within the rounding error of a threshold change class
+        assert np.mean(rounded_target != columns["target"]) <= 0.01
+
+
+@pytest.mark.parametrize("num_of_polynomials", [1, 2])
+def test_memmap_features_equal_in_memory_features(
+    workdir, monkeypatch, num_of_polynomials
+):
+    config = GenerationConfig(
+        num_of_rows=NUM_OF_ROWS, num_of_polynomials=num_of_polynomials
+    )
+    exec_id = generate(config, seed=3)
+    in_memory = _hash_outputs()
+    for directory in (PATH_TO_STORE_GENERATED_DATASETS, PATH_TO_METADATA_FILES):
+        shutil.rmtree(directory)
+        os.makedirs(directory)
+
+    temporary_files = []
+    create_temporary_file = tempfile.TemporaryFile
+
+    def record(**kwargs):
+        temporary_files.append(create_temporary_file(**kwargs))
+        return temporary_files[-1]
+
+    monkeypatch.setattr(main_routine, "MEMMAP_FEATURES", True)
+    monkeypatch.setattr(main_routine.tempfile, "TemporaryFile", record)
+
+    assert generate(config, seed=3) == exec_id
+
+    assert len(temporary_files) == 1
+    assert _hash_outputs() == in_memory
+    # the file holding the features is gone once the run is done
+    assert all(temporary_file.closed for temporary_file in temporary_files)
+    assert not any(
+        name.startswith("tmp") for name in os.listdir(PATH_TO_STORE_GENERATED_DATASETS)
+    )
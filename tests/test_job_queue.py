@@ -0,0 +1,183 @@
+import glob
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import poly_params_config
+from config.base import PATH_TO_METADATA_FILES, PATH_TO_STORE_GENERATED_DATASETS
+from src import job_queue, main_routine, run_manifest
+from src.data_manager import DataManager
+from src.dataset_writers import create_dataset_writer
+from src.generation_config import GenerationConfig
+from src.job_queue import DONE, FAILED, PENDING, RUNNING, JobQueue
+from src.run_cancellation import RunCancelled, cancellable
+from src.run_manifest import RunManifest
+from src.streaming_manager import StreamingManager
+from src.sweep_runner import generate
+
+
+def _spec(exec_id):
+    return {"exec_id": exec_id}
+
+
+def _job_spec(config, seed):
+    with config.apply():
+        exec_id = RunManifest.get_run_key(
+            seed,
+            dataset_format=config.dataset_format,
+            streaming=config.streaming,
+            num_of_polynomials=config.num_of_polynomials,
+        )
+    return job_queue.create_spec(seed, exec_id, config)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite"), max_attempts=2)
+
+
+def test_enqueue_skips_queued_runs(queue):
+    assert queue.enqueue([_spec("a"), _spec("b")]) == 2
+    assert queue.enqueue([_spec("b"), _spec("c")]) == 1
+    assert queue.get_counts() == {PENDING: 3, RUNNING: 0, DONE: 0, FAILED: 0}
+
+
+def test_claim_complete_and_fail(queue):
+    queue.enqueue([_spec("a"), _spec("b")])
+
+    first = queue.claim("worker")
+    second = queue.claim("worker")
+    assert [first["exec_id"], second["exec_id"]] == ["a", "b"]
+    assert queue.claim("worker") is None
+
+    assert queue.complete(first)
+    assert queue.fail(second, "error")
+    assert queue.get_counts() == {PENDING: 1, RUNNING: 0, DONE: 1, FAILED: 0}
+
+    second = queue.claim("worker")
+    assert second["attempts"] == 2
+    assert queue.fail(second, "error")
+    assert queue.get_failed() == [
+        {"exec_id": "b", "worker": "worker", "attempts": 2, "error": "error"}
+    ]
+
+
+def test_expired_lease_is_claimed_again(queue):
+    queue.enqueue([_spec("a")])
+    lost = queue.claim("first", lease_seconds=-1)
+
+    reclaimed = queue.claim("second")
+
+    assert reclaimed["exec_id"] == "a"
+    assert reclaimed["lease_token"] != lost["lease_token"]
+    assert not queue.renew(lost)
+    assert not queue.complete(lost)
+    assert queue.complete(reclaimed)
+
+
+def test_connections_are_closed(queue, monkeypatch):
+    opened = []
+    connect = sqlite3.connect
+
+    def record(*args, **kwargs):
+        connection = connect(*args, **kwargs)
+        opened.append(connection)
+        return connection
+
+    monkeypatch.setattr(sqlite3, "connect", record)
+    queue.enqueue([_spec("a")])
+    queue.complete(queue.claim("worker"))
+    queue.get_counts()
+    queue.get_failed()
+
+    assert opened
+    for connection in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
+
+
+def test_tmp_paths_are_unique():
+    assert DataManager.get_tmp_path("a.csv") != DataManager.get_tmp_path("a.csv")
+
+
+@pytest.mark.parametrize("file_format", ["csv", "npy"])
+def test_cancelled_writer_publishes_nothing(workdir, file_format):
+    cancel_event = threading.Event()
+    path = os.path.join(PATH_TO_STORE_GENERATED_DATASETS, "dataset")
+    df = pd.DataFrame({"v1": np.arange(10.0), "target": np.arange(10) % 2 == 0})
+
+    with cancellable(cancel_event):
+        with pytest.raises(RunCancelled):
+            with create_dataset_writer(file_format, path, len(df)) as writer:
+                writer.write(df)
+                cancel_event.set()
+
+    assert os.listdir(PATH_TO_STORE_GENERATED_DATASETS) == []
+
+
+def test_cancelled_run_stops_at_next_chunk(workdir):
+    cancel_event = threading.Event()
+    cancel_event.set()
+
+    with cancellable(cancel_event):
+        with pytest.raises(RunCancelled):
+            generate(GenerationConfig(num_of_rows=200), seed=7)
+
+    assert os.listdir(PATH_TO_STORE_GENERATED_DATASETS) == []
+    # the cancellation only applies to the run of the block
+    generate(GenerationConfig(num_of_rows=200), seed=7)
+
+
+def test_lost_lease_cancels_the_run(workdir, queue, monkeypatch):
+    chunks = []
+
+    def routine(seed, exec_id):
+        for chunk in StreamingManager.iter_chunks(100, 1):
+            if not chunks:
+                # another worker takes the job over
+                with sqlite3.connect(queue.path) as connection:
+                    connection.execute("UPDATE jobs SET lease_token = 'other'")
+                connection.close()
+            chunks.append(chunk)
+            time.sleep(0.05)
+
+    monkeypatch.setattr(job_queue, "get_routine", lambda *args: routine)
+    queue.enqueue([_job_spec(GenerationConfig(), np.random.SeedSequence(1))])
+
+    with pytest.raises(RunCancelled):
+        job_queue._run_job(queue, queue.claim("worker", 0.3), 0.3)
+
+    assert 0 < len(chunks) < 100
+
+
+def test_worker_generates_with_the_queued_config(workdir, queue, monkeypatch):
+    spec = _job_spec(GenerationConfig(num_of_rows=200), np.random.SeedSequence(1))
+    queue.enqueue([spec])
+    # the config files of the worker ask for other runs
+    monkeypatch.setattr(poly_params_config, "NUMBER_OF_INSTANCES", 400)
+    monkeypatch.setattr(main_routine, "NUMBER_OF_INSTANCES", 400)
+
+    assert job_queue.run_worker(queue, "worker") == 1
+
+    paths = glob.glob(os.path.join(PATH_TO_METADATA_FILES, f"*{spec['exec_id']}*"))
+    assert paths
+    for metadata in map(DataManager.load_json, paths):
+        assert metadata["generation"]["num_of_rows"] == 200
+    assert RunManifest.is_complete(spec["exec_id"])
+
+
+def test_worker_with_other_settings_fails_the_job(workdir, queue, monkeypatch):
+    queue.enqueue([_job_spec(GenerationConfig(), np.random.SeedSequence(1))])
+    # an output setting the job does not carry differs on the worker
+    monkeypatch.setattr(run_manifest, "CSV_FLOAT_PRECISION", 3)
+
+    assert job_queue.run_worker(queue, "worker") == 0
+
+    assert queue.get_counts()[FAILED] == 1
+    assert "differs on this worker" in queue.get_failed()[0]["error"]
+    assert os.listdir(PATH_TO_STORE_GENERATED_DATASETS) == []
@@ -0,0 +1,83 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+
+from config.base import PATH_TO_METADATA_FILES
+from src import main_routine
+from src.data_manager import DataManager
+from src.generation_config import GenerationConfig
+from src.polynomial import COMPACT_ENCODING, Polynomial
+from src.sweep_runner import generate
+from src.virtual_dataset_manager import VirtualDatasetManager
+
+
+def _load_metadata(exec_id):
+    paths = glob.glob(os.path.join(PATH_TO_METADATA_FILES, f"*{exec_id}*.json"))
+    assert paths
+    return [DataManager.load_json(path) for path in paths]
+
+
+@pytest.mark.parametrize(
+    "streaming, num_of_polynomials", [(False, 1), (True, 1), (False, 2)]
+)
+def test_expression_is_only_built_when_stored(
+    workdir, monkeypatch, streaming, num_of_polynomials
+):
+    expressions = []
+    to_string_expression = Polynomial.to_string_expression
+
+    def record(polynomial):
+        expressions.append(to_string_expression(polynomial))
+        return expressions[-1]
+
+    monkeypatch.setattr(Polynomial, "to_string_expression", record)
+    config = GenerationConfig(
+        num_of_rows=200, streaming=streaming, num_of_polynomials=num_of_polynomials
+    )
+
+    with monkeypatch.context() as patch:
+        patch.setattr(main_routine, "STORE_POLYNOMIAL_EXPRESSION", False)
+        exec_id = generate(config, seed=3)
+    assert expressions == []
+    assert all(metadata["desc"] is None for metadata in _load_metadata(exec_id))
+
+    exec_id = generate(config, seed=4)
+    assert len(expressions) == num_of_polynomials
+    assert {metadata["desc"] for metadata in _load_metadata(exec_id)} <= {
+        f"polynomial expression: {expression}" for expression in expressions
+    }
+
+
+def test_compact_metadata_matches_the_stored_expression(workdir):
+    data = np.random.default_rng(0).uniform(-1, 1, (100, 34))
+
+    exec_id = generate(GenerationConfig(num_of_rows=200), seed=3)
+
+    for metadata in _load_metadata(exec_id):
+        assert metadata["generation"]["polynomial"]["encoding"] == COMPACT_ENCODING
+        polynomial = VirtualDatasetManager.load_polynomial(metadata)
+        expression = metadata["desc"].removeprefix("polynomial expression: ")
+        variables = {
+            var: data[:, index] for index, var in enumerate(polynomial.variables)
+        }
+        expected = eval(expression, {}, variables)
+        np.testing.assert_allclose(
+            polynomial.evaluate(data[:, : polynomial.num_of_vars]),
+            expected,
+            rtol=1e-12,
+            atol=1e-12,
+        )
+
+
+def test_logged_degree_is_the_largest_exponent(caplog):
+    with caplog.at_level("INFO", logger="basic_logger"):
+        polynomial = main_routine._create_polynomial(np.random.SeedSequence(3))
+
+    message = caplog.records[-1].getMessage()
+    assert message == (
+        f"polynomial of {polynomial.num_of_terms} terms, "
+        f"degree {polynomial.term_exponents.max()} "
+        f"and total degree {polynomial.term_degrees.max()}"
+    )
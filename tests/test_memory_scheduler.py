@@ -0,0 +1,52 @@
+import pytest
+
+from src.cost_model import CostModel
+from src.generation_config import GenerationConfig
+from src.memory_scheduler import parse_bytes, plan_run
+
+BUDGET = 8 * 2**30
+
+
+@pytest.mark.parametrize("dataset_format", ["csv", "npy"])
+def test_streaming_fits_a_budget_eager_does_not(dataset_format):
+    config = GenerationConfig(num_of_rows=100_000_000, dataset_format=dataset_format)
+    model = CostModel()
+
+    eager = model.estimate(config)
+    streaming = model.estimate(config.replace(streaming=True))
+
+    assert eager.peak_bytes > BUDGET
+    assert streaming.peak_bytes <= BUDGET
+
+
+def test_streaming_memory_is_bounded_by_the_chunks():
+    model = CostModel()
+    small, large = (
+        model.estimate(GenerationConfig(num_of_rows=num_of_rows, streaming=True))
+        for num_of_rows in (100_000_000, 1_000_000_000)
+    )
+
+    assert large.peak_bytes == small.peak_bytes
+
+
+def test_plan_run_switches_to_streaming():
+    config = GenerationConfig(num_of_rows=1_000_000_000)
+
+    planned, estimate = plan_run(config, BUDGET)
+
+    assert planned.streaming
+    assert estimate.peak_bytes <= BUDGET
+    assert plan_run(GenerationConfig(num_of_rows=1_000), BUDGET)[0] == (
+        GenerationConfig(num_of_rows=1_000)
+    )
+
+
+def test_plan_run_rejects_runs_that_never_fit():
+    with pytest.raises(ValueError):
+        plan_run(GenerationConfig(num_of_rows=1_000_000_000), 2**20)
+
+
+def test_parse_bytes():
+    assert parse_bytes("8GiB") == BUDGET
+    assert parse_bytes("4 GB") == 4 * 10**9
+    assert parse_bytes(1024) == 1024
@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+
+from src.data_manager import DataManager
+from src.generate_polynomial_svc import GeneratePolynomialSvc
+from src.polynomial import Polynomial, evaluate_polynomials
+
+NUM_OF_ROWS = 1_000
+
+
+def _create_polynomial(seed, max_num_of_vars_in_terms):
+    rng = np.random.default_rng(seed)
+    num_of_vars, num_of_terms, coefficients = GeneratePolynomialSvc.define_params(
+        5, 34, 13, -10, 10, rng
+    )
+    return GeneratePolynomialSvc.create_polynomial(
+        num_of_vars, 0, 11, num_of_terms, coefficients, rng, max_num_of_vars_in_terms
+    )
+
+
+def _dense_expression(polynomial):
+    """Build the expression of the string generator, every variable in every term."""
+    return " + ".join(
+        " * ".join(
+            [f"{coefficient}"]
+            + [
+                f"({var}**{exponent})"
+                for var, exponent in zip(polynomial.variables, row)
+            ]
+        )
+        for coefficient, row in zip(polynomial.coefficients, polynomial.exponents)
+    )
+
+
+def _eval(expression, variables, data):
+    """Evaluate an expression as the string evaluator did."""
+    return eval(
+        expression, {var: data[:, index] for index, var in enumerate(variables)}
+    )
+
+
+def _data(polynomial, seed, dtype=np.float64):
+    return DataManager.generate_independent_var_data(
+        polynomial.num_of_vars, np.random.SeedSequence(seed), 0, NUM_OF_ROWS, dtype
+    )
+
+
+def _assert_close(values, expected):
+    np.testing.assert_allclose(
+        values, expected, rtol=1e-10, atol=1e-12 * np.abs(expected).max()
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("block_size", [1, 7, 512])
+def test_dense_polynomial_matches_its_expression(seed, block_size):
+    polynomial = _create_polynomial(seed, None)
+    data = _data(polynomial, seed)
+
+    expected = _eval(_dense_expression(polynomial), polynomial.variables, data)
+
+    assert polynomial.num_of_terms * polynomial.num_of_vars == len(polynomial.term_vars)
+    _assert_close(polynomial.evaluate(data, block_size), expected)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("block_size", [1, 7, 512])
+def test_sparse_polynomial_matches_its_expression(seed, block_size):
+    polynomial = _create_polynomial(seed, 5)
+    data = _data(polynomial, seed)
+
+    expected = _eval(polynomial.to_string_expression(), polynomial.variables, data)
+
+    _assert_close(polynomial.evaluate(data, block_size), expected)
+    # the variables a term does not use are the factors of exponent 0 of the
+    # dense expression
+    _assert_close(
+        expected, _eval(_dense_expression(polynomial), polynomial.variables, data)
+    )
+
+
+def test_float32_data_is_evaluated_as_float64():
+    polynomial = _create_polynomial(0, 5)
+    data = _data(polynomial, 0, np.float32)
+
+    values = polynomial.evaluate(data)
+
+    assert values.dtype == np.float64
+    expected = _eval(
+        polynomial.to_string_expression(),
+        polynomial.variables,
+        data.astype(np.float64),
+    )
+    _assert_close(values, expected)
+
+
+def test_stacked_polynomials_match_their_own_evaluation():
+    polynomials = [_create_polynomial(seed, 5) for seed in range(4)]
+    num_of_vars = min(polynomial.num_of_vars for polynomial in polynomials)
+    variables = polynomials[0].variables[:num_of_vars]
+    polynomials = [
+        Polynomial.from_dense(
+            polynomial.coefficients, polynomial.exponents[:, :num_of_vars], variables
+        )
+        for polynomial in polynomials
+    ]
+    data = _data(polynomials[0], 0)
+
+    values = evaluate_polynomials(polynomials, data)
+
+    for polynomial, polynomial_values in zip(polynomials, values):
+        np.testing.assert_array_equal(polynomial_values, polynomial.evaluate(data))
+
+
+@pytest.mark.parametrize("min_degree, max_degree", [(0, 11), (0, 1), (2, 4), (3, 3)])
+@pytest.mark.parametrize("max_num_of_vars_in_terms", [1, 3, 5])
+def test_sparse_terms_follow_the_parameters(
+    min_degree, max_degree, max_num_of_vars_in_terms
+):
+    rng = np.random.default_rng(0)
+    coefficients = {f"c_term_{term + 1}": 1.0 for term in range(200)}
+
+    polynomial = GeneratePolynomialSvc.create_polynomial(
+        10, min_degree, max_degree, 200, coefficients, rng, max_num_of_vars_in_terms
+    )
+
+    for _, term_vars, term_exponents in polynomial.iter_terms():
+        assert len(np.unique(term_vars)) == len(term_vars)
+        assert len(term_vars) <= max_num_of_vars_in_terms
+        assert np.all(term_exponents >= max(min_degree, 1))
+        assert np.all(term_exponents <= max_degree)
+    exponents = polynomial.term_exponents
+    assert exponents.min() == max(min_degree, 1)
+    assert exponents.max() == max_degree
+    # with min_degree 0, a term whose variables were all drawn with exponent 0 is
+    # left with its coefficient alone
+    num_of_factors = np.diff(polynomial.term_offsets)
+    assert (num_of_factors.min() == 0) == (min_degree == 0)
@@ -0,0 +1,120 @@
+import os
+
+import numpy as np
+import pytest
+
+from config import poly_params_config
+from src import main_routine, run_manifest
+from src.batch_runner import run_batch
+from src.data_manager import DataManager
+from src.generation_config import GenerationConfig
+from src.run_manifest import RunManifest
+
+# output settings of the config files, with a value other than their default, and
+# the module the run manifest reads them from
+OUTPUT_SETTINGS = [
+    (run_manifest, "CSV_FLOAT_PRECISION", 6),
+    (run_manifest, "CSV_COMPRESSION", "gzip"),
+    (run_manifest, "COLLECT_STATISTICS", False),
+    (run_manifest, "SHARD_ROWS", 1_000),
+    (run_manifest, "SHARD_BYTES", 2**20),
+    (poly_params_config, "COMPACT_POLYNOMIAL_METADATA", False),
+    (poly_params_config, "STORE_POLYNOMIAL_EXPRESSION", False),
+]
+
+
+@pytest.mark.parametrize("module, constant, value", OUTPUT_SETTINGS)
+def test_output_settings_change_the_run_key(monkeypatch, module, constant, value):
+    seed = np.random.SeedSequence(1)
+    run_key = RunManifest.get_run_key(seed, dataset_format="csv")
+
+    monkeypatch.setattr(module, constant, value)
+
+    assert RunManifest.get_run_key(seed, dataset_format="csv") != run_key
+
+
+def test_run_key_is_stable():
+    seed = np.random.SeedSequence(1)
+    assert RunManifest.get_run_key(seed, dataset_format="csv") == (
+        RunManifest.get_run_key(np.random.SeedSequence(1), dataset_format="csv")
+    )
+    assert RunManifest.get_run_key(seed, dataset_format="csv") != (
+        RunManifest.get_run_key(seed, dataset_format="npy")
+    )
+
+
+def _run_batch(num_of_workers=1):
+    with GenerationConfig(num_of_rows=200).apply():
+        return run_batch(3, master_seed=42, num_of_workers=num_of_workers)
+
+
+def _record_runs(monkeypatch, fail_at=None):
+    """Record the runs `main_routine.start` generates, failing at one of them."""
+    exec_ids = []
+    start = main_routine.start
+
+    def record(seed, exec_id, dataset_format):
+        if len(exec_ids) == fail_at:
+            raise RuntimeError("interrupted")
+        exec_ids.append(exec_id)
+        start(seed, exec_id, dataset_format)
+
+    monkeypatch.setattr(main_routine, "start", record)
+    return exec_ids
+
+
+def test_interrupted_batch_resumes(workdir, monkeypatch):
+    with monkeypatch.context() as patch:
+        generated = _record_runs(patch, fail_at=1)
+        with pytest.raises(RuntimeError, match="interrupted"):
+            _run_batch()
+
+    resumed = _record_runs(monkeypatch)
+    exec_ids = _run_batch()
+
+    assert generated == exec_ids[:1]
+    assert resumed == exec_ids[1:]
+    assert all(RunManifest.is_complete(exec_id) for exec_id in exec_ids)
+
+
+@pytest.mark.parametrize("change", ["remove", "truncate_and_pad", "flip_byte"])
+def test_changed_files_make_a_run_incomplete(workdir, monkeypatch, change):
+    exec_ids = _run_batch()
+    manifest = DataManager.load_json(RunManifest.get_path(exec_ids[1]))
+    path = next(
+        file["path"] for file in manifest["files"] if file["path"].endswith(".csv")
+    )
+    with open(path, "rb") as dataset_file:
+        data = dataset_file.read()
+
+    if change == "remove":
+        os.remove(path)
+    else:
+        if change == "truncate_and_pad":
+            changed = data[: len(data) // 2].ljust(len(data), b"\0")
+        else:
+            changed = data[:-2] + bytes([data[-2] ^ 1]) + data[-1:]
+        with open(path, "wb") as dataset_file:
+            dataset_file.write(changed)
+
+    assert [RunManifest.is_complete(exec_id) for exec_id in exec_ids] == [
+        True,
+        False,
+        True,
+    ]
+    resumed = _record_runs(monkeypatch)
+    assert _run_batch() == exec_ids
+    assert resumed == exec_ids[1:2]
+    with open(path, "rb") as dataset_file:
+        assert dataset_file.read() == data
+
+
+def test_manifests_without_checksums_are_checked_by_size(workdir):
+    exec_id = _run_batch()[0]
+    manifest_path = RunManifest.get_path(exec_id)
+    manifest = DataManager.load_json(manifest_path)
+    for file in manifest["files"]:
+        del file["sha256"]
+    DataManager.save_dict_to_json(manifest, manifest_path)
+
+    assert RunManifest.is_complete(exec_id)
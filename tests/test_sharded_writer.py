@@ -0,0 +1,146 @@
+import functools
+import glob
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.base import PATH_TO_METADATA_FILES, PATH_TO_STORE_GENERATED_DATASETS
+from src import main_routine
+from src.data_manager import DataManager
+from src.dataset_writers import (
+    SHARD_MANIFEST_NAME,
+    CsvWriter,
+    NpyWriter,
+    ShardedWriter,
+    create_dataset_writer,
+)
+from src.generation_config import GenerationConfig
+from src.sweep_runner import generate
+
+
+def _dataset(num_of_rows=1_000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.random((num_of_rows, 3)), columns=["v1", "v2", "v3"])
+    df["target"] = rng.random(num_of_rows) < 0.5
+    return df
+
+
+def _write(writer_class, df, chunk_size=128, **shard_sizes):
+    path = os.path.join(PATH_TO_STORE_GENERATED_DATASETS, "dataset")
+    with ShardedWriter(writer_class, path, len(df), **shard_sizes) as writer:
+        for start in range(0, len(df), chunk_size):
+            writer.write(df.iloc[start : start + chunk_size])
+    return writer, DataManager.load_json(writer.shard_manifest_path)
+
+
+def _read(path):
+    with open(path, "rb") as shard_file:
+        return shard_file.read()
+
+
+def _sha256(path):
+    return hashlib.sha256(_read(path)).hexdigest()
+
+
+def test_manifest_describes_the_shards(workdir):
+    df = _dataset()
+
+    writer, manifest = _write(CsvWriter, df, shard_rows=300)
+
+    assert manifest["file_format"] == "csv"
+    assert manifest["num_of_rows"] == len(df)
+    assert manifest["shard_rows"] == 300
+    assert [shard["first_row"] for shard in manifest["shards"]] == [0, 300, 600, 900]
+    shard_sizes = [shard["num_of_rows"] for shard in manifest["shards"]]
+    assert shard_sizes == [300, 300, 300, 100]
+    for shard in manifest["shards"]:
+        path = os.path.join(writer.path, shard["path"])
+        rows = df.iloc[shard["first_row"] : shard["first_row"] + shard["num_of_rows"]]
+        assert shard["bytes"] == os.path.getsize(path)
+        assert shard["sha256"] == _sha256(path)
+        positives = int(rows["target"].sum())
+        assert shard["class_balance"] == {
+            "target": {"negative": len(rows) - positives, "positive": positives}
+        }
+        assert _read(path) == rows.to_csv(index=False).encode()
+
+
+def test_checksums_detect_changed_shards(workdir):
+    writer, manifest = _write(CsvWriter, _dataset(), shard_rows=300)
+    shard = manifest["shards"][1]
+    path = os.path.join(writer.path, shard["path"])
+
+    with open(path, "a") as shard_file:
+        shard_file.write("0,0,0,True\n")
+
+    assert _sha256(path) != shard["sha256"]
+
+
+def test_npy_shards_hold_the_rows(workdir):
+    df = _dataset()
+
+    writer, manifest = _write(NpyWriter, df, shard_rows=400)
+
+    assert [shard["path"] for shard in manifest["shards"]] == [
+        "part-00000",
+        "part-00001",
+        "part-00002",
+    ]
+    values = np.concatenate(
+        [
+            np.load(os.path.join(writer.path, shard["path"], "v1.npy"))
+            for shard in manifest["shards"]
+        ]
+    )
+    np.testing.assert_array_equal(values, df["v1"].to_numpy())
+
+
+def test_shard_rows_are_estimated_from_shard_bytes(workdir):
+    df = _dataset(5_000)
+    row_bytes = len(df.to_csv(index=False)) / len(df)
+
+    writer, manifest = _write(CsvWriter, df, shard_bytes=int(1_000 * row_bytes))
+
+    assert manifest["shard_rows"] == pytest.approx(1_000, rel=0.05)
+    assert sum(shard["num_of_rows"] for shard in manifest["shards"]) == len(df)
+    assert "size-sample.csv" not in os.listdir(writer.path)
+
+
+def test_aborted_writer_leaves_nothing(workdir):
+    df = _dataset()
+    path = os.path.join(PATH_TO_STORE_GENERATED_DATASETS, "dataset")
+
+    with pytest.raises(ValueError):
+        with ShardedWriter(CsvWriter, path, len(df), shard_rows=300) as writer:
+            writer.write(df.iloc[:500])
+            raise ValueError("stop")
+
+    assert os.listdir(PATH_TO_STORE_GENERATED_DATASETS) == []
+
+
+def test_shard_sizes_are_required():
+    with pytest.raises(ValueError):
+        ShardedWriter(CsvWriter, "dataset", 10)
+
+
+def test_sharded_run_points_to_its_manifests(workdir, monkeypatch):
+    monkeypatch.setattr(
+        main_routine,
+        "create_dataset_writer",
+        functools.partial(create_dataset_writer, shard_rows=150),
+    )
+
+    exec_id = generate(GenerationConfig(num_of_rows=400), seed=3)
+
+    paths = glob.glob(os.path.join(PATH_TO_METADATA_FILES, f"*{exec_id}*.json"))
+    assert paths
+    for metadata in map(DataManager.load_json, paths):
+        assert metadata["relative_path_to_dataset"] is None
+        manifest_path = metadata["relative_path_to_shard_manifest"]
+        assert os.path.basename(manifest_path) == SHARD_MANIFEST_NAME
+        manifest = DataManager.load_json(manifest_path)
+        assert manifest["num_of_rows"] == 400
+        assert [shard["num_of_rows"] for shard in manifest["shards"]] == [150, 150, 100]
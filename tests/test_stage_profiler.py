@@ -0,0 +1,115 @@
+import functools
+import glob
+import json
+import os
+
+import numpy as np
+
+from config.base import PATH_TO_METADATA_FILES
+from src import main_routine
+from src.data_manager import DataManager
+from src.generation_config import GenerationConfig
+from src.stage_profiler import StageProfiler
+from src.sweep_runner import generate
+
+RECORD_KEYS = {
+    "stage",
+    "output_bytes",
+    "wall_seconds",
+    "cpu_seconds",
+    "peak_memory_bytes",
+    "process_max_rss_bytes",
+    "max_rss_growth_bytes",
+}
+
+
+def test_disabled_profiler_records_nothing(tmp_path):
+    profiler = StageProfiler(enabled=False, trace_memory=True)
+    path = tmp_path / "profile.jsonl"
+
+    with profiler.stage("stage") as record:
+        assert record is None
+    profiler.close("run", str(path))
+
+    assert profiler.to_dict() is None
+    assert not path.exists()
+
+
+def test_records_describe_each_stage():
+    profiler = StageProfiler(enabled=True, trace_memory=True)
+
+    with profiler.stage("allocate") as record:
+        record["output_bytes"] = 10
+        values = np.ones(2**20)
+    with profiler.stage("idle"):
+        pass
+    profiler.close()
+
+    allocate, idle = profiler.stages
+    for record in profiler.stages:
+        assert set(record) == RECORD_KEYS
+        assert record["wall_seconds"] >= 0
+        assert record["max_rss_growth_bytes"] >= 0
+    assert [allocate["stage"], idle["stage"]] == ["allocate", "idle"]
+    assert allocate["output_bytes"] == 10
+    assert allocate["peak_memory_bytes"] >= values.nbytes
+    assert idle["peak_memory_bytes"] < values.nbytes
+    # the peak RSS of the process never decreases, its growth is per stage
+    assert idle["process_max_rss_bytes"] >= allocate["process_max_rss_bytes"]
+    assert idle["max_rss_growth_bytes"] == (
+        idle["process_max_rss_bytes"] - allocate["process_max_rss_bytes"]
+    )
+    profile = profiler.to_dict()
+    assert profile["total_wall_seconds"] == (
+        allocate["wall_seconds"] + idle["wall_seconds"]
+    )
+
+
+def test_memory_is_only_traced_on_request():
+    profiler = StageProfiler(enabled=True, trace_memory=False)
+
+    with profiler.stage("stage"):
+        pass
+
+    assert profiler.stages[0]["peak_memory_bytes"] is None
+    assert profiler.stages[0]["process_max_rss_bytes"] > 0
+
+
+def test_profiles_are_appended_as_json_lines(tmp_path):
+    path = tmp_path / "profile.jsonl"
+
+    for exec_id in ("first", "second"):
+        profiler = StageProfiler(enabled=True, trace_memory=False)
+        with profiler.stage("stage"):
+            pass
+        profiler.close(exec_id, str(path))
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["exec_id"] for line in lines] == ["first", "second"]
+    for line in lines:
+        assert set(line) == {
+            "exec_id",
+            "total_wall_seconds",
+            "total_cpu_seconds",
+            "stages",
+        }
+        assert [set(stage) for stage in line["stages"]] == [RECORD_KEYS]
+
+
+def test_run_profile_is_stored_in_the_metadata(workdir, monkeypatch):
+    monkeypatch.setattr(
+        main_routine, "StageProfiler", functools.partial(StageProfiler, True, False)
+    )
+    monkeypatch.setattr(main_routine, "PATH_TO_PROFILE_FILE", "profile.jsonl")
+
+    exec_id = generate(GenerationConfig(num_of_rows=200), seed=3)
+
+    paths = glob.glob(os.path.join(PATH_TO_METADATA_FILES, f"*{exec_id}*.json"))
+    assert paths
+    for metadata in map(DataManager.load_json, paths):
+        stages = metadata["profile"]["stages"]
+        assert "write_datasets" in [stage["stage"] for stage in stages]
+        assert all(set(stage) == RECORD_KEYS for stage in stages)
+    with open("profile.jsonl") as profile_file:
+        (line,) = profile_file.read().splitlines()
+    assert json.loads(line)["exec_id"] == exec_id
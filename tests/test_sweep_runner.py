@@ -0,0 +1,163 @@
+import glob
+import os
+import shutil
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from config import base, cat_vars_config, poly_params_config
+from config.base import PATH_TO_METADATA_FILES, PATH_TO_STORE_GENERATED_DATASETS
+from src import main_routine
+from src.data_manager import DataManager
+from src.generation_config import GenerationConfig
+from src.sweep_runner import expand_grid, generate, run_sweep
+
+
+def _read_datasets():
+    datasets = {}
+    for path in glob.glob(os.path.join(PATH_TO_STORE_GENERATED_DATASETS, "*.csv")):
+        with open(path, "rb") as dataset_file:
+            datasets[os.path.basename(path)] = dataset_file.read()
+    return datasets
+
+
+def test_default_config_is_the_config_files():
+    config = GenerationConfig()
+
+    assert config.num_of_rows == poly_params_config.NUMBER_OF_INSTANCES
+    assert config.max_degree == poly_params_config.params["max_degree"]
+    assert config.high_cardinality == cat_vars_config.INSTANCES_IN_HIGH_CARD_CAT_VAR
+    assert config.dataset_format == base.DATASET_FORMAT
+
+
+def test_apply_sets_and_restores_the_constants():
+    config = GenerationConfig(
+        num_of_rows=124, max_degree=7, high_cardinality=9, dataset_format="npy"
+    )
+    params = dict(poly_params_config.params)
+    number_of_instances = main_routine.NUMBER_OF_INSTANCES
+
+    with pytest.raises(KeyError):
+        with config.apply():
+            assert poly_params_config.NUMBER_OF_INSTANCES == 124
+            # names imported by the modules of src are set too
+            assert main_routine.NUMBER_OF_INSTANCES == 124
+            assert poly_params_config.params["max_degree"] == 7
+            assert cat_vars_config.INSTANCES_IN_HIGH_CARD_CAT_VAR == 9
+            assert base.DATASET_FORMAT == "npy"
+            raise KeyError("restored on errors too")
+
+    assert poly_params_config.params == params
+    assert main_routine.NUMBER_OF_INSTANCES == number_of_instances
+    assert GenerationConfig() == GenerationConfig(num_of_rows=number_of_instances)
+
+
+def test_modules_imported_while_applied_are_restored(monkeypatch):
+    number_of_instances = poly_params_config.NUMBER_OF_INSTANCES
+    late_module = types.ModuleType("src._late_module")
+
+    with GenerationConfig(num_of_rows=124).apply():
+        monkeypatch.setitem(sys.modules, late_module.__name__, late_module)
+        exec(
+            "from config.poly_params_config import NUMBER_OF_INSTANCES",
+            vars(late_module),
+        )
+        assert late_module.NUMBER_OF_INSTANCES == 124
+
+    assert late_module.NUMBER_OF_INSTANCES == number_of_instances
+
+
+def test_rows_only_split_by_the_linear_target_are_accepted():
+    config = GenerationConfig(num_of_rows=1_002, generate_non_linear_target=False)
+
+    assert config.num_of_rows == 1_002
+
+
+def test_replace_sets_aliased_fields():
+    config = GenerationConfig().replace(num_of_vars=5, degree=3)
+
+    assert (config.min_num_of_vars, config.max_num_of_vars) == (5, 5)
+    assert config.max_degree == 3
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        {"num_of_rows": 0},
+        {"num_of_rows": 1_001},
+        {"num_of_rows": 1_002},
+        {"num_of_rows": 1_001, "generate_non_linear_target": False},
+        {"min_num_of_vars": 5, "max_num_of_vars": 4},
+        {"min_degree": 3, "max_degree": 2},
+        {"generate_linear_target": False, "generate_non_linear_target": False},
+        {"feature_dtype": "float16"},
+        {"dataset_format": "xlsx"},
+        {"num_of_polynomials": 2, "streaming": True},
+    ],
+)
+def test_invalid_configs_are_rejected(fields):
+    with pytest.raises(ValueError):
+        GenerationConfig(**fields)
+
+
+def test_expand_grid_varies_the_last_field_fastest():
+    configs = expand_grid(
+        {"num_of_rows": [100, 200], "degree": [2, 3, 4]},
+        GenerationConfig(min_degree=1),
+    )
+
+    assert [(config.num_of_rows, config.max_degree) for config in configs] == [
+        (100, 2),
+        (100, 3),
+        (100, 4),
+        (200, 2),
+        (200, 3),
+        (200, 4),
+    ]
+    assert {config.min_degree for config in configs} == {1}
+
+
+def test_generate_follows_the_config(workdir):
+    config = GenerationConfig().replace(num_of_rows=200, num_of_vars=6)
+
+    exec_id = generate(config, seed=3)
+
+    paths = glob.glob(os.path.join(PATH_TO_METADATA_FILES, f"*{exec_id}*.json"))
+    assert paths
+    for metadata in map(DataManager.load_json, paths):
+        assert metadata["generation"]["num_of_rows"] == 200
+        assert len(metadata["num_cols"] + metadata["cat_cols"]) == 6
+
+
+def test_generate_names_runs_after_their_seed_and_config(workdir, monkeypatch):
+    config = GenerationConfig(num_of_rows=200)
+    exec_id = generate(config, seed=3)
+
+    def fail(*args):
+        raise AssertionError("a completed run was generated again")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(main_routine, "start", fail)
+        assert generate(config, seed=np.random.SeedSequence(3)) == exec_id
+
+    assert generate(config, seed=4) != exec_id
+    assert generate(config.replace(num_of_rows=400), seed=3) != exec_id
+
+
+def test_sweep_on_processes_matches_sweep_in_process(workdir):
+    configs = expand_grid(
+        {"num_of_rows": [200, 400], "degree": [2, 3]}, GenerationConfig()
+    )
+
+    exec_ids = run_sweep(configs, master_seed=42, num_of_workers=1)
+    datasets = _read_datasets()
+    shutil.rmtree(PATH_TO_STORE_GENERATED_DATASETS)
+    shutil.rmtree(PATH_TO_METADATA_FILES)
+    os.makedirs(PATH_TO_STORE_GENERATED_DATASETS)
+    os.makedirs(PATH_TO_METADATA_FILES)
+
+    assert run_sweep(configs, master_seed=42, num_of_workers=2) == exec_ids
+    assert len(set(exec_ids)) == len(configs)
+    assert datasets and _read_datasets() == datasets
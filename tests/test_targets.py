@@ -0,0 +1,152 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.base import BASE_NAME, PATH_TO_METADATA_FILES
+from src.data_manager import DataManager
+from src.generation_config import GenerationConfig
+from src.streaming_manager import StreamingManager
+from src.sweep_runner import generate
+from src.virtual_dataset_manager import VirtualDatasetManager
+
+
+def _rank_rows(values):
+    """Rows in ascending order of value, tied rows in ascending order of row."""
+    return np.argsort(values, kind="stable")
+
+
+def _select_reference(values, upper_rows, lower_rows=0):
+    """
+    Select the rows with the largest and smallest values by sorting, as
+    DataManager is expected to: among tied rows, the later ones rank higher.
+    """
+    order = _rank_rows(values)
+    target = np.zeros(len(values), dtype=bool)
+    upper = order[len(order) - upper_rows :]
+    lower = order[:lower_rows]
+    target[upper] = True
+    target[lower] = True
+
+    upper_threshold = float(values[upper].min()) if len(upper) else None
+    lower_threshold = float(values[lower].max()) if len(lower) else None
+    upper_ties = sorted(int(row) for row in upper if values[row] == upper_threshold)
+    lower_ties = sorted(int(row) for row in lower if values[row] == lower_threshold)
+    return target, upper_threshold, upper_ties, lower_threshold, lower_ties
+
+
+def _values(kind, num_of_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    if kind == "distinct":
+        return rng.normal(size=num_of_rows)
+    if kind == "ties":
+        # few distinct values, so thresholds fall on long runs of ties
+        return rng.integers(-3, 4, num_of_rows).astype(np.float64)
+    return np.full(num_of_rows, 1.5)
+
+
+# targets are exactly balanced, which takes a number of rows multiple of 4
+CASES = [
+    (kind, num_of_rows)
+    for kind in ("distinct", "ties", "constant")
+    for num_of_rows in (4, 8, 100, 1_000)
+]
+
+
+@pytest.mark.parametrize("kind, num_of_rows", CASES)
+def test_linear_target_matches_sort(kind, num_of_rows):
+    values = _values(kind, num_of_rows)
+    expected, threshold, tie_rows, _, _ = _select_reference(values, num_of_rows // 2)
+
+    target, thresholds = DataManager.compute_binary_linear_target(values)
+
+    np.testing.assert_array_equal(target, expected)
+    assert thresholds == {"threshold": threshold, "positive_tie_rows": tie_rows}
+    np.testing.assert_array_equal(
+        DataManager.apply_binary_linear_target(values, thresholds), expected
+    )
+
+
+@pytest.mark.parametrize("kind, num_of_rows", CASES)
+def test_non_linear_target_matches_sort(kind, num_of_rows):
+    values = _values(kind, num_of_rows)
+    quarter = num_of_rows // 4
+    (
+        expected,
+        upper_threshold,
+        upper_ties,
+        lower_threshold,
+        lower_ties,
+    ) = _select_reference(values, quarter, quarter)
+
+    target, thresholds = DataManager.compute_binary_non_linear_target(values)
+
+    np.testing.assert_array_equal(target, expected)
+    assert thresholds == {
+        "lower_threshold": lower_threshold,
+        "lower_positive_tie_rows": lower_ties,
+        "upper_threshold": upper_threshold,
+        "upper_positive_tie_rows": upper_ties,
+    }
+    np.testing.assert_array_equal(
+        DataManager.apply_binary_non_linear_target(values, thresholds), expected
+    )
+
+
+@pytest.mark.parametrize("kind", ["distinct", "ties", "constant"])
+def test_thresholds_apply_to_row_ranges(kind):
+    values = _values(kind, 1_000, seed=1)
+    for compute, apply in (
+        (
+            DataManager.compute_binary_linear_target,
+            DataManager.apply_binary_linear_target,
+        ),
+        (
+            DataManager.compute_binary_non_linear_target,
+            DataManager.apply_binary_non_linear_target,
+        ),
+    ):
+        target, thresholds = compute(values)
+        chunks = [
+            apply(values[start : start + 128], thresholds, start)
+            for start in range(0, len(values), 128)
+        ]
+        np.testing.assert_array_equal(np.concatenate(chunks), target)
+
+
+@pytest.mark.parametrize("kind, num_of_rows", CASES)
+def test_streaming_thresholds_match_in_memory(kind, num_of_rows):
+    values = _values(kind, num_of_rows, seed=2)
+
+    assert StreamingManager.compute_linear_thresholds(values, 64) == (
+        DataManager.compute_binary_linear_target(values)[1]
+    )
+    assert StreamingManager.compute_non_linear_thresholds(values, 64) == (
+        DataManager.compute_binary_non_linear_target(values)[1]
+    )
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_datasets_are_built_with_their_target_type(workdir, streaming):
+    exec_id = generate(
+        GenerationConfig(num_of_rows=400, streaming=streaming, chunk_size=128),
+        seed=3,
+    )
+    compute = {
+        "linear": DataManager.compute_binary_linear_target,
+        "non_linear": DataManager.compute_binary_non_linear_target,
+    }
+    for target_type, compute_target in compute.items():
+        path = os.path.join(
+            PATH_TO_METADATA_FILES,
+            f"{BASE_NAME}_{exec_id}_{target_type}_no_categorical_attributes.json",
+        )
+        metadata = DataManager.load_json(path)
+        df = pd.read_csv(metadata["relative_path_to_dataset"])
+        polynomial = VirtualDatasetManager.load_polynomial(metadata)
+        num_target = polynomial.evaluate(df[polynomial.variables].to_numpy())
+
+        np.testing.assert_array_equal(
+            df["target"].to_numpy(), compute_target(num_target)[0]
+        )
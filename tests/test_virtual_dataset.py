@@ -0,0 +1,60 @@
+import glob
+import os
+
+import pytest
+
+from config.base import PATH_TO_METADATA_FILES
+from src.data_manager import DataManager
+from src.generation_config import GenerationConfig
+from src.sweep_runner import generate
+from src.virtual_dataset_manager import VirtualDatasetManager
+
+NUM_OF_ROWS = 1_000
+CHUNK_SIZE = 300
+ROW_RANGES = [(0, 1), (1, 299), (299, 301), (301, 700), (700, NUM_OF_ROWS)]
+
+
+def _generate(streaming):
+    """Generate a seeded CSV run and return the metadata of its datasets."""
+    config = GenerationConfig(
+        num_of_rows=NUM_OF_ROWS,
+        streaming=streaming,
+        chunk_size=CHUNK_SIZE,
+        dataset_format="csv",
+    )
+    exec_id = generate(config, seed=5)
+    paths = sorted(glob.glob(os.path.join(PATH_TO_METADATA_FILES, f"*{exec_id}*.json")))
+    assert paths
+    return [DataManager.load_json(path) for path in paths]
+
+
+def _read_dataset(metadata):
+    with open(metadata["relative_path_to_dataset"], "rb") as dataset_file:
+        return dataset_file.read()
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_load_is_identical_to_stored_dataset(workdir, streaming):
+    for metadata in _generate(streaming):
+        rebuilt = VirtualDatasetManager.load(metadata).to_csv(index=False)
+        assert rebuilt.encode() == _read_dataset(metadata), metadata["dataset_name"]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_row_ranges_are_identical_to_stored_dataset(workdir, streaming):
+    for metadata in _generate(streaming):
+        parts = [
+            VirtualDatasetManager.build_rows(metadata, start, stop).to_csv(
+                index=False, header=start == 0
+            )
+            for start, stop in ROW_RANGES
+        ]
+        assert "".join(parts).encode() == _read_dataset(metadata), metadata[
+            "dataset_name"
+        ]
+
+
+def test_load_clips_row_range(workdir):
+    metadata = _generate(False)[0]
+    assert len(VirtualDatasetManager.load(metadata, 990, 2_000)) == 10
+    assert len(VirtualDatasetManager.load(metadata, 2_000)) == 0